@@ -108,6 +108,7 @@ import pickle
 import re
 import subprocess
 import sys
+import threading
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from subprocess import DEVNULL, PIPE
@@ -117,6 +118,8 @@ import SCons.Debug
 import SCons.Errors
 import SCons.Subst
 import SCons.Util
+import SCons.Warnings
+from SCons.compat import PICKLE_PROTOCOL
 
 # we use these a lot, so try to optimize them
 from SCons.Debug import logInstanceCreation
@@ -133,6 +136,23 @@ print_actions = True
 execute_actions = True
 print_actions_presub = False
 
+# A concurrent.futures executor set by SCons.Taskmaster.Job when building
+# with --jobs-backend=process. Python function actions which can describe
+# themselves as a picklable call are submitted to it instead of being run
+# on the job thread, so they do not contend for the GIL.
+process_pool = None
+
+# Returned by _run_in_process() when a call could not be sent to the pool.
+_not_run = object()
+
+# Held while giving up on a broken process_pool, so that it is reported once.
+_process_pool_lock = threading.Lock()
+
+# Set by SCons.Script.Main when sharing a jobserver with the commands
+# run by actions (--jobserver): the --jobserver-auth word to add to
+# MAKEFLAGS in their execution environment.
+jobserver_makeflags = None
+
 # Use pickle protocol 4 when pickling functions for signature.
 # This is the common format since Python 3.4
 # TODO: use is commented out as not stable since 2017: e0bc3a04d5. Drop?
@@ -816,6 +836,11 @@ def _resolve_shell_env(env, target, source):
             if not isinstance(ENV, dict):
                 raise SCons.Errors.UserError(f"SHELL_ENV_GENERATORS function: {generator} must return a dict.")
 
+    if jobserver_makeflags:
+        ENV = ENV.copy()
+        makeflags = ENV.get('MAKEFLAGS')
+        ENV['MAKEFLAGS'] = f"{makeflags} {jobserver_makeflags}" if makeflags else jobserver_makeflags
+
     return ENV
 
 
@@ -1361,6 +1386,7 @@ class FunctionAction(_ActionAction):
         if SCons.Debug.track_instances: logInstanceCreation(self, 'Action.FunctionAction')
 
         self.execfunction = execfunction
+        self.picklable = kw.get('picklable', False)
         try:
             self.funccontents = _callable_contents(execfunction)
         except AttributeError:
@@ -1431,7 +1457,13 @@ class FunctionAction(_ActionAction):
                 source = executor.get_all_sources()
             rsources = list(map(rfile, source))
             try:
-                result = self.execfunction(target=target, source=rsources, env=env)
+                result = _not_run
+                if process_pool is not None:
+                    call = self.process_call(target, rsources, env)
+                    if call is not None:
+                        result = _run_in_process(*call)
+                if result is _not_run:
+                    result = self.execfunction(target=target, source=rsources, env=env)
             except (KeyboardInterrupt, SystemExit):
                 raise
             except Exception as e:
@@ -1454,6 +1486,30 @@ class FunctionAction(_ActionAction):
             # more information about this issue.
             del exc_info
 
+    def process_call(self, target, source, env):
+        """Return this action as a ``(function, args, kw)`` call.
+
+        The wrapped callable opts in by providing a ``process_args``
+        method taking the usual *target*, *source* and *env* arguments,
+        or the action was created with ``picklable=True``, in which case
+        the function itself is called with the paths of the targets and
+        sources and a dictionary of the plain construction variables.
+        Returns ``None`` if neither applies, and the action runs on the
+        job thread.
+        """
+        try:
+            process_args = self.execfunction.process_args
+        except AttributeError:
+            if not self.picklable:
+                return None
+            kw = {
+                'target': [t.get_abspath() for t in target],
+                'source': [s.get_abspath() for s in source],
+                'env': {k: v for k, v in env.items() if _is_plain_value(v)},
+            }
+            return self.execfunction, (), kw
+        return process_args(target, source, env)
+
     def get_presig(self, target, source, env, executor: Executor | None = None):
         """Return the signature contents of this callable action."""
         try:
@@ -1521,6 +1577,84 @@ class ListAction(ActionBase):
         return list(result.keys())
 
 
+def _call_in_process(call):
+    """Run the pickled call *call* in a pool worker.
+
+    Returns ``(exception, result)``: errors raised by the function are
+    passed back as a value, so that anything :func:`_run_in_process`
+    sees raised comes from getting the call to the worker and back.
+    """
+    func, args, kw = pickle.loads(call)
+    try:
+        return None, func(*args, **kw)
+    except Exception as e:
+        return e, None
+
+
+def _run_in_process(func, args, kw):
+    """Run a call in :data:`process_pool` and return its result.
+
+    The call is pickled before it is submitted.  Returns ``_not_run``
+    if that fails, typically because *func* or its arguments cannot be
+    pickled, or if the pool cannot take the call, in which case the
+    caller runs it on the job thread instead.  Once submitted, the call
+    may have run, so any error getting it back is raised rather than
+    running it again.  If the pool breaks, a warning is issued and
+    later calls run on the job threads.
+    """
+    global process_pool
+    pool = process_pool
+    if pool is None:
+        return _not_run
+    try:
+        call = pickle.dumps((func, args, kw), PICKLE_PROTOCOL)
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except Exception:
+        return _not_run
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        future = pool.submit(_call_in_process, call)
+    except (BrokenProcessPool, RuntimeError) as e:
+        # Broken before the call was sent, or shut down.
+        _process_pool_failed(pool, e)
+        return _not_run
+    try:
+        error, result = future.result()
+    except BrokenProcessPool as e:
+        _process_pool_failed(pool, e)
+        raise
+    if error is not None:
+        raise error
+    return result
+
+
+def _process_pool_failed(pool, e) -> None:
+    """Stop using *pool*, warning the first time it is given up on."""
+    global process_pool
+    with _process_pool_lock:
+        if process_pool is not pool:
+            return
+        process_pool = None
+    SCons.Warnings.warn(
+        SCons.Warnings.NoParallelSupportWarning,
+        "The --jobs-backend=process worker pool failed (%s); "
+        "function actions now run on the job threads." % e)
+
+
+def _is_plain_value(obj) -> bool:
+    """Return whether *obj* is built only from simple picklable values."""
+    if obj is None or isinstance(obj, (str, bytes, int, float)):
+        return True
+    if isinstance(obj, (list, tuple)):
+        return all(_is_plain_value(x) for x in obj)
+    if isinstance(obj, dict):
+        return all(_is_plain_value(k) and _is_plain_value(v)
+                   for k, v in obj.items())
+    return False
+
+
 class ActionCaller:
     """A class for delaying calling an Action function with specific
     (positional and keyword) arguments until the Action is actually
@@ -1584,6 +1718,19 @@ class ActionCaller:
         kw = self.subst_kw(target, source, env)
         return self.parent.actfunc(*args, **kw)
 
+    def process_args(self, target, source, env):
+        """Return the expanded call for running in another process.
+
+        Only calls whose arguments expand to plain values (strings,
+        numbers and containers of those) are offered; anything else,
+        such as the ``$__env__`` special, returns ``None``.
+        """
+        args = self.subst_args(target, source, env)
+        kw = self.subst_kw(target, source, env)
+        if not _is_plain_value((args, kw)):
+            return None
+        return self.parent.actfunc, args, kw
+
     def strfunction(self, target, source, env):
         args = self.subst_args(target, source, env)
         kw = self.subst_kw(target, source, env)
@@ -40,9 +40,11 @@ class GlobalActFunc:
 
 import io
 import os
+import pickle
 import sys
 import types
 import unittest
+from concurrent.futures.process import BrokenProcessPool
 from unittest import mock
 from subprocess import PIPE
 from typing import TYPE_CHECKING
@@ -50,6 +52,7 @@ from typing import TYPE_CHECKING
 import SCons.Action
 import SCons.Environment
 import SCons.Errors
+import SCons.Warnings
 from SCons.Action import scons_subproc_run
 
 if TYPE_CHECKING:
@@ -1823,6 +1826,123 @@ class FunctionActionTestCase(unittest.TestCase):
         s = a.strfunction(target=[], source=[], env=Environment())
         assert s == 'function', s
 
+    def test_process_call(self) -> None:
+        """Test running a FunctionAction in the process pool"""
+
+        def strfunc(name) -> str:
+            return 'exists(%s)' % name
+
+        def local_func(name) -> bool:
+            return False
+
+        class Future:
+            def __init__(self, result=None, error=None) -> None:
+                self._result = result
+                self._error = error
+
+            def result(self):
+                if self._error is not None:
+                    raise self._error
+                return self._result
+
+        class Pool:
+            """Runs calls at once, or fails them as *error* says."""
+            def __init__(self) -> None:
+                self.calls = []
+                self.error = None
+
+            def submit(self, func, *args, **kw):
+                self.calls.append(pickle.loads(*args))
+                if self.error is not None:
+                    return Future(error=self.error)
+                return Future(func(*args, **kw))
+
+        env = Environment(FOO='no_such_file')
+        a = SCons.Action.ActionFactory(os.path.exists, strfunc)('$FOO')
+        call = a.process_call([], [], env)
+        assert call == (os.path.exists, ['no_such_file'], {}), call
+
+        a2 = SCons.Action.ActionFactory(os.path.exists, strfunc)('$__env__')
+        assert a2.process_call([], [], env) is None
+        a2 = SCons.Action.FunctionAction(local_func, {})
+        assert a2.process_call([], [], env) is None
+
+        class Node(DummyNode):
+            def get_abspath(self) -> str:
+                return os.path.abspath(self.name)
+
+        t = Node('t')
+        s = Node('s')
+        a3 = SCons.Action.FunctionAction(_picklable_func, {'picklable': True})
+        func, args, kw = a3.process_call([t], [s], env)
+        assert func is _picklable_func, func
+        assert kw['target'] == [t.get_abspath()], kw['target']
+        assert kw['source'] == [s.get_abspath()], kw['source']
+        assert kw['env']['FOO'] == 'no_such_file', kw['env']
+        assert 'SPAWN' not in kw['env'], kw['env']
+
+        pool = Pool()
+        save_pool = SCons.Action.process_pool
+        save_print = SCons.Action.print_actions
+        SCons.Action.process_pool = pool
+        SCons.Action.print_actions = False
+        try:
+            r = a([], [], env)
+            assert not r, r
+            assert pool.calls == [
+                (os.path.exists, ['no_such_file'], {}),
+            ], pool.calls
+
+            # A call which cannot be pickled runs on the job thread.
+            ran = []
+            a4 = SCons.Action.ActionFactory(
+                lambda name: ran.append(name), strfunc)('$FOO')
+            pool.calls = []
+            r = a4([], [], env)
+            assert not r, r
+            assert pool.calls == [], pool.calls
+            assert ran == ['no_such_file'], ran
+
+            # Errors raised in the worker fail the action.
+            r = a3([t], [s], env)
+            assert isinstance(r, SCons.Errors.BuildError), r
+            assert 'picklable failed' in str(r), r
+
+            # An error getting a submitted call back fails the action,
+            # which is not run again on the job thread.
+            pool.error = pickle.PicklingError("bad result")
+            r = a([], [], env)
+            assert isinstance(r, SCons.Errors.BuildError), r
+            assert 'bad result' in str(r), r
+            assert SCons.Action.process_pool is pool
+
+            # A broken pool is given up on, with a warning.
+            pool.error = BrokenProcessPool("worker died")
+            warnings = []
+            save_warn = SCons.Warnings.warn
+            SCons.Warnings.warn = lambda cls, msg: warnings.append(msg)
+            try:
+                r = a([], [], env)
+                assert isinstance(r, SCons.Errors.BuildError), r
+                assert SCons.Action.process_pool is None
+                pool.calls = []
+                ran = []
+                r = a4([], [], env)
+            finally:
+                SCons.Warnings.warn = save_warn
+            assert not r, r
+            assert pool.calls == [], pool.calls
+            assert ran == ['no_such_file'], ran
+            assert len(warnings) == 1, warnings
+            assert 'worker died' in warnings[0], warnings
+        finally:
+            SCons.Action.process_pool = save_pool
+            SCons.Action.print_actions = save_print
+
+
+def _picklable_func(target, source, env):
+    raise ValueError("picklable failed")
+
 
 class ListActionTestCase(unittest.TestCase):
 
@@ -2143,6 +2263,25 @@ class ActionCallerTestCase(unittest.TestCase):
         assert strfunc_args == [4, '5', 6, 'w   s'], strfunc_args
 
 
+    def test_process_args(self) -> None:
+        """Test the ActionCaller process_args() method"""
+
+        def strfunc(a1, a2) -> None:
+            pass
+
+        af = SCons.Action.ActionFactory(os.path.join, strfunc)
+        e = Environment(FOO='foo', BAR=['b', 'c'])
+        ac = SCons.Action.ActionCaller(af, ['$FOO', 3], {'k': '$BAR'})
+        call = ac.process_args([], [], e)
+        assert call == (os.path.join, ['foo', 3], {'k': 'b c'}), call
+
+        ac = SCons.Action.ActionCaller(af, ['$__env__', 3], {})
+        assert ac.process_args([], [], e) is None
+
+        ac = SCons.Action.ActionCaller(af, [object(), 3], {})
+        assert ac.process_args([], [], e) is None
+
+
 class ActionFactoryTestCase(unittest.TestCase):
     def test___init__(self) -> None:
         """Test creation of an ActionFactory"""
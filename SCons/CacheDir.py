@@ -25,13 +25,18 @@
 """
 
 import atexit
+import errno
 import json
 import os
+import queue
 import shutil
 import stat
 import sys
 import tempfile
+import threading
+import time
 import uuid
+import zlib
 
 import SCons.Action
 import SCons.Errors
@@ -51,34 +56,205 @@ cache_show = False
 cache_readonly = False
 cache_tmp_uuid = uuid.uuid4().hex
 
+# The ways files are put into and taken out of the cache.  A cache set
+# to use hard links still uses reflinks where it can, as they are as
+# fast and leave the copies independent.  Every mode falls back to
+# copying.
+LINK_MODES = ('copy', 'reflink', 'hardlink')
+
+# The Linux ioctl which makes a file share the data of another.
+FICLONE = 0x40049409
+
+# Bytes read at a time when compressing or decompressing cache entries.
+COPY_CHUNKSIZE = 1024 * 1024
+
+# Compression formats for cache entries: the name used in the config
+# file maps to the suffix added to the names of entries in that format,
+# and to factories for objects with the compress()/flush() and
+# decompress() methods of zlib's compression and decompression objects.
+# Entries without a suffix are not compressed, so a cache can hold
+# entries in several formats at once.
+_CODECS = {}
+
+
+def register_codec(name, suffix, compressor, decompressor) -> None:
+    """Make a compression format available for CacheDir entries.
+
+    A cache uses it if its config file sets ``"compression"`` to *name*.
+    """
+    _CODECS[name] = (suffix, compressor, decompressor)
+
+
+def get_codecs():
+    """Return the names of the available compression formats."""
+    return sorted(_CODECS)
+
+
+register_codec('zlib', '.zlib', zlib.compressobj, zlib.decompressobj)
+try:
+    import lzma
+except ImportError:
+    pass
+else:
+    register_codec('lzma', '.xz', lzma.LZMACompressor, lzma.LZMADecompressor)
+
+
+def codec_of(path):
+    """Return the compression format of the cache entry *path*, or ``None``."""
+    for name, (suffix, _, _) in _CODECS.items():
+        if path.endswith(suffix):
+            return name
+    return None
+
+
+def compress_file(codec, src, dst) -> None:
+    """Write *src* compressed with *codec* to the new file *dst*."""
+    compressor = _CODECS[codec][1]()
+    with open(src, 'rb') as s, open(dst, 'xb') as d:
+        while True:
+            chunk = s.read(COPY_CHUNKSIZE)
+            if not chunk:
+                break
+            d.write(compressor.compress(chunk))
+        d.write(compressor.flush())
+
+
+def decompressed_chunks(codec, src):
+    """Yield the contents of *src*, compressed with *codec*, in pieces.
+
+    Raises:
+        OSError: *src* cannot be read, or is not valid or complete
+           data in that format.
+    """
+    decompressor = _CODECS[codec][2]()
+    with open(src, 'rb') as s:
+        try:
+            while True:
+                chunk = s.read(COPY_CHUNKSIZE)
+                if not chunk:
+                    break
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+            flush = getattr(decompressor, 'flush', None)
+            if flush is not None:
+                data = flush()
+                if data:
+                    yield data
+        except OSError:
+            raise
+        except Exception as e:
+            raise OSError(errno.EIO, "Invalid %s data: %s" % (codec, e), src) from e
+    if not getattr(decompressor, 'eof', True):
+        raise OSError(errno.EIO, "Truncated %s data" % codec, src)
+
+
+# Caches with push threads, for flush().
+_pushing_caches = []
+
+
+def flush() -> None:
+    """Wait for the files queued to be pushed to any cache to be pushed."""
+    for cd in list(_pushing_caches):
+        cd.flush()
+
+
+# Caches which are not directories: URL schemes map to the CacheDir
+# subclasses used for cache paths given as URLs of that scheme.
+_SCHEMES = {}
+
+
+def register_scheme(scheme, cachedir_class) -> None:
+    """Use *cachedir_class* for caches whose path is a *scheme* URL.
+
+    *cachedir_class* must be a subclass of :class:`CacheDir`, and is
+    only used if the construction environment does not choose a class
+    with ``CACHEDIR_CLASS``.
+    """
+    _SCHEMES[scheme.lower()] = cachedir_class
+
+
+def scheme_class(path):
+    """Return the CacheDir class for the cache *path*, or ``None``.
+
+    That is the class registered for the scheme of *path*, if it is a
+    URL, or ``None`` for a directory.
+    """
+    if not isinstance(path, str):
+        return None
+    scheme, sep, _ = path.partition('://')
+    if not sep:
+        return None
+    # Registers the HTTP backend.
+    import SCons.HTTPCache  # pylint: disable=import-outside-toplevel,unused-import
+    return _SCHEMES.get(scheme.lower())
+
+
+def reflink(src, dst) -> None:
+    """Make *dst* a copy-on-write clone of the file *src*.
+
+    Raises:
+        OSError: the operating or file system cannot clone files, or
+           *src* and *dst* are on different file systems.
+    """
+    try:
+        import fcntl  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise OSError(errno.EOPNOTSUPP, "Cannot clone files", dst) from e
+    with open(src, 'rb') as s:
+        try:
+            with open(dst, 'xb') as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+            raise
+
+
 def CacheRetrieveFunc(target, source, env) -> int:
     t = target[0]
     fs = t.fs
     cd = env.get_CacheDir()
     cd.requests += 1
-    cachedir, cachefile = cd.cachepath(t)
+    cachedir, cachefile = cd.retrievepath(t)
     if not fs.exists(cachefile):
         cd.CacheDebug('CacheRetrieve(%s):  %s not in cache\n', t, cachefile)
         return 1
     cd.hits += 1
     cd.CacheDebug('CacheRetrieve(%s):  retrieving from %s\n', t, cachefile)
     if SCons.Action.execute_actions:
-        if fs.islink(cachefile):
-            fs.symlink(fs.readlink(cachefile), t.get_internal_path())
-        else:
-            cd.copy_from_cache(env, cachefile, t.get_internal_path())
-            try:
-                os.utime(cachefile, None)
-            except OSError:
-                pass
-        st = fs.stat(cachefile)
-        fs.chmod(t.get_internal_path(), stat.S_IMODE(st.st_mode) | stat.S_IWRITE)
+        linked = False
+        try:
+            if fs.islink(cachefile):
+                fs.symlink(fs.readlink(cachefile), t.get_internal_path())
+            else:
+                cd.copy_from_cache(env, cachefile, t.get_internal_path())
+                try:
+                    # The modification time records when the file was
+                    # last used, for eviction.
+                    os.utime(cachefile, None)
+                except OSError:
+                    pass
+            st = fs.stat(cachefile)
+            if not fs.islink(cachefile):
+                linked = os.path.samestat(st, fs.stat(t.get_internal_path()))
+        except FileNotFoundError:
+            # Evicted by another build since it was found.
+            cd.hits -= 1
+            cd.CacheDebug('CacheRetrieve(%s):  %s evicted from cache\n', t, cachefile)
+            return 1
+        if not linked:
+            # A hard link is left read-only, as writing to it would
+            # change the cached file.
+            fs.chmod(t.get_internal_path(), stat.S_IMODE(st.st_mode) | stat.S_IWRITE)
     return 0
 
 def CacheRetrieveString(target, source, env) -> str:
     t = target[0]
     cd = env.get_CacheDir()
-    cachedir, cachefile = cd.cachepath(t)
+    cachedir, cachefile = cd.retrievepath(t)
     if t.fs.exists(cachefile):
         return "Retrieved `%s' from cache" % t.get_internal_path()
     return ""
@@ -106,6 +282,10 @@ def CachePushFunc(target, source, env) -> None:
         # the cache after we decide we need to build it but before our
         # build completes.
         cd.CacheDebug('CachePush(%s):  %s already exists in cache\n', t, cachefile)
+        try:
+            os.utime(cachefile, None)
+        except OSError:
+            pass
         return
 
     cd.CacheDebug('CachePush(%s):  pushing to %s\n', t, cachefile)
@@ -134,12 +314,31 @@ def CachePushFunc(target, source, env) -> None:
         msg = errfmt % (str(t), cachefile)
         cd.CacheDebug(errfmt + '\n', str(t), cachefile)
         SCons.Warnings.warn(SCons.Warnings.CacheWriteErrorWarning, msg)
+    else:
+        try:
+            cd.pushed(os.lstat(cachefile).st_size)
+        except OSError:
+            pass
 
 CachePush = SCons.Action.Action(CachePushFunc, None)
 
 
 class CacheDir:
 
+    # When the cache has a maximum size, eviction brings it down to
+    # this fraction of that size, so it does not run on every push.
+    evict_low_water = 0.9
+
+    # Seconds after which a lock left behind by an eviction in a build
+    # which was killed is taken to be stale.
+    evict_lock_timeout = 600
+
+    # Number of threads copying built files into the cache, and how
+    # many files may be waiting for them before a push waits too.
+    # With no threads, files are copied as they are pushed.
+    push_threads = 2
+    push_queue_size = 32
+
     def __init__(self, path) -> None:
         """Initialize a CacheDir object.
 
@@ -150,10 +349,21 @@ class CacheDir:
         """
         self.requests = 0
         self.hits = 0
+        self.evicted = 0
         self.path = path
         self.current_cache_debug = None
         self.debugFP = None
         self.config = {}
+        self.max_size = None
+        self.link_mode = 'copy'
+        self.compression = None
+        self._evict_lock = threading.Lock()
+        self._evictor = None
+        # Bytes pushed since eviction was last started.
+        self._pushed = 0
+        self._push_lock = threading.Lock()
+        self._push_queue = None
+        self._pushers = []
         if path is not None:
             self._readconfig(path)
 
@@ -172,6 +382,7 @@ class CacheDir:
         #   seem like it would be better to preserve an exisiting value.
         # self.config.setdefault('prefix_len', CACHE_PREFIX_LEN)
         self.config['prefix_len'] = CACHE_PREFIX_LEN
+        self.config['link_mode'] = self._probe_link_mode(path)
         with SCons.Util.FileLock(config_file, timeout=5, writer=True), open(
             config_file, "x"
         ) as config:
@@ -190,6 +401,30 @@ class CacheDir:
         except FileExistsError:
             pass
 
+    @staticmethod
+    def _probe_link_mode(path: str) -> str:
+        """Return the best safe default link mode for a cache in *path*.
+
+        That is ``'reflink'`` if files there can be cloned, else
+        ``'copy'``.  Hard links, which share the cached file with the
+        build, are only used if the config file is changed to ask.
+        """
+        src = os.path.join(path, 'probe.tmp' + cache_tmp_uuid)
+        dst = src + '.clone'
+        try:
+            with open(src, 'wb') as f:
+                f.write(b'probe\n')
+            reflink(src, dst)
+        except OSError:
+            return 'copy'
+        finally:
+            for name in (src, dst):
+                try:
+                    os.unlink(name)
+                except OSError:
+                    pass
+        return 'reflink'
+
     def _mkdir_atomic(self, path: str) -> bool:
         """Create cache directory at *path*.
 
@@ -267,6 +502,28 @@ class CacheDir:
         except (ValueError, json.decoder.JSONDecodeError):
             msg = "Failed to read cache configuration for " + path
             raise SCons.Errors.SConsEnvironmentError(msg)
+        max_size = self.config.get('max_size')
+        if max_size is not None:
+            try:
+                self.max_size = SCons.Util.parse_size(max_size)
+            except ValueError:
+                msg = "Invalid max_size %r in cache configuration for %s" % (
+                    max_size, path)
+                raise SCons.Errors.SConsEnvironmentError(msg)
+            # Check the size of the cache on the first push.
+            self._pushed = self.max_size
+        link_mode = self.config.get('link_mode', 'copy')
+        if link_mode not in LINK_MODES:
+            msg = "Invalid link_mode %r in cache configuration for %s" % (
+                link_mode, path)
+            raise SCons.Errors.SConsEnvironmentError(msg)
+        self.link_mode = link_mode
+        compression = self.config.get('compression')
+        if compression is not None and compression not in _CODECS:
+            msg = "Invalid compression %r in cache configuration for %s" % (
+                compression, path)
+            raise SCons.Errors.SConsEnvironmentError(msg)
+        self.compression = compression
 
     def CacheDebug(self, fmt, target, cachefile) -> None:
         if cache_debug != self.current_cache_debug:
@@ -283,12 +540,70 @@ class CacheDir:
             self.current_cache_debug = cache_debug
         if self.debugFP:
             self.debugFP.write(fmt % (target, os.path.split(cachefile)[1]))
-            self.debugFP.write("requests: %d, hits: %d, misses: %d, hit rate: %.2f%%\n" %
-                               (self.requests, self.hits, self.misses, self.hit_ratio))
+            self.debugFP.write("requests: %d, hits: %d, misses: %d, hit rate: %.2f%%, "
+                               "bytes evicted: %d\n" %
+                               (self.requests, self.hits, self.misses, self.hit_ratio,
+                                self.evicted))
+
+    @staticmethod
+    def _link(link_mode, src, dst, timestamp_newer) -> bool:
+        """Try to put *src* at *dst* without copying its data.
+
+        Returns whether that worked with *link_mode*.
+        """
+        if link_mode == 'hardlink':
+            modes = ('reflink', 'hardlink')
+        elif link_mode == 'reflink':
+            modes = ('reflink',)
+        else:
+            return False
+        for mode in modes:
+            try:
+                if mode == 'reflink':
+                    reflink(src, dst)
+                    if timestamp_newer:
+                        shutil.copymode(src, dst)
+                    else:
+                        shutil.copystat(src, dst)
+                else:
+                    os.link(src, dst)
+                return True
+            except OSError:
+                # Not supported, or across file systems.
+                pass
+        return False
 
     @classmethod
     def copy_from_cache(cls, env, src, dst) -> str:
-        """Copy a file from cache."""
+        """Copy a file from cache.
+
+        Depending on the cache's :attr:`link_mode`, the file is cloned
+        or hard linked if that can be done, else copied.  A compressed
+        entry is decompressed as it is read.
+        """
+        codec = codec_of(src)
+        if codec is not None:
+            try:
+                os.unlink(dst)
+            except FileNotFoundError:
+                pass
+            with open(dst, 'wb') as d:
+                for chunk in decompressed_chunks(codec, src):
+                    d.write(chunk)
+            if env.cache_timestamp_newer:
+                shutil.copymode(src, dst)
+            else:
+                shutil.copystat(src, dst)
+            return dst
+        link_mode = getattr(env.get_CacheDir(), 'link_mode', 'copy')
+        if link_mode != 'copy':
+            # Do not write through an earlier hard link to the cache.
+            try:
+                os.unlink(dst)
+            except FileNotFoundError:
+                pass
+            if cls._link(link_mode, src, dst, env.cache_timestamp_newer):
+                return dst
         if env.cache_timestamp_newer:
             return env.fs.copy(src, dst)
         else:
@@ -298,11 +613,31 @@ class CacheDir:
     def copy_to_cache(cls, env, src, dst) -> str:
         """Copy a file to cache.
 
-        Just use the FS copy2 ("with metadata") method, except do an additional
-        check and if necessary a chmod to ensure the cachefile is writeable,
-        to forestall permission problems if the cache entry is later updated.
+        Depending on the cache's :attr:`link_mode`, the file is cloned
+        or hard linked if that can be done; a hard-linked file is made
+        read-only, so that neither the build nor the cache changes the
+        other's copy.  Otherwise use the FS copy2 ("with metadata")
+        method, except do an additional check and if necessary a chmod
+        to ensure the cachefile is writeable, to forestall permission
+        problems if the cache entry is later updated.  If the name of
+        the entry ends in the suffix of a compression format, the file
+        is compressed as it is written.
         """
+        tmp_suffix = '.tmp' + cache_tmp_uuid
+        codec = codec_of(dst[:-len(tmp_suffix)] if dst.endswith(tmp_suffix) else dst)
+        if codec is not None:
+            compress_file(codec, src, dst)
+            shutil.copystat(src, dst)
+            st = stat.S_IMODE(os.stat(dst).st_mode)
+            os.chmod(dst, st | stat.S_IWRITE)
+            return dst
         try:
+            link_mode = getattr(env.get_CacheDir(), 'link_mode', 'copy')
+            if cls._link(link_mode, src, dst, False):
+                if os.path.samefile(src, dst):
+                    mode = stat.S_IMODE(os.stat(dst).st_mode)
+                    os.chmod(dst, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+                return dst
             result = env.fs.copy2(src, dst)
             st = stat.S_IMODE(os.stat(result).st_mode)
             if not st | stat.S_IWRITE:
@@ -319,6 +654,100 @@ class CacheDir:
     def misses(self) -> int:
         return self.requests - self.hits
 
+    def pushed(self, nbytes) -> None:
+        """Note that *nbytes* were added to the cache.
+
+        If the cache has a maximum size, eviction is started on a
+        background thread after the first push, and again each time
+        a tenth of the maximum size has been pushed since it was last
+        started, unless it is still running.  At exit, eviction is run
+        once more if anything was pushed since it last started.
+        """
+        if not self.max_size:
+            return
+        with self._evict_lock:
+            self._pushed += nbytes
+            if self._pushed < self.max_size * (1 - self.evict_low_water):
+                return
+            if self._evictor is not None and self._evictor.is_alive():
+                return
+            if self._evictor is None:
+                atexit.register(self._finish_eviction)
+            self._pushed = 0
+            self._evictor = threading.Thread(target=self.evict, daemon=True)
+            self._evictor.start()
+
+    def _finish_eviction(self) -> None:
+        self._evictor.join()
+        if self._pushed:
+            self._pushed = 0
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove the least recently used files if the cache is too big.
+
+        Files are removed, oldest modification time first, until the
+        cache is within :attr:`evict_low_water` of its maximum size.
+        Retrieving a file from the cache updates its modification time.
+        Only one process evicts from a cache at a time; if another one
+        is, this does nothing.  Builds retrieving a file as it is
+        removed treat it as not in the cache.
+
+        Returns the number of bytes evicted.
+        """
+        if not self.max_size or self.path is None:
+            return 0
+        lock = SCons.Util.FileLock(os.path.join(self.path, 'evict'), writer=True)
+        try:
+            lock.acquire_lock()
+        except SCons.Util.SConsLockFailure:
+            try:
+                if time.time() - os.path.getmtime(lock.lockfile) > self.evict_lock_timeout:
+                    os.unlink(lock.lockfile)
+            except OSError:
+                pass
+            return 0
+        except OSError:
+            return 0
+        evicted = 0
+        try:
+            entries = []
+            total = 0
+            for subdir in os.scandir(self.path):
+                if not subdir.is_dir(follow_symlinks=False):
+                    continue
+                for entry in os.scandir(subdir.path):
+                    if '.tmp' in entry.name:
+                        # A push in progress.
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    total += st.st_size
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            if total <= self.max_size:
+                return 0
+            entries.sort()
+            low_water = self.max_size * self.evict_low_water
+            for _, size, path in entries:
+                if total <= low_water:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += size
+        except OSError:
+            # The cache directory went away, or cannot be read.
+            pass
+        finally:
+            lock.release_lock()
+        with self._evict_lock:
+            self.evicted += evicted
+        return evicted
+
     def is_enabled(self) -> bool:
         return cache_enabled and self.path is not None
 
@@ -326,8 +755,12 @@ class CacheDir:
         return cache_readonly
 
     def get_cachedir_csig(self, node) -> str:
-        cachedir, cachefile = self.cachepath(node)
+        cachedir, cachefile = self.retrievepath(node)
         if cachefile and os.path.exists(cachefile):
+            codec = codec_of(cachefile)
+            if codec is not None:
+                return SCons.Util.hash_chunks_signature(
+                    decompressed_chunks(codec, cachefile))
             return SCons.Util.hash_file_signature(cachefile, SCons.Node.FS.File.hash_chunksize)
 
     def cachepath(self, node) -> tuple:
@@ -344,8 +777,32 @@ class CacheDir:
         sig = node.get_cachedir_bsig()
         subdir = sig[:self.config['prefix_len']].upper()
         cachedir = os.path.join(self.path, subdir)
+        if self.compression is not None:
+            sig += _CODECS[self.compression][0]
         return cachedir, os.path.join(cachedir, sig)
 
+    def retrievepath(self, node) -> tuple:
+        """Return where a cached copy of a file is.
+
+        Like :meth:`cachepath`, but if there is no entry in the
+        configured format, looks for one stored uncompressed or in
+        another compression format, as a cache whose compression was
+        changed holds.  If there is none, returns the same as
+        :meth:`cachepath`.
+        """
+        cachedir, cachefile = self.cachepath(node)
+        if cachefile is None or os.path.exists(cachefile):
+            return cachedir, cachefile
+        base = cachefile
+        codec = codec_of(cachefile)
+        if codec is not None:
+            base = cachefile[:-len(_CODECS[codec][0])]
+        for suffix in [''] + [c[0] for c in _CODECS.values()]:
+            path = base + suffix
+            if path != cachefile and os.path.exists(path):
+                return cachedir, path
+        return cachedir, cachefile
+
     def retrieve(self, node) -> bool:
         """Retrieve a node from cache.
 
@@ -389,9 +846,105 @@ class CacheDir:
         return False
 
     def push(self, node):
+        """Push a built node to the cache.
+
+        Unless :attr:`push_threads` is zero, the file is copied into
+        the cache by a background thread, and any failure to copy it
+        is reported as a :class:`~SCons.Warnings.CacheWriteErrorWarning`.
+        Its cache signature and build environment are looked up here,
+        as the node may let go of its build information before then.
+        With ``--cache-debug``, files are copied as they are pushed,
+        so that the trace follows the build.
+        """
         if self.is_readonly() or not self.is_enabled():
             return
-        return CachePush(node, [], node.get_build_env())
+        if node.nocache:
+            return
+        env = node.get_build_env()
+        if not self.push_threads or cache_debug:
+            return CachePush(node, [], env)
+        try:
+            st = os.lstat(node.get_internal_path())
+        except OSError:
+            return
+        self.cachepath(node)
+        self.queue_push(self._push_node, node, env, st)
+
+    def _push_node(self, node, env, st) -> None:
+        try:
+            now = os.lstat(node.get_internal_path())
+        except OSError:
+            return
+        if (now.st_size, now.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+            # Changed since it was built, so this is not the file
+            # which has its signature.
+            return
+        result = CachePush(node, [], env)
+        if result:
+            msg = "Unable to copy %s to cache: %s" % (
+                node, getattr(result, 'errstr', result))
+            SCons.Warnings.warn(SCons.Warnings.CacheWriteErrorWarning, msg)
+
+    def queue_push(self, func, *args) -> None:
+        """Call *func* with *args* on one of the push threads.
+
+        If :attr:`push_queue_size` calls are already waiting, waits
+        for one of them to start.  The threads are started by the
+        first call, and stopped at exit once the calls queued have
+        been made.
+        """
+        with self._push_lock:
+            if not self._pushers:
+                if self._push_queue is None:
+                    atexit.register(self._finish_pushes)
+                    _pushing_caches.append(self)
+                self._push_queue = queue.Queue(self.push_queue_size)
+                for _ in range(max(self.push_threads, 1)):
+                    pusher = threading.Thread(target=self._pusher,
+                                              args=(self._push_queue,),
+                                              daemon=True)
+                    pusher.start()
+                    self._pushers.append(pusher)
+            push_queue = self._push_queue
+        push_queue.put((func, args))
+
+    @staticmethod
+    def _pusher(push_queue) -> None:
+        while True:
+            item = push_queue.get()
+            if item is None:
+                push_queue.task_done()
+                return
+            func, args = item
+            try:
+                func(*args)
+            except Exception as e:
+                # Failing to push a file does not affect the correctness
+                # of the build, so the thread carries on with the others.
+                # The node is the first argument of the push functions.
+                node = args[0] if args else func
+                msg = "Unable to copy %s to cache: %s" % (node, e)
+                try:
+                    SCons.Warnings.warn(SCons.Warnings.CacheWriteErrorWarning, msg)
+                except SCons.Warnings.SConsWarning:
+                    # Turned into an exception, which has nowhere to
+                    # go from this thread.
+                    pass
+            finally:
+                push_queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until the files queued to be pushed have been pushed."""
+        if self._push_queue is not None:
+            self._push_queue.join()
+
+    def _finish_pushes(self) -> None:
+        with self._push_lock:
+            for _ in self._pushers:
+                self._push_queue.put(None)
+            for pusher in self._pushers:
+                pusher.join()
+            self._pushers = []
 
     def push_if_forced(self, node):
         if cache_force:
@@ -21,16 +21,19 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import errno
 import os.path
 import shutil
 import sys
 import unittest
 import tempfile
+import threading
 import stat
 
 from TestCmd import TestCmd, IS_WINDOWS, IS_ROOT
 
 import SCons.CacheDir
+import SCons.Errors
 import SCons.Node.FS
 
 built_it = None
@@ -122,6 +125,267 @@ class CacheDirExistsTestCase(unittest.TestCase):
         assert os.path.exists(self.test.workpath('ex-cache', 'config'))
         assert os.path.exists(self.test.workpath('ex-cache', 'CACHEDIR.TAG'))
 
+class EvictTestCase(unittest.TestCase):
+    """Test keeping the cache within its maximum size."""
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.test.subdir('cache')
+        self.test.write(['cache', 'config'],
+                        '{"prefix_len": 2, "max_size": "1k"}')
+        self.cache = self.test.workpath('cache')
+
+    def write(self, name, size, mtime) -> str:
+        path = self.test.workpath('cache', name[:2], name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.test.write(path, "x" * size)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_max_size(self) -> None:
+        """Test reading the maximum size from the config file"""
+        cd = SCons.CacheDir.CacheDir(self.cache)
+        assert cd.max_size == 1024, cd.max_size
+
+        self.test.write(['cache', 'config'],
+                        '{"prefix_len": 2, "max_size": "lots"}')
+        with self.assertRaises(SCons.Errors.SConsEnvironmentError):
+            SCons.CacheDir.CacheDir(self.cache)
+
+    def test_evict(self) -> None:
+        """Test removing the least recently used files"""
+        cd = SCons.CacheDir.CacheDir(self.cache)
+        oldest = self.write('aa01', 400, 1000)
+        old = self.write('bb02', 400, 2000)
+        new = self.write('aa03', 400, 3000)
+        pushing = self.write('cc04.tmp1234', 400, 500)
+        assert cd.evict() == 400
+        assert cd.evicted == 400, cd.evicted
+        assert not os.path.exists(oldest)
+        assert os.path.exists(old)
+        assert os.path.exists(new)
+        assert os.path.exists(pushing)
+        assert os.path.exists(self.test.workpath('cache', 'config'))
+
+        # Within the limit, nothing is removed.
+        assert cd.evict() == 0
+        assert os.path.exists(old)
+
+        # Another process evicting leaves it to them.
+        self.write('bb05', 800, 4000)
+        self.test.write(['cache', 'evict.lock'], "")
+        assert cd.evict() == 0
+        assert os.path.exists(new)
+        os.utime(self.test.workpath('cache', 'evict.lock'), (1000, 1000))
+        cd.evict()
+        assert not os.path.exists(self.test.workpath('cache', 'evict.lock'))
+        assert cd.evict() == 800
+        assert not os.path.exists(old)
+        assert not os.path.exists(new)
+
+    def test_pushed(self) -> None:
+        """Test starting eviction in the background"""
+        cd = SCons.CacheDir.CacheDir(self.cache)
+        self.write('aa01', 800, 1000)
+        self.write('aa02', 800, 2000)
+        cd.pushed(800)
+        cd._evictor.join()
+        assert cd.evicted == 800, cd.evicted
+
+        # Not started again until a tenth of the maximum is pushed.
+        evictor = cd._evictor
+        cd.pushed(50)
+        assert cd._evictor is evictor
+        cd.pushed(60)
+        assert cd._evictor is not evictor
+        cd._evictor.join()
+
+        cd = SCons.CacheDir.CacheDir(None)
+        cd.pushed(10000)
+        assert cd._evictor is None
+
+
+class LinkModeTestCase(unittest.TestCase):
+    """Test putting files in and taking them out of the cache by linking."""
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.test.write('src', "src\n")
+        self.cache = self.test.workpath('cache')
+        self.save_reflink = SCons.CacheDir.reflink
+        self.reflinked = []
+
+    def tearDown(self) -> None:
+        SCons.CacheDir.reflink = self.save_reflink
+
+    def no_reflink(self, src, dst):
+        self.reflinked.append(dst)
+        raise OSError(errno.EXDEV, "Cross-device link", dst)
+
+    def env(self, link_mode):
+        os.makedirs(self.cache, exist_ok=True)
+        self.test.write(['cache', 'config'],
+                        '{"prefix_len": 2, "link_mode": "%s"}' % link_mode)
+        cd = SCons.CacheDir.CacheDir(self.cache)
+        assert cd.link_mode == link_mode, cd.link_mode
+
+        class Env:
+            cache_timestamp_newer = False
+            fs = SCons.Node.FS.FS(self.test.workpath(''))
+            def get_CacheDir(self):
+                return cd
+        return Env()
+
+    def test_probe(self) -> None:
+        """Test recording the link mode in a new cache's config"""
+        cd = SCons.CacheDir.CacheDir(self.cache)
+        assert cd.config['link_mode'] in ('copy', 'reflink'), cd.config
+        assert sorted(os.listdir(self.cache)) == ['CACHEDIR.TAG', 'config']
+
+        self.test.write(['cache', 'config'],
+                        '{"prefix_len": 2, "link_mode": "symlink"}')
+        with self.assertRaises(SCons.Errors.SConsEnvironmentError):
+            SCons.CacheDir.CacheDir(self.cache)
+
+    def test_hardlink(self) -> None:
+        """Test the hardlink mode"""
+        SCons.CacheDir.reflink = self.no_reflink
+        env = self.env('hardlink')
+        src = self.test.workpath('src')
+        cachefile = self.test.workpath('cache', 'cachefile')
+        SCons.CacheDir.CacheDir.copy_to_cache(env, src, cachefile)
+        assert self.reflinked == [cachefile], self.reflinked
+        assert os.path.samefile(src, cachefile)
+        assert not os.stat(cachefile).st_mode & stat.S_IWUSR
+
+        # An existing file is replaced, not written through.
+        out = self.test.workpath('out')
+        self.test.write(out, "out\n")
+        SCons.CacheDir.CacheDir.copy_from_cache(env, cachefile, out)
+        assert os.path.samefile(out, cachefile)
+        assert self.test.read(cachefile, mode='r') == "src\n"
+
+    def test_reflink_fallback(self) -> None:
+        """Test copying when files cannot be cloned"""
+        SCons.CacheDir.reflink = self.no_reflink
+        env = self.env('reflink')
+        src = self.test.workpath('src')
+        cachefile = self.test.workpath('cache', 'cachefile')
+        SCons.CacheDir.CacheDir.copy_to_cache(env, src, cachefile)
+        assert self.reflinked == [cachefile], self.reflinked
+        assert not os.path.samefile(src, cachefile)
+        assert self.test.read(cachefile, mode='r') == "src\n"
+
+        env = self.env('copy')
+        out = self.test.workpath('out')
+        SCons.CacheDir.CacheDir.copy_from_cache(env, cachefile, out)
+        assert self.reflinked == [cachefile], self.reflinked
+        assert self.test.read(out, mode='r') == "src\n"
+
+
+class CompressionTestCase(unittest.TestCase):
+    """Test compressed cache entries."""
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.test.subdir('cache')
+        self.cache = self.test.workpath('cache')
+        self.data = bytes(range(256)) * 100
+        self.test.write('src', self.data)
+        self.save_chunksize = SCons.CacheDir.COPY_CHUNKSIZE
+        SCons.CacheDir.COPY_CHUNKSIZE = 1000
+
+    def tearDown(self) -> None:
+        SCons.CacheDir.COPY_CHUNKSIZE = self.save_chunksize
+
+    def env(self, compression):
+        self.test.write(['cache', 'config'],
+                        '{"prefix_len": 2, "compression": "%s"}' % compression)
+        cd = SCons.CacheDir.CacheDir(self.cache)
+
+        class Env:
+            cache_timestamp_newer = False
+            fs = SCons.Node.FS.FS(self.test.workpath(''))
+            def get_CacheDir(self):
+                return cd
+        return Env()
+
+    def test_roundtrip(self) -> None:
+        """Test compressing into and decompressing out of the cache"""
+        for codec in SCons.CacheDir.get_codecs():
+            env = self.env(codec)
+            assert env.get_CacheDir().compression == codec
+            suffix = SCons.CacheDir._CODECS[codec][0]
+            cachefile = self.test.workpath('cache', 'entry' + suffix)
+            tmp = cachefile + '.tmp' + SCons.CacheDir.cache_tmp_uuid
+            SCons.CacheDir.CacheDir.copy_to_cache(env, self.test.workpath('src'), tmp)
+            os.rename(tmp, cachefile)
+            assert os.path.getsize(cachefile) < len(self.data) // 10, codec
+            assert SCons.CacheDir.codec_of(cachefile) == codec
+
+            out = self.test.workpath('out')
+            SCons.CacheDir.CacheDir.copy_from_cache(env, cachefile, out)
+            assert self.test.read(out) == self.data, codec
+
+    def test_invalid(self) -> None:
+        """Test rejecting unknown formats and broken entries"""
+        with self.assertRaises(SCons.Errors.SConsEnvironmentError):
+            self.env('rot13')
+
+        env = self.env('zlib')
+        cachefile = self.test.workpath('cache', 'entry.zlib')
+        SCons.CacheDir.compress_file('zlib', self.test.workpath('src'), cachefile)
+        with open(cachefile, 'rb') as f:
+            data = f.read()
+        self.test.write(cachefile, data[:len(data) // 2])
+        with self.assertRaises(OSError):
+            SCons.CacheDir.CacheDir.copy_from_cache(
+                env, cachefile, self.test.workpath('out'))
+        self.test.write(cachefile, b'not zlib data')
+        with self.assertRaises(OSError):
+            list(SCons.CacheDir.decompressed_chunks('zlib', cachefile))
+
+    def test_retrievepath(self) -> None:
+        """Test finding entries stored in another format"""
+        class Node:
+            def get_cachedir_bsig(self):
+                return 'abcdef'
+        env = self.env('zlib')
+        cd = env.get_CacheDir()
+        cachedir = os.path.join(self.cache, 'AB')
+        expect = os.path.join(cachedir, 'abcdef.zlib')
+        assert cd.cachepath(Node()) == (cachedir, expect)
+        assert cd.retrievepath(Node()) == (cachedir, expect)
+        os.makedirs(cachedir)
+        raw = os.path.join(cachedir, 'abcdef')
+        self.test.write(raw, "raw\n")
+        assert cd.retrievepath(Node()) == (cachedir, raw)
+        self.test.write(expect, "compressed\n")
+        assert cd.retrievepath(Node()) == (cachedir, expect)
+
+    def test_register_codec(self) -> None:
+        """Test adding a compression format"""
+        class Null:
+            def compress(self, data):
+                return data
+            def flush(self):
+                return b''
+            def decompress(self, data):
+                return data
+        save = dict(SCons.CacheDir._CODECS)
+        try:
+            SCons.CacheDir.register_codec('null', '.null', Null, Null)
+            assert 'null' in SCons.CacheDir.get_codecs()
+            assert SCons.CacheDir.codec_of('x/abc.null') == 'null'
+            env = self.env('null')
+            cachefile = self.test.workpath('cache', 'entry.null')
+            SCons.CacheDir.CacheDir.copy_to_cache(env, self.test.workpath('src'), cachefile)
+            assert self.test.read(cachefile) == self.data
+        finally:
+            SCons.CacheDir._CODECS.clear()
+            SCons.CacheDir._CODECS.update(save)
+
+
 class ExceptionTestCase(unittest.TestCase):
     """Test that the correct exceptions are thrown by CacheDir."""
 
@@ -295,9 +559,11 @@ class FileTestCase(BaseTestCase):
             cd_f3 = self.test.workpath("cd.f3")
             f3 = self.File(cd_f3)
             f3.push_to_cache()
+            self._CacheDir.flush()
             assert self.pushed == [], self.pushed
             self.test.write(cd_f3, "cd.f3\n")
             f3.push_to_cache()
+            self._CacheDir.flush()
             assert self.pushed == [f3], self.pushed
 
             self.pushed = []
@@ -313,6 +579,7 @@ class FileTestCase(BaseTestCase):
             SCons.CacheDir.cache_force = 1
             f4.clear()
             f4.visited()
+            self._CacheDir.flush()
             assert self.pushed == [f4], self.pushed
         finally:
             SCons.CacheDir.CachePush = save_CachePush
@@ -335,6 +602,8 @@ class FileTestCase(BaseTestCase):
         cd_f7 = self.test.workpath("cd.f7")
         self.test.write(cd_f7, "cd.f7\n")
         f7 = self.File(cd_f7, 'f7_bsig')
+        # Push in this thread, to see the result.
+        self._CacheDir.push_threads = 0
 
         warn_caught = 0
         r = f7.push_to_cache()
@@ -344,6 +613,72 @@ class FileTestCase(BaseTestCase):
         SCons.Warnings.warningAsException(old_warn_exceptions)
         SCons.Warnings.suppressWarningClass(SCons.Warnings.CacheWriteErrorWarning)
 
+    def test_push_queue(self) -> None:
+        """Test pushing files in the background"""
+        save_CachePush = SCons.CacheDir.CachePush
+        save_warningOut = SCons.Warnings._warningOut
+        warnings = []
+        SCons.Warnings._warningOut = warnings.append
+        SCons.Warnings.enableWarningClass(SCons.Warnings.CacheWriteErrorWarning)
+        release = threading.Event()
+
+        def push(target, source, env):
+            release.wait()
+            self.pushed.append(target)
+            if target.name == 'cd.f10':
+                return SCons.Errors.BuildError(errstr="disk full")
+            if target.name == 'cd.f11':
+                raise RuntimeError("cache went away")
+            return 0
+
+        self._CacheDir.push_threads = 1
+        self._CacheDir.push_queue_size = 1
+        SCons.CacheDir.CachePush = push
+        try:
+            self.pushed = []
+            nodes = []
+            for name in ('cd.f9', 'cd.f10', 'cd.f11'):
+                self.test.write(name, name + "\n")
+                nodes.append(self.File(self.test.workpath(name), name + '_bsig'))
+
+            # One push is running and one is waiting, so a third waits
+            # for a free place in the queue.
+            nodes[0].push_to_cache()
+            nodes[1].push_to_cache()
+            third = threading.Thread(target=nodes[2].push_to_cache)
+            third.start()
+            third.join(0.2)
+            assert third.is_alive()
+            assert self.pushed == [], self.pushed
+
+            release.set()
+            third.join()
+            self._CacheDir.flush()
+            assert self.pushed == nodes, self.pushed
+            assert len(warnings) == 2, warnings
+            for w in warnings:
+                assert isinstance(w, SCons.Warnings.CacheWriteErrorWarning), w
+            assert 'disk full' in str(warnings[0]), warnings[0]
+            assert 'cd.f11' in str(warnings[1]), warnings[1]
+            assert 'cache went away' in str(warnings[1]), warnings[1]
+
+            # A file changed since it was queued is not pushed.
+            self.pushed = []
+            f12 = self.File(self.test.workpath('cd.f12'), 'f12_bsig')
+            cd_f12 = self.test.workpath('cd.f12')
+            self.test.write(cd_f12, "cd.f12\n")
+            st = os.lstat(cd_f12)
+            os.utime(cd_f12, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+            self._CacheDir._push_node(f12, None, st)
+            assert self.pushed == [], self.pushed
+
+            self._CacheDir._finish_pushes()
+            assert self._CacheDir._pushers == []
+        finally:
+            SCons.CacheDir.CachePush = save_CachePush
+            SCons.Warnings._warningOut = save_warningOut
+            SCons.Warnings.suppressWarningClass(SCons.Warnings.CacheWriteErrorWarning)
+
     def test_no_strfunction(self) -> None:
         """Test handling no strfunction() for an action."""
         save_CacheRetrieveSilent = SCons.CacheDir.CacheRetrieveSilent
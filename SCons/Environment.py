@@ -1325,7 +1325,11 @@ class Base(SubstitutionEnvironment):
         except AttributeError:
             path = SCons.Defaults.DefaultEnvironment()._CacheDir_path
 
-        cachedir_class = self.validate_CacheDir_class()
+        cachedir_class = None
+        if self.get("CACHEDIR_CLASS") is None:
+            cachedir_class = SCons.CacheDir.scheme_class(path)
+        if cachedir_class is None:
+            cachedir_class = self.validate_CacheDir_class()
         try:
             if (path == self._last_CacheDir_path
                     # this checks if the cachedir class type has changed from what the
@@ -2487,7 +2491,8 @@ class Base(SubstitutionEnvironment):
         nkw = self.subst_kw(kw)
         return SCons.Scanner.ScannerBase(*nargs, **nkw)
 
-    def SConsignFile(self, name=SCons.SConsign.current_sconsign_filename(), dbm_module=None) -> None:
+    def SConsignFile(self, name=SCons.SConsign.current_sconsign_filename(), dbm_module=None,
+                     record_format=None, shard=None) -> None:
         if name is not None:
             name = self.subst(name)
             if not os.path.isabs(name):
@@ -2497,7 +2502,30 @@ class Base(SubstitutionEnvironment):
             sconsign_dir = os.path.dirname(name)
             if sconsign_dir and not os.path.exists(sconsign_dir):
                 self.Execute(SCons.Defaults.Mkdir(sconsign_dir))
-        SCons.SConsign.File(name, dbm_module)
+        SCons.SConsign.File(name, dbm_module, record_format, shard)
+
+    def SetPool(self, target, pool, size=None):
+        """Assign *target* to the named job *pool*.
+
+        If *size* is given, the pool is created, or resized, to run at
+        most that many tasks at once; otherwise the pool must already
+        have been defined by an earlier call.
+        """
+        pool = self.subst(pool)
+        if size is not None:
+            try:
+                size = int(size)
+                if size < 1:
+                    raise ValueError
+            except (TypeError, ValueError):
+                raise UserError("A positive pool size is required for pool %s: %s" % (repr(pool), repr(size)))
+            self.fs.pool_sizes[pool] = size
+        elif pool not in self.fs.pool_sizes:
+            raise UserError("No size given for undefined pool %s" % repr(pool))
+        tlist = self.arg2nodes(target, self.fs.Entry)
+        for t in tlist:
+            t.set_pool(pool)
+        return tlist
 
     def SideEffect(self, side_effect, target):
         """Tell scons that side_effects are built as side
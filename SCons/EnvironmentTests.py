@@ -3492,9 +3492,15 @@ def generate(env):
         try:
             fnames = []
             dbms = []
-            def capture(name, dbm_module, fnames=fnames, dbms=dbms) -> None:
+            formats = []
+            shards = []
+            def capture(name, dbm_module, record_format, shard,
+                        fnames=fnames, dbms=dbms, formats=formats,
+                        shards=shards) -> None:
                 fnames.append(name)
                 dbms.append(dbm_module)
+                formats.append(record_format)
+                shards.append(shard)
 
             save_SConsign_File = SCons.SConsign.File
             SCons.SConsign.File = capture
@@ -3530,9 +3536,40 @@ def generate(env):
             env.SConsignFile(None)
             assert fnames[-1] is None, fnames
             assert dbms[-1] is None, dbms
+            assert formats[-1] is None, formats
+
+            env.SConsignFile(record_format='binary')
+            assert fnames[-1] == os.path.join(os.sep, 'dir', current_sconsign_filename()), fnames
+            assert formats[-1] == 'binary', formats
+            assert shards[-1] is None, shards
+
+            env.SConsignFile(shard='dir')
+            assert shards[-1] == 'dir', shards
         finally:
             SCons.SConsign.File = save_SConsign_File
 
+    def test_SetPool(self) -> None:
+        """Test the SetPool() method"""
+        env = self.TestEnvironment(FOO='ggg', POOL='link')
+        t = env.SetPool(['sp_a', 'sp_$FOO'], '$POOL', 4)
+        assert t[0].get_internal_path() == 'sp_a'
+        assert t[0].pool == 'link', t[0].pool
+        assert t[1].get_internal_path() == 'sp_ggg'
+        assert t[1].pool == 'link', t[1].pool
+        assert env.fs.pool_sizes['link'] == 4
+
+        t = env.SetPool('sp_b', 'link')
+        assert t[0].pool == 'link', t[0].pool
+        env.SetPool('sp_b', 'link', '2')
+        assert env.fs.pool_sizes['link'] == 2
+
+        with self.assertRaises(SCons.Errors.UserError):
+            env.SetPool('sp_c', 'nosuchpool')
+        with self.assertRaises(SCons.Errors.UserError):
+            env.SetPool('sp_c', 'link', 0)
+        with self.assertRaises(SCons.Errors.UserError):
+            env.SetPool('sp_c', 'link', 'many')
+
     def test_SideEffect(self) -> None:
         """Test the SideEffect() method"""
         env = self.TestEnvironment(LIB='lll', FOO='fff', BAR='bbb')
@@ -0,0 +1,287 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+A derived-file cache shared over HTTP.
+
+A :class:`HTTPCacheDir` keeps the files of a cache on a web server
+rather than in a directory, so that builds on any number of machines
+can share them without a network file system.  It is used when the
+path given to :meth:`~SCons.Environment.Base.CacheDir` is an
+``http://`` or ``https://`` URL.
+
+The protocol is plain HTTP/1.1 on the URL of the cache followed by
+the build signature of a file:
+
+* ``GET`` returns the cached file, or ``404 Not Found``;
+* ``HEAD`` does the same without sending the file;
+* ``PUT`` stores the request body as the cached file.
+
+Both ways, an ``X-SCons-Mode`` header carries the permission bits of
+the file in octal.  Connections to the server are kept open and
+reused.  Files are retrieved as they are needed, but are pushed by a
+few threads in the background, so the build does not wait for the
+uploads; before SCons exits, it waits for the pushes to finish.
+:mod:`SCons.Utilities.CacheServer` is a small server for the protocol.
+"""
+
+import http.client
+import os
+import queue
+import shutil
+import stat
+import urllib.parse
+
+import SCons.Action
+import SCons.CacheDir
+import SCons.Errors
+import SCons.Warnings
+
+MODE_HEADER = 'X-SCons-Mode'
+
+
+def _tempname(node) -> str:
+    return "%s.tmp%s" % (node.get_internal_path(), SCons.CacheDir.cache_tmp_uuid)
+
+
+def HTTPRetrieveFunc(target, source, env) -> int:
+    # The file was downloaded by HTTPCacheDir.retrieve(), so all that
+    # is left is to move it into place.
+    if SCons.Action.execute_actions:
+        t = target[0]
+        os.replace(_tempname(t), t.get_internal_path())
+    return 0
+
+def HTTPRetrieveString(target, source, env) -> str:
+    return "Retrieved `%s' from cache" % target[0].get_internal_path()
+
+HTTPRetrieve = SCons.Action.Action(HTTPRetrieveFunc, HTTPRetrieveString)
+
+HTTPRetrieveSilent = SCons.Action.Action(HTTPRetrieveFunc, None)
+
+
+class HTTPCacheDir(SCons.CacheDir.CacheDir):
+    """A CacheDir on the HTTP server at the URL *path*."""
+
+    # Seconds to wait for the server to accept a connection or reply.
+    timeout = 30.0
+
+    # Uploads spend most of their time waiting on the network.
+    push_threads = 4
+
+    def __init__(self, path) -> None:
+        super().__init__(None)
+        self.path = path
+        self.url = None
+        # Idle connections to the server, most recently used last.
+        self._idle = queue.LifoQueue()
+        if path is not None:
+            url = urllib.parse.urlsplit(path)
+            if url.scheme not in ('http', 'https') or not url.hostname:
+                msg = "Invalid cache URL " + path
+                raise SCons.Errors.SConsEnvironmentError(msg)
+            self.url = url
+
+    def _connection(self):
+        """Return a connection to the server and whether it was used before."""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            pass
+        if self.url.scheme == 'https':
+            conn_class = http.client.HTTPSConnection
+        else:
+            conn_class = http.client.HTTPConnection
+        return conn_class(self.url.hostname, self.url.port, timeout=self.timeout), False
+
+    def request(self, method, sig, src=None, dst=None, headers=None):
+        """Make a *method* request for the cache entry *sig*.
+
+        The contents of the file *src*, if given, are sent as the body,
+        and the body of a ``200 OK`` response is written to the file
+        *dst*, if given.  A request on an idle connection the server
+        has closed is made again on a new one.
+
+        Returns the response, which has been read.
+
+        Raises:
+            OSError: the server cannot be reached, or a file cannot
+               be read or written.
+            http.client.HTTPException: the server's reply is not valid.
+        """
+        url = self.url.path.rstrip('/') + '/' + urllib.parse.quote(sig)
+        headers = dict(headers or {})
+        while True:
+            conn, reused = self._connection()
+            try:
+                if src is None:
+                    conn.request(method, url, headers=headers)
+                else:
+                    with open(src, 'rb') as f:
+                        headers['Content-Length'] = str(os.fstat(f.fileno()).st_size)
+                        conn.request(method, url, body=f, headers=headers)
+                response = conn.getresponse()
+                if dst is not None and response.status == 200:
+                    with open(dst, 'wb') as f:
+                        shutil.copyfileobj(response, f, SCons.CacheDir.COPY_CHUNKSIZE)
+                else:
+                    response.read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                if reused:
+                    continue
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            return response
+
+    def close(self) -> None:
+        """Close the idle connections to the server."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def is_enabled(self) -> bool:
+        return SCons.CacheDir.cache_enabled and self.url is not None
+
+    def cachepath(self, node) -> tuple:
+        """Return the URL of the cache and of the entry for *node*."""
+        if not self.is_enabled():
+            return None, None
+        return self.path, self.path.rstrip('/') + '/' + node.get_cachedir_bsig()
+
+    def retrievepath(self, node) -> tuple:
+        return self.cachepath(node)
+
+    def retrieve(self, node) -> bool:
+        """Retrieve a node from the cache server.
+
+        Returns True if a successful retrieval resulted.
+
+        The file is downloaded next to the node before the retrieval
+        action runs, so that nothing is shown for a miss.  With
+        ``-n``, only whether the server has it is checked.
+        """
+        if not self.is_enabled():
+            return False
+
+        self.requests += 1
+        sig = node.get_cachedir_bsig()
+        url = self.path.rstrip('/') + '/' + sig
+        tmp = _tempname(node)
+        try:
+            if SCons.Action.execute_actions:
+                response = self.request('GET', sig, dst=tmp)
+            else:
+                response = self.request('HEAD', sig)
+        except (OSError, http.client.HTTPException) as e:
+            self.CacheDebug('CacheRetrieve(%s):  %s failed: ' + str(e) + '\n', node, url)
+            response = None
+        if response is None or response.status != 200:
+            if response is not None:
+                self.CacheDebug('CacheRetrieve(%s):  %s not in cache\n', node, url)
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return False
+        self.hits += 1
+        self.CacheDebug('CacheRetrieve(%s):  retrieving from %s\n', node, url)
+        if SCons.Action.execute_actions:
+            mode = response.getheader(MODE_HEADER)
+            try:
+                mode = int(mode, 8) & 0o7777 if mode else 0o644
+            except ValueError:
+                mode = 0o644
+            os.chmod(tmp, mode | stat.S_IWRITE)
+
+        env = node.get_build_env()
+        if SCons.CacheDir.cache_show:
+            HTTPRetrieveSilent(node, [], env, execute=1)
+            node.build(presub=0, execute=0)
+        else:
+            HTTPRetrieve(node, [], env, execute=1)
+        return True
+
+    def push(self, node):
+        """Push *node* to the cache server, as :meth:`CacheDir.push` does.
+
+        Symbolic links are not pushed.
+        """
+        if self.is_readonly() or not self.is_enabled() or node.nocache:
+            return
+        path = node.get_internal_path()
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return
+        if not stat.S_ISREG(st.st_mode):
+            return
+        sig = node.get_cachedir_bsig()
+        if not self.push_threads or SCons.CacheDir.cache_debug:
+            self._push(node, path, sig, st)
+        else:
+            self.queue_push(self._push, node, path, sig, st)
+
+    def _push(self, node, path, sig, st) -> None:
+        url = self.path.rstrip('/') + '/' + sig
+        errfmt = "Unable to copy %s to cache. Cache file is %s"
+        try:
+            response = self.request('HEAD', sig)
+            if response.status == 200:
+                self.CacheDebug('CachePush(%s):  %s already exists in cache\n', node, url)
+                return
+            now = os.stat(path)
+            if (now.st_size, now.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+                # Changed since it was built, so this is not the file
+                # which has that signature.
+                return
+            self.CacheDebug('CachePush(%s):  pushing to %s\n', node, url)
+            mode = '%o' % stat.S_IMODE(st.st_mode)
+            response = self.request('PUT', sig, src=path, headers={MODE_HEADER: mode})
+        except (OSError, http.client.HTTPException):
+            response = None
+        if response is None or response.status not in (200, 201, 204):
+            # As with a cache directory, failing to push a file does
+            # not affect the correctness of the build.
+            self.CacheDebug(errfmt + '\n', str(node), url)
+            SCons.Warnings.warn(SCons.Warnings.CacheWriteErrorWarning,
+                                errfmt % (str(node), url))
+
+    def _finish_pushes(self) -> None:
+        super()._finish_pushes()
+        self.close()
+
+
+SCons.CacheDir.register_scheme('http', HTTPCacheDir)
+SCons.CacheDir.register_scheme('https', HTTPCacheDir)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
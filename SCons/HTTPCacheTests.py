@@ -0,0 +1,159 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import stat
+import threading
+import unittest
+
+from TestCmd import TestCmd
+
+import SCons.Action
+import SCons.CacheDir
+import SCons.Environment
+import SCons.Errors
+import SCons.HTTPCache
+from SCons.Utilities.CacheServer import CacheRequestHandler, CacheServer
+
+
+class RecordingHandler(CacheRequestHandler):
+    def handle(self) -> None:
+        self.server.connections.append(self.client_address)
+        super().handle()
+
+
+class HTTPCacheTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.test.subdir('cache')
+        self.server = CacheServer(('127.0.0.1', 0), self.test.workpath('cache'),
+                                  quiet=True)
+        self.server.RequestHandlerClass = RecordingHandler
+        self.server.connections = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/cache' % self.server.server_address[1]
+        self.save_print_actions = SCons.Action.print_actions
+        SCons.Action.print_actions = False
+
+    def tearDown(self) -> None:
+        SCons.Action.print_actions = self.save_print_actions
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def entry(self, sig):
+        return self.test.workpath('cache', sig[:2].upper(), sig)
+
+    def test_request(self) -> None:
+        """Test storing and fetching entries over one connection"""
+        cd = SCons.HTTPCache.HTTPCacheDir(self.url)
+        self.test.write('src', "src\n")
+        os.chmod(self.test.workpath('src'), 0o755)
+
+        r = cd.request('HEAD', 'abc123')
+        assert r.status == 404, r.status
+        r = cd.request('PUT', 'abc123', src=self.test.workpath('src'),
+                       headers={'X-SCons-Mode': '755'})
+        assert r.status == 201, r.status
+        assert self.test.read(self.entry('abc123'), mode='r') == "src\n"
+        assert stat.S_IMODE(os.stat(self.entry('abc123')).st_mode) == 0o755
+
+        dst = self.test.workpath('dst')
+        r = cd.request('GET', 'abc123', dst=dst)
+        assert r.status == 200, r.status
+        assert r.getheader('X-SCons-Mode') == '755'
+        assert self.test.read(dst, mode='r') == "src\n"
+        r = cd.request('GET', 'def456', dst=self.test.workpath('missing'))
+        assert r.status == 404, r.status
+        assert not os.path.exists(self.test.workpath('missing'))
+        r = cd.request('GET', '.config')
+        assert r.status == 400, r.status
+
+        assert len(self.server.connections) == 1, self.server.connections
+
+        # A connection closed while idle is replaced.
+        conn = cd._idle.get_nowait()
+        conn.sock.close()
+        cd._idle.put(conn)
+        r = cd.request('HEAD', 'abc123')
+        assert r.status == 200, r.status
+        assert len(self.server.connections) == 2, self.server.connections
+        cd.close()
+
+    def test_scheme(self) -> None:
+        """Test choosing the backend by URL scheme"""
+        env = SCons.Environment.Environment(tools=[])
+        env.CacheDir(self.url)
+        assert type(env.get_CacheDir()) is SCons.HTTPCache.HTTPCacheDir
+        env.CacheDir(self.test.workpath('local'))
+        assert type(env.get_CacheDir()) is SCons.CacheDir.CacheDir
+        assert SCons.CacheDir.scheme_class('ftp://host/cache') is None
+
+        with self.assertRaises(SCons.Errors.SConsEnvironmentError):
+            SCons.HTTPCache.HTTPCacheDir('http:///cache')
+
+    def test_push_retrieve(self) -> None:
+        """Test pushing a node in the background and retrieving it"""
+        env = SCons.Environment.Environment(tools=[])
+        env.CacheDir(self.url)
+        cd = env.get_CacheDir()
+        out = self.test.workpath('out')
+        t = env.Command(env.File(out), [], "unused")[0]
+        t.cachesig = 'f00d'
+
+        assert not cd.retrieve(t)
+        assert (cd.requests, cd.hits) == (1, 0), (cd.requests, cd.hits)
+
+        self.test.write('out', "out\n")
+        cd.push(t)
+        cd.flush()
+        assert self.test.read(self.entry('f00d'), mode='r') == "out\n"
+
+        os.unlink(out)
+        assert cd.retrieve(t)
+        assert (cd.requests, cd.hits) == (2, 1), (cd.requests, cd.hits)
+        assert self.test.read(out, mode='r') == "out\n"
+        assert sorted(os.listdir(self.test.workpath(''))) == ['cache', 'out']
+
+        save_readonly = SCons.CacheDir.cache_readonly
+        SCons.CacheDir.cache_readonly = True
+        try:
+            t.cachesig = 'beef'
+            cd.push(t)
+            cd.flush()
+            assert not os.path.exists(self.entry('beef'))
+        finally:
+            SCons.CacheDir.cache_readonly = save_readonly
+        cd._finish_pushes()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
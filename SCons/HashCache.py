@@ -0,0 +1,205 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+A machine-local cache of file content signatures.
+
+The ``.sconsign`` data of a build tree lets a file's content signature
+be reused only by the same node, and only once the file is older than
+the maximum drift.  Hard-linked copies of sources in variant
+directories, and builds of one tree with different signature
+databases, end up reading and hashing the same files over and over.
+A :class:`HashCache` records content signatures keyed on where a
+file's contents live and when they last changed: its device, inode,
+size, and modification and inode change times in nanoseconds, along
+with the hash format.  The change time catches a file rewritten in
+place with its modification time put back, as ``cp -p`` and
+``touch -r`` do.
+Any build on the machine pointed at the same cache file, with
+``--hash-cache``, can then reuse them without reading the file.
+
+The cache is an SQLite database, so several builds can share it at
+once.  Lookups read it directly; new signatures are held in memory and
+written in one transaction by :meth:`HashCache.write` at the end of the
+build.  The cache is purely advisory: if it cannot be read or written,
+it is not used again by the build, and files are simply hashed.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import SCons.Util
+
+# Stored as the database's user_version.  A database with another
+# version has its table replaced.
+_VERSION = 2
+
+_SCHEMA = ("CREATE TABLE IF NOT EXISTS hashes ("
+           "format TEXT NOT NULL, dev INTEGER NOT NULL, ino INTEGER NOT NULL, "
+           "size INTEGER NOT NULL, mtime INTEGER NOT NULL, "
+           "ctime INTEGER NOT NULL, csig TEXT NOT NULL, "
+           "PRIMARY KEY (format, dev, ino, size, mtime, ctime))")
+
+
+class HashCache:
+    """Content signatures of files, keyed on their ``stat`` results.
+
+    The database at *path* is opened when first used.  The connection
+    may be used from any thread, one at a time.
+    """
+
+    # A file modified less than this many seconds ago may be modified
+    # again without its timestamp changing, on file systems with coarse
+    # timestamps, so its signature is not recorded.
+    racy_window = 2.0
+
+    # Once written, at most this many entries are kept; the entries
+    # written longest ago are dropped first.
+    max_entries = 1000000
+
+    # Seconds to wait for another build to finish writing the cache.
+    timeout = 5.0
+
+    def __init__(self, path, clock=time.time) -> None:
+        self.path = path
+        self.clock = clock
+        self._conn = None
+        self._lock = threading.Lock()
+        # key -> csig, for signatures computed since the last write.
+        self._pending = {}
+        self.disabled = False
+
+    def _connect(self):
+        # Called with the lock held.
+        if self._conn is None and not self.disabled:
+            try:
+                dirname = os.path.dirname(self.path)
+                if dirname:
+                    os.makedirs(dirname, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                       check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version != _VERSION:
+                    conn.execute("DROP TABLE IF EXISTS hashes")
+                    conn.execute("PRAGMA user_version=%d" % _VERSION)
+                conn.execute(_SCHEMA)
+                conn.commit()
+            except (OSError, sqlite3.Error):
+                self.disabled = True
+                return None
+            self._conn = conn
+        return self._conn
+
+    def _disable(self) -> None:
+        # Called with the lock held.
+        self.disabled = True
+        self._pending.clear()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def key(st, hash_format=None):
+        """Return the cache key for a file with ``stat`` result *st*."""
+        if hash_format is None:
+            hash_format = SCons.Util.get_current_hash_algorithm_used()
+        return (hash_format, st.st_dev, st.st_ino, st.st_size,
+                st.st_mtime_ns, st.st_ctime_ns)
+
+    def get(self, st):
+        """Return the recorded signature for *st*, or ``None``."""
+        key = self.key(st)
+        with self._lock:
+            csig = self._pending.get(key)
+            if csig is None:
+                conn = self._connect()
+                if conn is not None:
+                    try:
+                        row = conn.execute(
+                            "SELECT csig FROM hashes WHERE format=? AND dev=? "
+                            "AND ino=? AND size=? AND mtime=? AND ctime=?",
+                            key).fetchone()
+                    except sqlite3.Error:
+                        self._disable()
+                        row = None
+                    if row is not None:
+                        csig = row[0]
+            return csig
+
+    def set(self, st, csig) -> None:
+        """Record *csig* as the signature of a file with ``stat`` result *st*.
+
+        Nothing is recorded for a file modified (or changed) too recently
+        to be sure its contents will not change again under the same
+        timestamps.
+        """
+        if self.disabled:
+            return
+        changed = max(st.st_mtime_ns, st.st_ctime_ns)
+        if changed > (self.clock() - self.racy_window) * 1e9:
+            return
+        with self._lock:
+            self._pending[self.key(st)] = csig
+
+    def write(self) -> None:
+        """Store the signatures recorded since the last write."""
+        with self._lock:
+            if not self._pending:
+                return
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO hashes "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [k + (v,) for k, v in self._pending.items()])
+                    # Replaced rows get a new rowid, so the lowest ones
+                    # are the entries written longest ago.
+                    conn.execute(
+                        "DELETE FROM hashes WHERE rowid <= "
+                        "(SELECT MAX(rowid) FROM hashes) - ?",
+                        (self.max_entries,))
+            except sqlite3.Error:
+                # Perhaps another build held the database too long;
+                # these signatures are simply computed again next time.
+                self._disable()
+            self._pending.clear()
+
+    def close(self) -> None:
+        """Write any pending signatures and close the database."""
+        self.write()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,184 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import os
+import sqlite3
+import time
+import unittest
+from types import SimpleNamespace
+
+import TestCmd
+
+import SCons.HashCache
+import SCons.Node.FS
+import SCons.Util
+
+
+class HashCacheTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.path = self.test.workpath('cache', 'hashes.db')
+        self.test.write('f1', "f1\n")
+        self.test.write('f2', "f2\n")
+        # Old enough to be recorded.
+        for name in ('f1', 'f2'):
+            os.utime(self.test.workpath(name), (1000000000, 1000000000))
+
+    def stat(self, name):
+        return os.stat(self.test.workpath(name))
+
+    def cache(self, path=None):
+        # The files were changed (their inodes, at least) just now.
+        return SCons.HashCache.HashCache(path or self.path,
+                                         clock=lambda: time.time() + 10)
+
+    def test_get_set(self) -> None:
+        """Test recording, writing and looking up signatures"""
+        cache = self.cache()
+        assert cache.get(self.stat('f1')) is None
+        cache.set(self.stat('f1'), 'sig1')
+        # Pending signatures are found before they are written.
+        assert cache.get(self.stat('f1')) == 'sig1'
+        cache.close()
+        assert os.path.exists(self.path)
+
+        cache = self.cache()
+        assert cache.get(self.stat('f1')) == 'sig1'
+        assert cache.get(self.stat('f2')) is None
+
+        # A new modification time, or another hash format, misses.
+        os.utime(self.test.workpath('f1'), (1000000001, 1000000001))
+        assert cache.get(self.stat('f1')) is None
+        os.utime(self.test.workpath('f1'), (1000000000, 1000000000))
+        st = self.stat('f1')
+        assert cache.key(st, 'sha256') != cache.key(st)
+        cache.close()
+
+    def test_ctime(self) -> None:
+        """Test that a file changed with its timestamp kept misses"""
+        st = SimpleNamespace(st_dev=1, st_ino=2, st_size=3,
+                             st_mtime_ns=1000000000 * 10**9,
+                             st_ctime_ns=1000000000 * 10**9)
+        cache = self.cache()
+        cache.set(st, 'sig1')
+        cache.write()
+        assert cache.get(st) == 'sig1'
+        # As after "cp -p" onto the file, or "touch -r".
+        st.st_ctime_ns += 1
+        assert cache.get(st) is None
+        cache.close()
+
+    def test_racy(self) -> None:
+        """Test that recently modified files are not recorded"""
+        st = self.stat('f1')
+        now = max(st.st_mtime_ns, st.st_ctime_ns) / 1e9
+        cache = SCons.HashCache.HashCache(self.path, clock=lambda: now + 1)
+        cache.set(st, 'sig1')
+        assert cache.get(st) is None
+        cache.clock = lambda: now + 3
+        cache.set(st, 'sig1')
+        assert cache.get(st) == 'sig1'
+
+    def test_max_entries(self) -> None:
+        """Test that the entries written longest ago are dropped"""
+        cache = self.cache()
+        cache.max_entries = 1
+        cache.set(self.stat('f1'), 'sig1')
+        cache.write()
+        cache.set(self.stat('f2'), 'sig2')
+        cache.write()
+        assert cache.get(self.stat('f1')) is None
+        assert cache.get(self.stat('f2')) == 'sig2'
+        cache.close()
+
+    def test_unusable(self) -> None:
+        """Test that an unusable cache file is ignored"""
+        self.test.write('notadir', "")
+        cache = self.cache(self.test.workpath('notadir', 'db'))
+        cache.set(self.stat('f1'), 'sig1')
+        cache.write()
+        assert cache.disabled
+        assert cache.get(self.stat('f2')) is None
+        cache.close()
+
+    def test_write_error(self) -> None:
+        """Test that a cache which cannot be written is turned off"""
+        cache = self.cache()
+        cache.set(self.stat('f1'), 'sig1')
+        cache.write()
+        cache.timeout = 0
+        cache.close()
+        other = sqlite3.connect(self.path)
+        try:
+            # Another build holds the database.
+            other.execute("BEGIN EXCLUSIVE")
+            cache.set(self.stat('f2'), 'sig2')
+            cache.write()
+            assert cache.disabled
+            assert cache.get(self.stat('f1')) is None
+            cache.set(self.stat('f2'), 'sig2')
+            assert cache.get(self.stat('f2')) is None
+        finally:
+            other.close()
+        cache.close()
+
+    def test_old_schema(self) -> None:
+        """Test that a cache with an older table is replaced"""
+        os.makedirs(os.path.dirname(self.path))
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE hashes (format TEXT, dev INTEGER, "
+                     "ino INTEGER, size INTEGER, mtime INTEGER, csig TEXT)")
+        conn.commit()
+        conn.close()
+        cache = self.cache()
+        cache.set(self.stat('f1'), 'sig1')
+        cache.write()
+        assert not cache.disabled
+        assert cache.get(self.stat('f1')) == 'sig1'
+        cache.close()
+
+    def test_file_csig(self) -> None:
+        """Test File nodes consulting the cache"""
+        cache = self.cache()
+        save_cache = SCons.Node.FS.File.hash_cache
+        SCons.Node.FS.File.hash_cache = cache
+        try:
+            fs = SCons.Node.FS.FS(self.test.workpath(''))
+            f1 = fs.File('f1')
+            assert f1.get_csig() == SCons.Util.hash_signature("f1\n")
+            cache.set(self.stat('f2'), 'sig2')
+            assert fs.File('f2').get_csig() == 'sig2'
+        finally:
+            SCons.Node.FS.File.hash_cache = save_cache
+        assert cache.get(self.stat('f1')) == SCons.Util.hash_signature("f1\n")
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -54,6 +54,7 @@ import SCons.Util
 import SCons.Warnings
 from SCons.Debug import logInstanceCreation, Trace
 from SCons.Util import hash_signature, hash_file_signature, hash_collect
+from SCons.Util.stats import trace_events
 
 print_duplicate = 0
 
@@ -1237,6 +1238,8 @@ class FS(LocalFS):
         self.Root = {}
         self.SConstruct_dir = None
         self.max_drift = default_max_drift
+        # Sizes of the named job pools, set by SetPool().
+        self.pool_sizes = {}
 
         self.Top = None
         if path is None:
@@ -2674,6 +2677,10 @@ class File(Base):
     # Although the command-line argument is in kilobytes, this is in bytes.
     hash_chunksize = 65536
 
+    # A SCons.HashCache.HashCache consulted before reading files to
+    # compute their content signatures, if one was given with --hash-cache.
+    hash_cache = None
+
     def diskcheck_match(self) -> None:
         diskcheck_match(self, self.isdir,
                         "Directory %s found where file expected.")
@@ -2748,13 +2755,22 @@ class File(Base):
         if not self.rexists():
             # special marker to help distinguish from empty file
             return hash_signature(SCons.Util.NOFILE)
-        fname = self.rfile().get_abspath()
+        rfile = self.rfile()
+        st = rfile.stat()
+        hash_cache = File.hash_cache
+        if hash_cache is not None and st is not None:
+            cs = hash_cache.get(st)
+            if cs is not None:
+                return cs
+        fname = rfile.get_abspath()
         try:
             cs = hash_file_signature(fname, chunksize=File.hash_chunksize)
         except OSError as e:
             if not e.filename:
                 e.filename = fname
             raise
+        if hash_cache is not None and st is not None:
+            hash_cache.set(st, cs)
         return cs
 
     @SCons.Memoize.CountMethodCall
@@ -3229,23 +3245,24 @@ class File(Base):
 
         csig = self.get_max_drift_csig()
         if csig is None:
-            try:
-                size = self.get_size()
-                if size == -1:
-                    contents = SCons.Util.NOFILE
-                elif size < File.hash_chunksize:
-                    contents = self.get_contents()
+            with trace_events.span('signature', 'signature', file=self):
+                try:
+                    size = self.get_size()
+                    if size == -1:
+                        contents = SCons.Util.NOFILE
+                    elif size < File.hash_chunksize and File.hash_cache is None:
+                        contents = self.get_contents()
+                    else:
+                        csig = self.get_content_hash()
+                except OSError:
+                    # This can happen if there's actually a directory on-disk,
+                    # which can be the case if they've disabled disk checks,
+                    # or if an action with a File target actually happens to
+                    # create a same-named directory by mistake.
+                    csig = ''
                 else:
-                    csig = self.get_content_hash()
-            except OSError:
-                # This can happen if there's actually a directory on-disk,
-                # which can be the case if they've disabled disk checks,
-                # or if an action with a File target actually happens to
-                # create a same-named directory by mistake.
-                csig = ''
-            else:
-                if not csig:
-                    csig = SCons.Util.hash_signature(contents)
+                    if not csig:
+                        csig = SCons.Util.hash_signature(contents)
 
         ninfo.csig = csig
 
@@ -3633,7 +3650,7 @@ class File(Base):
             pass
 
         cache = self.get_build_env().get_CacheDir()
-        cachedir, cachefile = cache.cachepath(self)
+        cachedir, cachefile = cache.retrievepath(self)
         if not self.exists() and cachefile and os.path.exists(cachefile):
             self.cachedir_csig = cache.get_cachedir_csig(self)
         else:
@@ -552,6 +552,7 @@ class Node(metaclass=NoSlotsPyPy):
                  'changed_since_last_build',
                  'store_info',
                  'pseudo',
+                 'pool',
                  '_tags',
                  '_func_is_derived',
                  '_func_exists',
@@ -596,6 +597,7 @@ class Node(metaclass=NoSlotsPyPy):
         self.state = no_state
         self.precious = False
         self.pseudo = False
+        self.pool = None
         self.noclean = False
         self.nocache = False
         self.cached = False # is this node pulled from cache?
@@ -1252,6 +1254,10 @@ class Node(metaclass=NoSlotsPyPy):
         """Set the Node's pseudo value."""
         self.pseudo = pseudo
 
+    def set_pool(self, pool) -> None:
+        """Set the name of the job pool the Node's task runs in."""
+        self.pool = pool
+
     def set_noclean(self, noclean: bool = True) -> None:
         """Set the Node's noclean value."""
         self.noclean = noclean
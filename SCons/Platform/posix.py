@@ -40,6 +40,11 @@ exitvalmap = {
     13 : 126,
 }
 
+# If set, called instead of Popen.wait() to wait for spawned commands.
+# SCons.Taskmaster.Memory sets it while memory admission control is on,
+# to record the peak memory use of the commands.
+wait_hook = None
+
 def escape(arg):
     """escape shell special characters"""
     slash = '\\'
@@ -55,6 +60,8 @@ def escape(arg):
 
 def exec_subprocess(l, env):
     proc = subprocess.Popen(l, env = env, close_fds = True)
+    if wait_hook is not None:
+        return wait_hook(proc)
     return proc.wait()
 
 def subprocess_spawn(sh, escape, cmd, args, env):
@@ -64,6 +71,8 @@ def exec_popen3(l, env, stdout, stderr):
     proc = subprocess.Popen(l, env = env, close_fds = True,
                             stdout = stdout,
                             stderr = stderr)
+    if wait_hook is not None:
+        return wait_hook(proc)
     return proc.wait()
 
 def piped_env_spawn(sh, escape, cmd, args, env, stdout, stderr):
@@ -25,11 +25,20 @@
 
 import SCons.compat  # pylint: disable=wrong-import-order
 
+import copy
+import importlib
 import os
 import pickle
+import queue
+import re
+import threading
 import time
 
 import SCons.dblite
+import SCons.dbshard
+import SCons.Errors
+import SCons.Node.FS
+import SCons.SConsignRecord
 import SCons.Warnings
 from SCons.compat import PICKLE_PROTOCOL
 from SCons.Util import print_time
@@ -41,8 +50,24 @@ def corrupt_dblite_warning(filename) -> None:
         "Ignoring corrupt .sconsign file: %s" % filename,
     )
 
-SCons.dblite.IGNORE_CORRUPT_DBFILES = True
-SCons.dblite.corruption_warning = corrupt_dblite_warning
+# Short names which may be given as the dbm_module of File(), for
+# the database modules supplied with SCons.  SCons.dbsqlite is not
+# imported unless it is used, as Python may be built without sqlite3.
+DB_Module_Names = {
+    'dbindex': 'SCons.dbindex',
+    'dblite': 'SCons.dblite',
+    'dblog': 'SCons.dblog',
+    'sqlite': 'SCons.dbsqlite',
+}
+
+
+def _warn_on_corruption(module) -> None:
+    """Have one of our database modules warn about corrupt files."""
+    if getattr(module, '__name__', None) in DB_Module_Names.values():
+        module.IGNORE_CORRUPT_DBFILES = True
+        module.corruption_warning = corrupt_dblite_warning
+
+_warn_on_corruption(SCons.dblite)
 
 # XXX Get rid of the global array so this becomes re-entrant.
 sig_files = []
@@ -57,6 +82,15 @@ DataBase = {}
 DB_Module = SCons.dblite
 DB_Name = None
 DB_sync_list = []
+# How the entries for each directory are encoded in the database:
+# "pickle", or "binary" for SCons.SConsignRecord.  Either is read.
+DB_Record_Format = "pickle"
+DB_Record_Formats = ("pickle", "binary")
+# How the database is split into shards (see SCons.dbshard), or None.
+DB_Shard = None
+# Held while a database is read or written other than by the main
+# build loop, as a Checkpointer does in its own thread.
+DB_lock = threading.Lock()
 
 def current_sconsign_filename():
     hash_format = SCons.Util.get_hash_format()
@@ -71,6 +105,12 @@ def current_sconsign_filename():
         return ".sconsign"
     return ".sconsign_" + current_hash_algorithm
 
+def _open_database(name, mode):
+    if DB_Shard is None:
+        return DB_Module.open(name, mode)
+    return SCons.dbshard.open(name, mode, module=DB_Module, scheme=DB_Shard)
+
+
 def Get_DataBase(dir):
     global DB_Name
 
@@ -86,7 +126,7 @@ def Get_DataBase(dir):
                     return DataBase[d], mode
                 except KeyError:
                     path = d.entry_abspath(DB_Name)
-                    try: db = DataBase[d] = DB_Module.open(path, mode)
+                    try: db = DataBase[d] = _open_database(path, mode)
                     except OSError:
                         pass
                     else:
@@ -97,7 +137,7 @@ def Get_DataBase(dir):
     try:
         return DataBase[top], "c"
     except KeyError:
-        db = DataBase[top] = DB_Module.open(DB_Name, "c")
+        db = DataBase[top] = _open_database(DB_Name, "c")
         DB_sync_list.append(db)
         return db, "c"
     except TypeError:
@@ -105,6 +145,287 @@ def Get_DataBase(dir):
         raise
 
 
+def Preload(targets) -> None:
+    """Open the parts of a sharded database *targets* need, in parallel.
+
+    The directories of file targets, and the trees under directory
+    targets, are needed.  Any other parts are opened when they are
+    first used.
+    """
+    if ForDirectory is not DB or DB_Shard is None or not targets:
+        return
+    top = SCons.Node.FS.get_default_fs().Top
+    db, _ = Get_DataBase(top)
+    if not hasattr(db, 'preload'):
+        return
+    paths = []
+    for node in targets:
+        if isinstance(node, SCons.Node.FS.Dir):
+            paths.append((normcase(node.get_internal_path()), True))
+        elif isinstance(node, SCons.Node.FS.Base):
+            paths.append((normcase(node.get_dir().get_internal_path()), False))
+    db.preload(paths)
+
+
+def parse_checkpoint(value):
+    """Parse the interval between the checkpoints of a :class:`Checkpointer`.
+
+    *value* is a number of finished tasks, or a number of seconds
+    followed by ``s``, or of minutes followed by ``m``.  Returns a
+    ``(tasks, seconds)`` tuple, one of which is ``None``.
+
+    Raises:
+        ValueError: *value* is not a positive interval.
+    """
+    m = re.fullmatch(r'\s*(\d+(?:\.\d*)?)\s*([sSmM]?)\s*', str(value))
+    if m:
+        number, unit = m.groups()
+        unit = unit.lower()
+        if not unit:
+            if '.' not in number and int(number) > 0:
+                return int(number), None
+        elif float(number) > 0:
+            return None, float(number) * (60 if unit == 'm' else 1)
+    raise ValueError("not a valid checkpoint interval: %s" % repr(value))
+
+
+class Checkpointer:
+    """Stores signatures in the database while the build goes on.
+
+    :meth:`task_done` is called as each task finishes, one at a time.
+    After every *tasks* tasks, or once *seconds* seconds have passed,
+    the entries of the directories which changed since the last
+    checkpoint are copied, and a thread encodes the copies, puts them
+    in the database and syncs it, so that a build which is killed keeps
+    the signatures of what it built so far.  The tasks wait only for
+    the copying.  Signatures kept in per-directory ``.sconsign`` files
+    are not checkpointed.
+    """
+
+    def __init__(self, tasks=None, seconds=None, clock=time.monotonic) -> None:
+        self.tasks = tasks
+        self.seconds = seconds
+        self.clock = clock
+        self.count = 0
+        self.last = clock()
+        # Number of checkpoints handed to the thread.
+        self.checkpoints = 0
+        self.queue = queue.Queue()
+        self.thread = None
+        self.error = None
+
+    def task_done(self) -> None:
+        """Note a finished task, and checkpoint if it is time to."""
+        self.count += 1
+        if self.tasks is not None:
+            due = self.count >= self.tasks
+        else:
+            due = self.clock() - self.last >= self.seconds
+        if due:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Hand the entries changed since the last checkpoint to the thread."""
+        self.count = 0
+        self.last = self.clock()
+        batch = []
+        for sig_file in sig_files:
+            if isinstance(sig_file, DB) and sig_file.changed:
+                batch.append(sig_file.snapshot())
+                sig_file.changed = False
+        if not batch:
+            return
+        self.checkpoints += 1
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True,
+                                           name='sconsign-checkpoint')
+            self.thread.start()
+        self.queue.put(batch)
+
+    def _run(self) -> None:
+        done = False
+        while not done:
+            batches = [self.queue.get()]
+            # If the database is slower than the build, later
+            # checkpoints replace the entries of earlier ones.
+            while True:
+                try:
+                    batches.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            updates = {}
+            for batch in batches:
+                if batch is None:
+                    done = True
+                    break
+                for db, path, entries in batch:
+                    updates[(id(db), path)] = (db, entries)
+            if updates and self.error is None:
+                try:
+                    self._store(updates)
+                except Exception as e:
+                    self.error = e
+
+    @staticmethod
+    def _store(updates) -> None:
+        encoded = []
+        for (key, path), (db, entries) in updates.items():
+            for entry in entries.values():
+                entry.convert_to_sconsign()
+            encoded.append((key, path, db, _encode(entries)))
+        dbs = {}
+        with DB_lock:
+            for key, path, db, data in encoded:
+                db[path] = data
+                dbs[key] = db
+            for db in dbs.values():
+                try:
+                    syncmethod = db.sync
+                except AttributeError:
+                    pass # Not all dbm modules have sync() methods.
+                else:
+                    syncmethod()
+
+    def close(self) -> None:
+        """Wait for the thread to store the checkpoints made so far.
+
+        A later checkpoint starts the thread again.  If any checkpoint
+        failed, a warning is issued.  Checkpoints leave the directories
+        to be merged and written by :func:`write` as usual.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            SCons.Warnings.warn(SCons.Warnings.CorruptSConsignWarning,
+                                "Could not checkpoint .sconsign data: %s" % self.error)
+            self.error = None
+
+
+def _database_size() -> int:
+    """Return the bytes used by files named like the database."""
+    name = DB_Name
+    if name is None:
+        name = current_sconsign_filename()
+    top = SCons.Node.FS.get_default_fs().Top
+    if not os.path.isabs(name):
+        name = os.path.join(top.get_abspath(), name)
+    dirname, prefix = os.path.split(name)
+    size = 0
+    try:
+        names = os.listdir(dirname or os.curdir)
+    except OSError:
+        return 0
+    for entry in names:
+        if not entry.startswith(prefix):
+            continue
+        path = os.path.join(dirname, entry)
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for f in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, f))
+                    except OSError:
+                        pass
+        else:
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+    return size
+
+
+def Prune():
+    """Remove stale entries from the database and compact it.
+
+    Called at the end of a build.  Entries of directories the build
+    knows about are kept only for files which are nodes of the build
+    and exist on disk (or in a repository).  The entries of other
+    directories are kept only for files which exist, and a directory
+    which no longer exists is removed with its entries.  Changed
+    entries are written first, so this build's signatures are kept.
+
+    Returns a ``(entries, directories, bytes)`` tuple of what was
+    removed and how much smaller the database got, or ``None`` if
+    signatures are not kept in a database.
+    """
+    if ForDirectory is not DB:
+        return None
+    fs = SCons.Node.FS.get_default_fs()
+    top = fs.Top
+    db, mode = Get_DataBase(top)
+    for sig_file in sig_files:
+        sig_file.write(sync=0)
+    if hasattr(db, 'sync'):
+        db.sync()
+    before = _database_size()
+
+    loaded = {}
+    for sig_file in sig_files:
+        if isinstance(sig_file, DB):
+            loaded[normcase(sig_file.dir.get_internal_path())] = sig_file
+    bases = [top.get_abspath()] + [r.get_abspath() for r in top.repositories]
+
+    def exists(path, name):
+        if os.path.isabs(path):
+            return os.path.lexists(os.path.join(path, name))
+        return any(os.path.lexists(os.path.join(b, path, name)) for b in bases)
+
+    entries_removed = dirs_removed = 0
+    for path in list(db.keys()):
+        abspath = os.path.normpath(os.path.join(top.get_abspath(), path))
+        drive, _ = os.path.splitdrive(abspath)
+        lookup = SCons.Node.FS._my_normcase(abspath.replace(os.sep, '/'))
+        node = fs.get_root(drive)._lookupDict.get(lookup)
+        if not isinstance(node, SCons.Node.FS.Dir):
+            node = None
+        sig_file = loaded.get(path)
+        if sig_file is not None:
+            entries = sig_file.entries
+        else:
+            try:
+                entries = _decode(db[path])
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                # Unreadable, so of no use to anyone.
+                entries = {}
+        if node is None and not exists(path, ''):
+            stale = set(entries)
+        else:
+            stale = []
+            for name in entries:
+                if node is not None:
+                    if SCons.Node.FS._my_normcase(name) not in node.entries:
+                        stale.append(name)
+                        continue
+                if not exists(path, name):
+                    stale.append(name)
+        if not stale and entries:
+            continue
+        stale = set(stale)
+        entries_removed += len(stale)
+        if len(stale) == len(entries):
+            del db[path]
+            dirs_removed += 1
+            if sig_file is not None:
+                sig_file.entries = {}
+            continue
+        if sig_file is not None:
+            for name in stale:
+                del sig_file.entries[name]
+        else:
+            entries = {k: v for k, v in entries.items() if k not in stale}
+        db[path] = _encode(entries if sig_file is None else sig_file.entries)
+
+    if hasattr(db, 'sync'):
+        db.sync()
+    if hasattr(db, 'compact'):
+        db.compact()
+    return entries_removed, dirs_removed, before - _database_size()
+
+
 def Reset() -> None:
     """Reset global state.  Used by unit tests that end up using
     SConsign multiple times to get a clean slate for each test."""
@@ -184,6 +505,44 @@ class SConsignEntry:
                 setattr(self, key, value)
 
 
+def _copy_entry(entry, ninfo=None):
+    """Return a copy of *entry* which can be converted for storage
+    without changing it, with *ninfo* merged into its node information.
+
+    The dependency lists are shared with *entry*: converting the copy
+    replaces them rather than changing them.
+    """
+    entry = copy.copy(entry)
+    entry.binfo = copy.copy(entry.binfo)
+    if ninfo is not None:
+        try:
+            entry.ninfo = copy.copy(entry.ninfo)
+        except AttributeError:
+            # As in Base.merge, for SConf Nodes.
+            pass
+        else:
+            entry.ninfo.merge(ninfo)
+    return entry
+
+
+def _decode(rawentries):
+    """Return the entries of a directory as read from the database: a
+    dictionary, or for a binary record a mapping which decodes each
+    entry when it is first looked up."""
+    if SCons.SConsignRecord.is_encoded(rawentries):
+        return SCons.SConsignRecord.decode(rawentries, SConsignEntry)
+    entries = pickle.loads(rawentries)
+    if not isinstance(entries, dict):
+        raise TypeError("not a dictionary")
+    return entries
+
+
+def _encode(entries):
+    if DB_Record_Format == "binary":
+        return SCons.SConsignRecord.encode(entries, SConsignEntry)
+    return pickle.dumps(entries, PICKLE_PROTOCOL)
+
+
 class Base:
     """
     This is the controlling class for the signatures for the collection of
@@ -196,6 +555,8 @@ class Base:
     def __init__(self) -> None:
         self.entries = {}
         self.dirty = False
+        # Whether entries were set since the last checkpoint.
+        self.changed = False
         self.to_be_merged = {}
 
     def get_entry(self, filename):
@@ -210,6 +571,7 @@ class Base:
         """
         self.entries[filename] = obj
         self.dirty = True
+        self.changed = True
 
     def do_not_set_entry(self, filename, obj) -> None:
         pass
@@ -219,6 +581,7 @@ class Base:
         entry.binfo.merge(node.get_binfo())
         self.to_be_merged[filename] = node
         self.dirty = True
+        self.changed = True
 
     def do_not_store_info(self, filename, node) -> None:
         pass
@@ -257,22 +620,33 @@ class DB(Base):
         # information.
         path = normcase(dir.get_tpath())
         try:
-            rawentries = db[path]
+            with DB_lock:
+                rawentries = db[path]
         except KeyError:
             pass
         else:
             try:
-                self.entries = pickle.loads(rawentries)
-                if not isinstance(self.entries, dict):
-                    self.entries = {}
-                    raise TypeError
+                self.entries = _decode(rawentries)
             except KeyboardInterrupt:
                 raise
             except Exception as e:
                 SCons.Warnings.warn(SCons.Warnings.CorruptSConsignWarning,
                                     "Ignoring corrupt sconsign entry : %s (%s)\n"%(self.dir.get_tpath(), e))
-            for key, entry in self.entries.items():
-                entry.convert_from_sconsign(dir, key)
+            if isinstance(self.entries, SCons.SConsignRecord.Entries):
+                # Entries are converted as they are decoded, and one
+                # which cannot be is treated as missing.
+                def convert(key, entry) -> None:
+                    entry.convert_from_sconsign(dir, key)
+
+                def corrupt(key, e) -> None:
+                    SCons.Warnings.warn(SCons.Warnings.CorruptSConsignWarning,
+                                        "Ignoring corrupt sconsign entry : %s (%s)\n"%(os.path.join(dir.get_tpath(), key), e))
+
+                self.entries.convert = convert
+                self.entries.error = corrupt
+            else:
+                for key, entry in self.entries.items():
+                    entry.convert_from_sconsign(dir, key)
 
         if mode == "r":
             # This directory is actually under a repository, which means
@@ -284,10 +658,28 @@ class DB(Base):
 
         sig_files.append(self)
 
-    def write(self, sync: int=1) -> None:
-        if not self.dirty:
-            return
+    def snapshot(self):
+        """Copy the entries, as :meth:`encode` would merge them.
+
+        Returns the database, the key to store the entries under, and
+        a dictionary of copies of the entries which can be converted
+        and encoded while the build goes on: the entries themselves,
+        and the nodes waiting to be merged, are left alone.
+        """
+        db, mode = Get_DataBase(self.dir)
+        path = normcase(self.dir.get_internal_path())
+        entries = {key: _copy_entry(entry)
+                   for key, entry in self.entries.items()}
+        for key, node in self.to_be_merged.items():
+            entries[key] = _copy_entry(node.get_stored_info(), node.get_ninfo())
+        return db, path, entries
 
+    def encode(self):
+        """Merge the stored entries and encode them for the database.
+
+        Returns the database, the key to store the entries under, and
+        the encoded entries.
+        """
         self.merge()
 
         db, mode = Get_DataBase(self.dir)
@@ -299,7 +691,15 @@ class DB(Base):
         path = normcase(self.dir.get_internal_path())
         for key, entry in self.entries.items():
             entry.convert_to_sconsign()
-        db[path] = pickle.dumps(self.entries, PICKLE_PROTOCOL)
+        return db, path, _encode(self.entries)
+
+    def write(self, sync: int=1) -> None:
+        if not self.dirty:
+            return
+
+        db, path, data = self.encode()
+        db[path] = data
+        self.dirty = False
 
         if sync:
             try:
@@ -420,19 +820,49 @@ class DirFile(Dir):
 ForDirectory = DB
 
 
-def File(name, dbm_module=None) -> None:
+def File(name, dbm_module=None, record_format=None, shard=None) -> None:
     """
     Arrange for all signatures to be stored in a global .sconsign.db*
     file.
+
+    *dbm_module* may be a module or the name of one to import, which
+    can be one of the short names in :data:`DB_Module_Names`.
+    *record_format* is one of :data:`DB_Record_Formats`.  *shard* is
+    a scheme for splitting the database into shards, as for
+    :func:`SCons.dbshard.parse_scheme`, or ``False`` to not split it.
     """
-    global ForDirectory, DB_Name, DB_Module
+    global ForDirectory, DB_Name, DB_Module, DB_Record_Format, DB_Shard
+    if shard is False:
+        DB_Shard = None
+    elif shard is not None:
+        try:
+            DB_Shard = SCons.dbshard.parse_scheme(shard)
+        except ValueError:
+            raise SCons.Errors.UserError(
+                "Unknown SConsign shard scheme %s (use \"dir\" or a number of shards)"
+                % repr(shard)) from None
+    if record_format is not None:
+        if record_format not in DB_Record_Formats:
+            raise SCons.Errors.UserError(
+                "Unknown SConsign record format %s (use one of %s)"
+                % (repr(record_format), ", ".join(DB_Record_Formats)))
+        DB_Record_Format = record_format
     if name is None:
         ForDirectory = DirFile
         DB_Module = None
     else:
         ForDirectory = DB
         DB_Name = name
+        if isinstance(dbm_module, str):
+            module_name = DB_Module_Names.get(dbm_module, dbm_module)
+            try:
+                dbm_module = importlib.import_module(module_name)
+            except ImportError as e:
+                raise SCons.Errors.UserError(
+                    "Cannot use %s as the SConsign database module: %s"
+                    % (repr(dbm_module), e))
         if dbm_module is not None:
+            _warn_on_corruption(dbm_module)
             DB_Module = dbm_module
 
 # Local Variables:
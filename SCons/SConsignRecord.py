@@ -0,0 +1,700 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""Compact binary encoding of the signature entries for a directory.
+
+By default, the entries the :class:`SCons.SConsign.DB` class stores for
+each directory are pickled, which repeats every dependency path, the
+full class and attribute names of every node information object, and
+hex signatures, and unpickling a directory builds every entry in it
+even when the build looks at one.  :func:`encode` instead writes a
+versioned record which is read lazily:
+
+* :data:`MAGIC`, ending in the format version, the width in bytes of
+  the hashes in the record, and the number of strings, dependencies and
+  entries in it;
+* tables of little-endian 4-byte offsets to each string, dependency and
+  entry, so that any of them can be found without reading the others;
+* the strings used in the record (entry names, dependency paths and
+  action strings), each stored once;
+* the dependencies used in the record, each a path and the node
+  information it had, stored once however many entries share it (as
+  the headers included by the files in a directory usually are);
+* the entries, each either a compact encoding or, for an entry this
+  format cannot hold exactly (for example one made by a configure
+  check), a pickle.
+
+In the compact encoding, signatures are stored as raw bytes of the
+record's hash width, timestamps as 8-byte integers or floats, and sizes
+and indices as unsigned LEB128 varints.  Node information records start
+with a byte of :data:`NI_CSIG` and friends saying which fields are
+present.  A list of dependencies is stored as indices into the
+dependency table, in whichever of three forms is smallest: runs of
+consecutive indices (:data:`LIST_RUNS`), a bitmap of indices in
+increasing order (:data:`LIST_BITMAP`), or an array of fixed-width
+indices (:data:`LIST_ARRAY`).  The entries of a directory usually list
+their shared dependencies in the same order, so most lists take a few
+bytes.
+
+:func:`decode` returns an :class:`Entries` mapping which holds a
+:class:`memoryview` of the record and decodes an entry, and the strings
+and dependencies it uses, the first time it is looked up.  The node
+information objects of a dependency shared by several decoded entries
+are shared too, as they are when the entries are created during a
+build.  The record is not copied, so it may be read from a
+:class:`mmap.mmap`, which must then stay open until
+:meth:`Entries.decode_all` is called or the mapping is dropped.
+
+Both functions are given the entry class,
+:class:`SCons.SConsign.SConsignEntry`, by their caller, so that this
+module does not import :mod:`SCons.SConsign`, which imports it.
+"""
+
+import pickle
+import struct
+from collections.abc import MutableMapping
+
+import SCons.Node.FS
+from SCons.compat import PICKLE_PROTOCOL
+
+VERSION = 2
+MAGIC = b'SCsr' + bytes([VERSION])
+
+# Entry kinds.
+ENTRY_COMPACT = 0
+ENTRY_PICKLE = 1
+
+# Node information flags.
+NI_CSIG = 0x01
+NI_TIMESTAMP = 0x02
+NI_FLOAT_TIMESTAMP = 0x04
+NI_SIZE = 0x08
+NI_DIR = 0x10
+
+# Build information flags.
+BI_BACTSIG = 0x01
+BI_BACT = 0x02
+BI_SOURCES = 0x04
+BI_DEPENDS = 0x08
+BI_IMPLICIT = 0x10
+
+# Dependency list forms.
+LIST_RUNS = 0
+LIST_BITMAP = 1
+LIST_ARRAY = 2
+
+_LISTS = (
+    (BI_SOURCES, 'bsources', 'bsourcesigs'),
+    (BI_DEPENDS, 'bdepends', 'bdependsigs'),
+    (BI_IMPLICIT, 'bimplicit', 'bimplicitsigs'),
+)
+
+# Array index width in bytes -> struct format character.
+_INDEX_FORMATS = {1: 'B', 2: 'H', 4: 'I'}
+
+# The positions of the bits set in each byte value, for bitmaps.
+_BITS = [tuple(i for i in range(8) if b & (1 << i)) for b in range(256)]
+
+# Setters for the build information slots.  A freshly made
+# FileBuildInfo has no dependency map for its __setattr__ to invalidate,
+# so the decoder sets the slots directly.
+_set_slot = {name: getattr(SCons.Node.BuildInfoBase, name).__set__
+             for name in ('bactsig', 'bact', 'bsources', 'bsourcesigs',
+                          'bdepends', 'bdependsigs', 'bimplicit',
+                          'bimplicitsigs')}
+
+_header = struct.Struct('<BIII')
+_int64 = struct.Struct('<q')
+_float64 = struct.Struct('<d')
+
+
+class RecordError(ValueError):
+    """A record could not be decoded."""
+
+
+def is_encoded(data) -> bool:
+    """Return whether *data* holds a record written by :func:`encode`."""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def _varint(n, out) -> None:
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _varint_size(n) -> int:
+    return max(1, (n.bit_length() + 6) // 7)
+
+
+def _index_list(indices, out) -> None:
+    """Append the smallest encoding of the dependency *indices*."""
+    count = len(indices)
+    runs = []
+    for index in indices:
+        if runs and runs[-1][0] + runs[-1][1] == index:
+            runs[-1][1] += 1
+        else:
+            runs.append([index, 1])
+    runs_size = _varint_size(len(runs)) + sum(
+        _varint_size(start) + _varint_size(length) for start, length in runs)
+    top = max(indices, default=0)
+    width = 1 if top < 0x100 else 2 if top < 0x10000 else 4
+    array_size = 1 + count * width
+    bitmap_size = None
+    if count > 1 and all(a < b for a, b in zip(indices, indices[1:])):
+        base = indices[0]
+        nbytes = (indices[-1] - base) // 8 + 1
+        bitmap_size = _varint_size(base) + _varint_size(nbytes) + nbytes
+    if bitmap_size is not None and bitmap_size < min(runs_size, array_size):
+        out.append(LIST_BITMAP)
+        _varint(count, out)
+        _varint(base, out)
+        _varint(nbytes, out)
+        bitmap = bytearray(nbytes)
+        for index in indices:
+            index -= base
+            bitmap[index >> 3] |= 1 << (index & 7)
+        out += bitmap
+    elif runs_size <= array_size:
+        out.append(LIST_RUNS)
+        _varint(count, out)
+        _varint(len(runs), out)
+        for start, length in runs:
+            _varint(start, out)
+            _varint(length, out)
+    else:
+        out.append(LIST_ARRAY)
+        _varint(count, out)
+        out.append(width)
+        out += struct.pack('<%d%s' % (count, _INDEX_FORMATS[width]), *indices)
+
+
+class _Encoder:
+
+    def __init__(self, entry_class) -> None:
+        self.entry_class = entry_class
+        self.strings = {}
+        self.deps = {}
+        # (path, id(nodeinfo)) -> index in deps, for dependencies which
+        # share the same in-memory object, as they usually do.
+        self.dep_ids = {}
+        self.width = None
+
+    def string(self, s) -> int:
+        try:
+            return self.strings[s]
+        except KeyError:
+            index = self.strings[s] = len(self.strings)
+            return index
+
+    def hash_bytes(self, sig):
+        """Return *sig* as raw bytes, or ``None`` if it cannot be."""
+        if not isinstance(sig, str):
+            return None
+        try:
+            raw = bytes.fromhex(sig)
+        except ValueError:
+            return None
+        if raw.hex() != sig or not raw:
+            return None
+        if self.width is None:
+            if len(raw) > 0xff:
+                return None
+            self.width = len(raw)
+        elif len(raw) != self.width:
+            return None
+        return raw
+
+    def nodeinfo(self, ni, out) -> bool:
+        if type(ni) is SCons.Node.FS.DirNodeInfo:
+            out.append(NI_DIR)
+            return True
+        if type(ni) is not SCons.Node.FS.FileNodeInfo:
+            return False
+        flags = 0
+        tail = bytearray()
+        csig = getattr(ni, 'csig', None)
+        if csig is not None:
+            raw = self.hash_bytes(csig)
+            if raw is None:
+                return False
+            flags |= NI_CSIG
+            tail += raw
+        elif hasattr(ni, 'csig'):
+            return False
+        if hasattr(ni, 'timestamp'):
+            timestamp = ni.timestamp
+            if type(timestamp) is int and -2**63 <= timestamp < 2**63:
+                flags |= NI_TIMESTAMP
+                tail += _int64.pack(timestamp)
+            elif type(timestamp) is float:
+                flags |= NI_TIMESTAMP | NI_FLOAT_TIMESTAMP
+                tail += _float64.pack(timestamp)
+            else:
+                return False
+        if hasattr(ni, 'size'):
+            size = ni.size
+            if type(size) is not int or size < 0:
+                return False
+            flags |= NI_SIZE
+            _varint(size, tail)
+        out.append(flags)
+        out += tail
+        return True
+
+    def dependency(self, name, ni):
+        """Return the index of a dependency, or ``None`` if it cannot
+        be encoded."""
+        key = (name, id(ni))
+        index = self.dep_ids.get(key)
+        if index is not None:
+            return index
+        if type(name) is not str:
+            return None
+        dep = bytearray()
+        _varint(self.string(name), dep)
+        if not self.nodeinfo(ni, dep):
+            return None
+        dep = bytes(dep)
+        try:
+            index = self.deps[dep]
+        except KeyError:
+            index = self.deps[dep] = len(self.deps)
+        self.dep_ids[key] = index
+        return index
+
+    def entry(self, entry):
+        """Return the compact encoding of *entry*, or ``None``.
+
+        The result is a list of byte strings and, for each list of
+        dependencies, a tuple of its flag and the indices of the
+        dependencies, as they are renumbered once the whole record has
+        been seen.
+        """
+        if type(entry) is not self.entry_class:
+            return None
+        binfo = getattr(entry, 'binfo', None)
+        ninfo = getattr(entry, 'ninfo', None)
+        if type(binfo) is not SCons.Node.FS.FileBuildInfo or ninfo is None:
+            return None
+        head = bytearray([ENTRY_COMPACT])
+        if not self.nodeinfo(ninfo, head):
+            return None
+        flags = 0
+        tail = bytearray()
+        bactsig = getattr(binfo, 'bactsig', None)
+        if bactsig is not None:
+            raw = self.hash_bytes(bactsig)
+            if raw is None:
+                return None
+            flags |= BI_BACTSIG
+            tail += raw
+        if hasattr(binfo, 'bact'):
+            if type(binfo.bact) is not str:
+                return None
+            flags |= BI_BACT
+            _varint(self.string(binfo.bact), tail)
+        parts = [head, tail]
+        for flag, nattr, sattr in _LISTS:
+            names = getattr(binfo, nattr, None)
+            sigs = getattr(binfo, sattr, None)
+            if names is None and not sigs:
+                continue
+            if names is None or sigs is None or len(names) != len(sigs):
+                return None
+            flags |= flag
+            indices = []
+            for name, sig in zip(names, sigs):
+                index = self.dependency(name, sig)
+                if index is None:
+                    return None
+                indices.append(index)
+            parts.append((flag, indices))
+        head.append(flags)
+        return parts
+
+
+def _offsets(chunks):
+    """Return the offsets of the concatenated *chunks*, and the end of
+    the last one."""
+    offsets = [0]
+    for chunk in chunks:
+        offsets.append(offsets[-1] + len(chunk))
+    return offsets
+
+
+def encode(entries, entry_class) -> bytes:
+    """Encode the mapping of *entry_class* objects *entries*, as
+    converted for storage.  Entries of other types are pickled."""
+    encoder = _Encoder(entry_class)
+    names = []
+    body = []
+    for name, entry in entries.items():
+        names.append(encoder.string(name))
+        parts = encoder.entry(entry)
+        if parts is None:
+            parts = [bytes([ENTRY_PICKLE]),
+                     pickle.dumps(entry, PICKLE_PROTOCOL)]
+        body.append(parts)
+    # Number the dependencies in the order the entries list them, the
+    # implicit dependencies first, so that the headers the entries
+    # share are not interleaved with the sources only one of them has,
+    # and their lists are a few runs of consecutive indices.
+    number = {}
+    for flag in (BI_IMPLICIT, BI_DEPENDS, BI_SOURCES):
+        for parts in body:
+            for part in parts:
+                if type(part) is tuple and part[0] == flag:
+                    for index in part[1]:
+                        if index not in number:
+                            number[index] = len(number)
+    # Dependencies only entries which were pickled use are dropped.
+    interned = list(encoder.deps)
+    deps = [None] * len(number)
+    for index, new in number.items():
+        deps[new] = interned[index]
+    for n, parts in enumerate(body):
+        data = bytearray()
+        for part in parts:
+            if type(part) is tuple:
+                _index_list([number[index] for index in part[1]], data)
+            else:
+                data += part
+        body[n] = data
+    strings = [s.encode('utf-8', 'surrogateescape') for s in encoder.strings]
+    table = names + _offsets(body)
+    out = bytearray(MAGIC)
+    out += _header.pack(encoder.width or 0, len(strings), len(deps), len(body))
+    for ints in (_offsets(strings), _offsets(deps), table):
+        out += struct.pack('<%dI' % len(ints), *ints)
+    for chunks in (strings, deps, body):
+        out += b''.join(chunks)
+    return bytes(out)
+
+
+class _Record:
+    """The tables of a record, and the strings and dependencies
+    decoded from it so far."""
+
+    def __init__(self, data, entry_class) -> None:
+        self.entry_class = entry_class
+        self.data = data = memoryview(data).cast('B')
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise RecordError("not a signature record")
+        pos = len(MAGIC)
+        try:
+            width, nstrings, ndeps, nentries = _header.unpack_from(data, pos)
+            pos += _header.size
+            self.string_offsets = struct.unpack_from(
+                '<%dI' % (nstrings + 1), data, pos)
+            pos += 4 * (nstrings + 1)
+            self.dep_offsets = struct.unpack_from('<%dI' % (ndeps + 1), data, pos)
+            pos += 4 * (ndeps + 1)
+            self.entry_names = struct.unpack_from('<%dI' % nentries, data, pos)
+            pos += 4 * nentries
+            self.entry_offsets = struct.unpack_from(
+                '<%dI' % (nentries + 1), data, pos)
+            pos += 4 * (nentries + 1)
+        except struct.error:
+            raise RecordError("truncated signature record") from None
+        self.width = width
+        self.strings_start = pos
+        self.deps_start = pos + self.string_offsets[-1]
+        self.entries_start = self.deps_start + self.dep_offsets[-1]
+        if self.entries_start + self.entry_offsets[-1] != len(data):
+            raise RecordError("truncated signature record")
+        self.strings = [None] * nstrings
+        self.dep_names = [None] * ndeps
+        self.dep_sigs = [None] * ndeps
+        # 1 for each dependency decoded, so that a run of them can be
+        # checked without comparing node information objects.
+        self.dep_loaded = bytearray(ndeps)
+
+    def byte(self, pos):
+        try:
+            return self.data[pos], pos + 1
+        except IndexError:
+            raise RecordError("truncated signature record") from None
+
+    def varint(self, pos):
+        data = self.data
+        try:
+            result = data[pos]
+            if result < 0x80:
+                return result, pos + 1
+            result &= 0x7f
+            shift = 7
+            pos += 1
+            while True:
+                b = data[pos]
+                pos += 1
+                result |= (b & 0x7f) << shift
+                if b < 0x80:
+                    return result, pos
+                shift += 7
+        except IndexError:
+            raise RecordError("truncated signature record") from None
+
+    def take(self, pos, n):
+        end = pos + n
+        if end > len(self.data):
+            raise RecordError("truncated signature record")
+        return self.data[pos:end], end
+
+    def string(self, index) -> str:
+        s = self.strings[index]
+        if s is None:
+            start = self.strings_start
+            offsets = self.string_offsets
+            s = str(self.data[start + offsets[index]:start + offsets[index + 1]],
+                    'utf-8', 'surrogateescape')
+            self.strings[index] = s
+        return s
+
+    def load_deps(self, indices) -> None:
+        """Decode the dependencies in *indices* not yet decoded."""
+        loaded = self.dep_loaded
+        start = self.deps_start
+        for index in indices:
+            if not loaded[index]:
+                pos = start + self.dep_offsets[index]
+                name, pos = self.varint(pos)
+                self.dep_names[index] = self.string(name)
+                self.dep_sigs[index] = self.nodeinfo(pos)[0]
+                loaded[index] = 1
+
+    def nodeinfo(self, pos):
+        flags, pos = self.byte(pos)
+        if flags & NI_DIR:
+            return SCons.Node.FS.DirNodeInfo(), pos
+        ni = SCons.Node.FS.FileNodeInfo()
+        if flags & NI_CSIG:
+            raw, pos = self.take(pos, self.width)
+            ni.csig = raw.hex()
+        if flags & NI_TIMESTAMP:
+            raw, pos = self.take(pos, 8)
+            if flags & NI_FLOAT_TIMESTAMP:
+                ni.timestamp = _float64.unpack(raw)[0]
+            else:
+                ni.timestamp = _int64.unpack(raw)[0]
+        if flags & NI_SIZE:
+            ni.size, pos = self.varint(pos)
+        return ni, pos
+
+    def index_list(self, pos):
+        """Decode a list of dependencies, returning their names and
+        node information."""
+        form, pos = self.byte(pos)
+        count, pos = self.varint(pos)
+        if form == LIST_RUNS:
+            nruns, pos = self.varint(pos)
+            names = []
+            sigs = []
+            for _ in range(nruns):
+                start, pos = self.varint(pos)
+                length, pos = self.varint(pos)
+                end = start + length
+                if end > len(self.dep_sigs):
+                    raise RecordError("bad index in signature record")
+                if 0 in self.dep_loaded[start:end]:
+                    self.load_deps(range(start, end))
+                names += self.dep_names[start:end]
+                sigs += self.dep_sigs[start:end]
+            if len(names) != count:
+                raise RecordError("bad dependency list in signature record")
+            return names, sigs, pos
+        if form == LIST_BITMAP:
+            base, pos = self.varint(pos)
+            nbytes, pos = self.varint(pos)
+            bitmap, pos = self.take(pos, nbytes)
+            bits = _BITS
+            indices = [base + (i << 3) + bit
+                       for i, b in enumerate(bitmap) if b for bit in bits[b]]
+        elif form == LIST_ARRAY:
+            width, pos = self.byte(pos)
+            try:
+                fmt = '<%d%s' % (count, _INDEX_FORMATS[width])
+            except KeyError:
+                raise RecordError("bad index width in signature record") from None
+            raw, pos = self.take(pos, count * width)
+            indices = struct.unpack(fmt, raw)
+        else:
+            raise RecordError("unknown dependency list form %d" % form)
+        if len(indices) != count:
+            raise RecordError("bad dependency list in signature record")
+        try:
+            names = list(map(self.dep_names.__getitem__, indices))
+            if None in names:
+                self.load_deps(indices)
+                names = list(map(self.dep_names.__getitem__, indices))
+            sigs = list(map(self.dep_sigs.__getitem__, indices))
+        except IndexError:
+            raise RecordError("bad index in signature record") from None
+        return names, sigs, pos
+
+    def entry(self, index):
+        """Decode the entry at *index* in the entry table."""
+        try:
+            return self._entry(index)
+        except IndexError:
+            raise RecordError("bad index in signature record") from None
+
+    def _entry(self, index):
+        start = self.entries_start
+        pos = start + self.entry_offsets[index]
+        end = start + self.entry_offsets[index + 1]
+        if end > len(self.data):
+            raise RecordError("truncated signature record")
+        kind, pos = self.byte(pos)
+        if kind == ENTRY_PICKLE:
+            try:
+                return pickle.loads(self.data[pos:end])
+            except Exception as e:
+                raise RecordError("bad pickled entry: %s" % e) from None
+        if kind != ENTRY_COMPACT:
+            raise RecordError("unknown entry kind %d" % kind)
+        entry = self.entry_class()
+        entry.ninfo, pos = self.nodeinfo(pos)
+        binfo = SCons.Node.FS.FileBuildInfo()
+        flags, pos = self.byte(pos)
+        if flags & BI_BACTSIG:
+            raw, pos = self.take(pos, self.width)
+            _set_slot['bactsig'](binfo, raw.hex())
+        if flags & BI_BACT:
+            bact, pos = self.varint(pos)
+            _set_slot['bact'](binfo, self.string(bact))
+        for flag, nattr, sattr in _LISTS:
+            if flags & flag:
+                names, sigs, pos = self.index_list(pos)
+                _set_slot[nattr](binfo, names)
+                _set_slot[sattr](binfo, sigs)
+        if pos != end:
+            raise RecordError("bad entry length in signature record")
+        entry.binfo = binfo
+        return entry
+
+
+class Entries(MutableMapping):
+    """The entries of a record, by name, decoded as they are looked up.
+
+    Entries may be set and deleted as in a dictionary.  If :attr:`convert`
+    is set, it is called with the name and entry of each entry decoded.
+    An entry which cannot be decoded is dropped, after :attr:`error`, if
+    set, is called with its name and the :exc:`RecordError`: looking it
+    up raises :exc:`KeyError`, and iterating over the items skips it.
+    Pickling the mapping pickles a dictionary of its entries.
+    """
+
+    convert = None
+    error = None
+
+    def __init__(self, record, positions) -> None:
+        self._record = record
+        # Entry name -> index in the record's entry table, replaced
+        # by the entry when it is decoded.
+        self._entries = positions
+
+    def __getitem__(self, name):
+        entry = self._entries[name]
+        if type(entry) is int:
+            try:
+                entry = self._record.entry(entry)
+            except RecordError as e:
+                del self._entries[name]
+                if self.error is not None:
+                    self.error(name, e)
+                raise KeyError(name) from None
+            if self.convert is not None:
+                self.convert(name, entry)
+            self._entries[name] = entry
+        return entry
+
+    def __setitem__(self, name, entry) -> None:
+        self._entries[name] = entry
+
+    def __delitem__(self, name) -> None:
+        del self._entries[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return '<%s of %d>' % (self.__class__.__name__, len(self))
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+    def items(self):
+        for name in list(self._entries):
+            try:
+                yield name, self[name]
+            except KeyError:
+                pass
+
+    def values(self):
+        for _, entry in self.items():
+            yield entry
+
+    def decoded(self) -> int:
+        """Return the number of entries decoded so far."""
+        return sum(type(entry) is not int for entry in self._entries.values())
+
+    def decode_all(self) -> None:
+        """Decode every entry and let go of the record's buffer."""
+        if self._record is not None:
+            for _ in self.items():
+                pass
+            self._record = None
+
+
+def decode(data, entry_class) -> Entries:
+    """Read a record written by :func:`encode` from the buffer *data*,
+    returning a mapping which makes compactly encoded entries of
+    *entry_class* as they are looked up.
+
+    Raises :exc:`RecordError` if *data* is not a record, or is too short
+    for the tables at its start; an entry which cannot be decoded raises
+    it when it is looked up.
+    """
+    record = _Record(data, entry_class)
+    try:
+        positions = {record.string(name): i
+                     for i, name in enumerate(record.entry_names)}
+    except IndexError:
+        raise RecordError("bad index in signature record") from None
+    return Entries(record, positions)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
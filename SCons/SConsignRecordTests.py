@@ -0,0 +1,233 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import mmap
+import pickle
+import unittest
+
+import TestCmd
+
+import SCons.Node.FS
+import SCons.SConsignRecord
+from SCons.compat import PICKLE_PROTOCOL
+from SCons.SConsign import SConsignEntry
+from SCons.SConsignRecord import is_encoded, RecordError
+
+
+def encode(entries):
+    return SCons.SConsignRecord.encode(entries, SConsignEntry)
+
+
+def decode(data):
+    return SCons.SConsignRecord.decode(data, SConsignEntry)
+
+
+def file_ninfo(csig='d41d8cd98f00b204e9800998ecf8427e', timestamp=1700000000, size=0):
+    ni = SCons.Node.FS.FileNodeInfo()
+    if csig is not None:
+        ni.csig = csig
+    if timestamp is not None:
+        ni.timestamp = timestamp
+    if size is not None:
+        ni.size = size
+    return ni
+
+
+def file_entry(n):
+    entry = SConsignEntry()
+    entry.ninfo = file_ninfo('%032x' % n, 1700000000 + n, n)
+    binfo = SCons.Node.FS.FileBuildInfo()
+    binfo.bsources = ['src/f%d.c' % n]
+    binfo.bsourcesigs = [file_ninfo('%032x' % (n + 1000))]
+    binfo.bdepends = []
+    binfo.bdependsigs = []
+    binfo.bimplicit = ['include/common.h', 'include/f%d.h' % n, 'include']
+    binfo.bimplicitsigs = [file_ninfo(), file_ninfo(timestamp=1.5),
+                           SCons.Node.FS.DirNodeInfo()]
+    binfo.bactsig = '%032x' % 12345
+    binfo.bact = 'cc -o $TARGET -c $SOURCES'
+    entry.binfo = binfo
+    return entry
+
+
+def state(obj):
+    """Return a comparable form of an entry."""
+    if isinstance(obj, list):
+        return [state(o) for o in obj]
+    if hasattr(obj, '__getstate__') and not isinstance(obj, (str, int, float)):
+        st = obj.__getstate__()
+        if st is None:
+            return type(obj)
+        return (type(obj), {k: state(v) for k, v in st.items()})
+    return obj
+
+
+class SConsignRecordTestCase(unittest.TestCase):
+
+    def test_round_trip(self) -> None:
+        """Test encoding and decoding entries"""
+        entries = {'f%d.o' % n: file_entry(n) for n in range(20)}
+        data = encode(entries)
+        assert is_encoded(data)
+        assert not is_encoded(pickle.dumps(entries, PICKLE_PROTOCOL))
+        decoded = decode(data)
+        assert list(decoded) == list(entries), list(decoded)
+        for name, entry in entries.items():
+            assert state(decoded[name]) == state(entry), name
+        ni = decoded['f3.o'].binfo.bimplicitsigs[1]
+        assert ni.timestamp == 1.5 and type(ni.timestamp) is float, ni.timestamp
+        assert type(decoded['f3.o'].ninfo.timestamp) is int
+
+    def test_size(self) -> None:
+        """Test that the encoding is much smaller than a pickle"""
+        # As in a build, the object files in a directory share the
+        # node information of the headers they include, and list
+        # them in the same order.
+        headers = [('include/h%d.h' % n, file_ninfo('%032x' % n, n, n))
+                   for n in range(400)]
+        entries = {}
+        for n in range(300):
+            entry = file_entry(n)
+            used = headers[n % 200:n % 200 + 200]
+            entry.binfo.bimplicit = [h for h, _ in used]
+            entry.binfo.bimplicitsigs = [ni for _, ni in used]
+            entries['f%d.o' % n] = entry
+        pickled = pickle.dumps(entries, PICKLE_PROTOCOL)
+        data = encode(entries)
+        assert len(data) * 10 < len(pickled), (len(data), len(pickled))
+        decoded = decode(data)
+        sigs = decoded['f1.o'].binfo.bimplicitsigs
+        assert sigs[1] is decoded['f2.o'].binfo.bimplicitsigs[0]
+        assert state(decoded['f1.o']) == state(entries['f1.o'])
+
+    def test_lists(self) -> None:
+        """Test each form of dependency list"""
+        headers = [('h%d.h' % n, file_ninfo('%032x' % n, n, n))
+                   for n in range(300)]
+        orders = {
+            'runs': list(range(100)) + list(range(200, 250)),
+            'bitmap': list(range(0, 300, 3)),
+            'array': [5, 3, 290, 1, 0],
+            'one': [7],
+        }
+        entries = {}
+        for name, order in orders.items():
+            entry = file_entry(0)
+            entry.binfo.bimplicit = [headers[i][0] for i in order]
+            entry.binfo.bimplicitsigs = [headers[i][1] for i in order]
+            entries[name] = entry
+        # Make the dependency table hold the headers in order.
+        first = file_entry(1)
+        first.binfo.bsources = [h for h, _ in headers]
+        first.binfo.bsourcesigs = [ni for _, ni in headers]
+        decoded = decode(encode(dict(first=first, **entries)))
+        for name, entry in entries.items():
+            assert state(decoded[name]) == state(entry), name
+
+    def test_lazy(self) -> None:
+        """Test that only the entries looked up are decoded"""
+        entries = {'f%d.o' % n: file_entry(n) for n in range(20)}
+        decoded = decode(encode(entries))
+        assert decoded.decoded() == 0
+        assert len(decoded) == 20 and 'f3.o' in decoded
+        assert decoded.decoded() == 0
+        converted = []
+        decoded.convert = lambda name, entry: converted.append(name)
+        entry = decoded['f3.o']
+        assert decoded['f3.o'] is entry
+        assert decoded.decoded() == 1 and converted == ['f3.o'], converted
+        assert state(entry) == state(entries['f3.o'])
+        del decoded['f4.o']
+        decoded['new'] = entries['f4.o']
+        assert sorted(decoded) == sorted(['new'] + [k for k in entries if k != 'f4.o'])
+        copied = pickle.loads(pickle.dumps(decoded, PICKLE_PROTOCOL))
+        assert type(copied) is dict and len(copied) == 20, copied
+        assert decoded.decoded() == 20
+        assert state(copied['f5.o']) == state(entries['f5.o'])
+
+    def test_missing_fields(self) -> None:
+        """Test entries with fields left unset"""
+        entry = SConsignEntry()
+        entry.ninfo = file_ninfo(csig=None, timestamp=None)
+        entry.binfo = SCons.Node.FS.FileBuildInfo()
+        decoded = decode(encode({'x': entry}))['x']
+        assert state(decoded) == state(entry), state(decoded)
+        assert not hasattr(decoded.ninfo, 'csig')
+        assert not hasattr(decoded.binfo, 'bact')
+        assert decoded.binfo.bactsig is None
+
+    def test_fallback(self) -> None:
+        """Test entries the compact encoding cannot hold"""
+        odd = file_entry(1)
+        odd.binfo.bactsig = 'not a hash'
+        other_width = file_entry(2)
+        other_width.ninfo.csig = 'ab' * 32
+        value = file_entry(3)
+        value.binfo.bdepends = ['v']
+        value.binfo.bdependsigs = [SCons.Node.NodeInfoBase()]
+        entries = {'good': file_entry(0), 'odd': odd,
+                   'other_width': other_width, 'value': value}
+        decoded = decode(encode(entries))
+        for name, entry in entries.items():
+            assert state(decoded[name]) == state(entry), name
+
+    def test_buffer(self) -> None:
+        """Test decoding from a memory-mapped file"""
+        test = TestCmd.TestCmd(workdir='')
+        data = encode({'f.o': file_entry(7)})
+        test.write('record', data)
+        with open(test.workpath('record'), 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                decoded = decode(m)
+                decoded.decode_all()
+        assert decoded['f.o'].binfo.bsources == ['src/f7.c']
+
+    def test_errors(self) -> None:
+        """Test decoding damaged records"""
+        data = encode({'f.o': file_entry(7), 'g.o': file_entry(8)})
+        with self.assertRaises(RecordError):
+            decode(b'not a record')
+        with self.assertRaises(RecordError):
+            decode(data[:-3])
+        with self.assertRaises(RecordError):
+            decode(data[:len(SCons.SConsignRecord.MAGIC)])
+        # A damaged entry is dropped when it is looked up.
+        damaged = bytearray(data)
+        damaged[-1] = 0xff
+        decoded = decode(bytes(damaged))
+        errors = []
+        decoded.error = lambda name, e: errors.append(name)
+        assert decoded['f.o'].binfo.bsources == ['src/f7.c']
+        with self.assertRaises(KeyError):
+            decoded['g.o']
+        assert errors == ['g.o'] and list(decoded) == ['f.o'], errors
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -22,18 +22,29 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import os
+import pickle
 import unittest
 
 import TestCmd
 
+import SCons.dbindex
 import SCons.dblite
+import SCons.dblog
+import SCons.Errors
+import SCons.Node.FS
 import SCons.SConsign
+import SCons.SConsignRecord
+import SCons.Warnings
 from SCons.Util import get_hash_format, get_current_hash_algorithm_used
 
 class BuildInfo:
     def merge(self, object) -> None:
         pass
 
+class DummyNodeInfo:
+    def merge(self, other) -> None:
+        self.merged = other
+
 class DummySConsignEntry:
     def __init__(self, name) -> None:
         self.name = name
@@ -54,10 +65,13 @@ class DummyNode:
         self.tpath = path
         self.fs = FS(self)
         self.binfo = binfo
+        self.ninfo = None
     def get_stored_info(self):
         return self.binfo
     def get_binfo(self):
         return self.binfo
+    def get_ninfo(self):
+        return self.ninfo
     def get_internal_path(self):
         return self.path
     def get_tpath(self):
@@ -260,6 +274,56 @@ class SConsignDBTestCase(SConsignTestCase):
 
             SCons.SConsign.DataBase = save_DataBase
 
+    def test_binary_records(self) -> None:
+        """Test that entries of binary records are decoded when used"""
+        def entry(n):
+            e = SCons.SConsign.SConsignEntry()
+            e.ninfo = SCons.Node.FS.FileNodeInfo()
+            e.ninfo.csig = '%032x' % n
+            e.binfo = SCons.Node.FS.FileBuildInfo()
+            e.binfo.bsources = ['f%d.c' % n]
+            e.binfo.bsourcesigs = [SCons.Node.FS.FileNodeInfo()]
+            return e
+
+        class Fake_DBM(dict):
+            def open(self, name, mode):
+                return self
+
+        data = SCons.SConsignRecord.encode(
+            {'f%d.o' % n: entry(n) for n in range(3)},
+            SCons.SConsign.SConsignEntry)
+        damaged = bytearray(data)
+        damaged[-1] = 0xff
+        fake_dbm = Fake_DBM(dir1=data, dir2=bytes(damaged))
+        save = (SCons.SConsign.DataBase, SCons.SConsign.DB_Name,
+                SCons.SConsign.DB_Module)
+        save_warningOut = SCons.Warnings._warningOut
+        warnings = []
+        SCons.Warnings._warningOut = warnings.append
+        SCons.Warnings.enableWarningClass(SCons.Warnings.CorruptSConsignWarning)
+        SCons.SConsign.DataBase = {}
+        try:
+            SCons.SConsign.File(self.test.workpath('sconsign_file'), fake_dbm)
+            d1 = SCons.SConsign.DB(DummyNode('dir1'))
+            assert d1.entries.decoded() == 0
+            e = d1.get_entry('f1.o')
+            assert e.binfo.bsources == ['f1.c'], e.binfo.bsources
+            assert d1.entries.decoded() == 1
+
+            d2 = SCons.SConsign.DB(DummyNode('dir2'))
+            assert d2.get_entry('f0.o').ninfo.csig == '%032x' % 0
+            assert warnings == []
+            with self.assertRaises(KeyError):
+                d2.get_entry('f2.o')
+            assert len(warnings) == 1, warnings
+            assert 'f2.o' in str(warnings[0]), warnings[0]
+            assert sorted(d2.entries) == ['f0.o', 'f1.o'], list(d2.entries)
+        finally:
+            (SCons.SConsign.DataBase, SCons.SConsign.DB_Name,
+             SCons.SConsign.DB_Module) = save
+            SCons.Warnings._warningOut = save_warningOut
+            SCons.Warnings.suppressWarningClass(SCons.Warnings.CorruptSConsignWarning)
+
 class SConsignDirFileTestCase(SConsignTestCase):
 
     def test_SConsignDirFile(self) -> None:
@@ -340,6 +404,227 @@ class SConsignFileTestCase(SConsignTestCase):
         assert fake_dbm.name == file, fake_dbm.name
         assert fake_dbm.mode == "c", fake_dbm.mode
 
+        SCons.SConsign.File(file, 'dblog')
+        assert SCons.SConsign.DB_Module is SCons.dblog, SCons.SConsign.DB_Module
+        assert SCons.dblog.IGNORE_CORRUPT_DBFILES
+        SCons.SConsign.File(file, 'dbindex')
+        assert SCons.SConsign.DB_Module is SCons.dbindex, SCons.SConsign.DB_Module
+        assert SCons.dbindex.IGNORE_CORRUPT_DBFILES
+        SCons.SConsign.File(file, 'SCons.dblite')
+        assert SCons.SConsign.DB_Module is SCons.dblite, SCons.SConsign.DB_Module
+        with self.assertRaises(SCons.Errors.UserError):
+            SCons.SConsign.File(file, 'no_such_dbm_module')
+        assert SCons.SConsign.DB_Module is SCons.dblite, SCons.SConsign.DB_Module
+
+        SCons.SConsign.File(file, record_format='binary')
+        assert SCons.SConsign.DB_Record_Format == 'binary', SCons.SConsign.DB_Record_Format
+        with self.assertRaises(SCons.Errors.UserError):
+            SCons.SConsign.File(file, record_format='no_such_format')
+        assert SCons.SConsign.DB_Record_Format == 'binary', SCons.SConsign.DB_Record_Format
+        SCons.SConsign.DB_Record_Format = 'pickle'
+
+        SCons.SConsign.File(file, shard='dir')
+        assert SCons.SConsign.DB_Shard == 'dir', SCons.SConsign.DB_Shard
+        SCons.SConsign.File(file, shard=16)
+        assert SCons.SConsign.DB_Shard == 'hash16', SCons.SConsign.DB_Shard
+        with self.assertRaises(SCons.Errors.UserError):
+            SCons.SConsign.File(file, shard='no_such_scheme')
+        SCons.SConsign.File(file, shard=False)
+        assert SCons.SConsign.DB_Shard is None, SCons.SConsign.DB_Shard
+
+
+class CheckpointTestCase(SConsignTestCase):
+
+    class Fake_DBM:
+        def __init__(self) -> None:
+            self.items = {}
+            self.sync_count = 0
+            self.fail = False
+        def __getitem__(self, key):
+            raise KeyError(key)
+        def __setitem__(self, key, value) -> None:
+            if self.fail:
+                raise OSError("disk full")
+            self.items[key] = value
+        def open(self, name, mode):
+            return self
+        def sync(self) -> None:
+            self.sync_count = self.sync_count + 1
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.save = (SCons.SConsign.ForDirectory, SCons.SConsign.DB_Name,
+                     SCons.SConsign.DB_Module)
+        self.fake_dbm = self.Fake_DBM()
+        SCons.SConsign.DataBase = {}
+        SCons.SConsign.File(self.test.workpath('sconsign_file'), self.fake_dbm)
+
+    def tearDown(self) -> None:
+        (SCons.SConsign.ForDirectory, SCons.SConsign.DB_Name,
+         SCons.SConsign.DB_Module) = self.save
+        SCons.SConsign.DataBase = {}
+        super().tearDown()
+
+    def test_parse_checkpoint(self) -> None:
+        """Test parsing checkpoint intervals"""
+        parse = SCons.SConsign.parse_checkpoint
+        assert parse('10') == (10, None), parse('10')
+        assert parse(3) == (3, None), parse(3)
+        assert parse('30s') == (None, 30.0), parse('30s')
+        assert parse('0.5s') == (None, 0.5), parse('0.5s')
+        assert parse('2m') == (None, 120.0), parse('2m')
+        for bad in ('0', '0s', '1.5', '-1', 's', '10x', '', 'ten'):
+            with self.assertRaises(ValueError, msg=bad):
+                parse(bad)
+
+    def test_tasks(self) -> None:
+        """Test checkpointing every so many tasks"""
+        d = SCons.SConsign.DB(DummyNode('dir1'))
+        aaa = DummySConsignEntry('aaa')
+        d.set_entry('aaa', aaa)
+
+        c = SCons.SConsign.Checkpointer(tasks=2)
+        c.task_done()
+        assert c.checkpoints == 0, c.checkpoints
+        c.task_done()
+        assert c.checkpoints == 1, c.checkpoints
+        # The directory is still written at the end of the build.
+        assert not d.changed
+        assert d.dirty
+        # A copy of the entry is converted, on the thread.
+        assert not hasattr(aaa, 'c_to_s')
+        # Nothing changed, so there is nothing to store.
+        c.task_done()
+        c.task_done()
+        assert c.checkpoints == 1, c.checkpoints
+        c.close()
+        assert list(self.fake_dbm.items) == ['dir1'], self.fake_dbm.items
+        assert self.fake_dbm.sync_count == 1, self.fake_dbm.sync_count
+
+        # Only the changed directories are stored by a checkpoint.
+        e = SCons.SConsign.DB(DummyNode('dir2'))
+        e.set_entry('bbb', DummySConsignEntry('bbb'))
+        self.fake_dbm.items = {}
+        c.task_done()
+        c.task_done()
+        c.close()
+        assert list(self.fake_dbm.items) == ['dir2'], self.fake_dbm.items
+        assert self.fake_dbm.sync_count == 2, self.fake_dbm.sync_count
+
+    def test_copies(self) -> None:
+        """Test that checkpoints leave the live entries alone"""
+        d = SCons.SConsign.DB(DummyNode('dir1'))
+        aaa = DummySConsignEntry('aaa')
+        aaa.ninfo = DummyNodeInfo()
+        node = DummyNode('dir1/aaa', binfo=aaa)
+        node.ninfo = 'new ninfo'
+        d.store_info('aaa', node)
+        c = SCons.SConsign.Checkpointer(tasks=1)
+        c.task_done()
+        c.close()
+        assert c.error is None, c.error
+        assert d.to_be_merged == {'aaa': node}, d.to_be_merged
+        assert d.entries == {}, d.entries
+        assert not hasattr(aaa, 'c_to_s')
+        assert not hasattr(aaa.ninfo, 'merged')
+        stored = pickle.loads(self.fake_dbm.items['dir1'])['aaa']
+        assert stored.c_to_s
+        assert stored.ninfo.merged == 'new ninfo', stored.ninfo.merged
+
+    def test_seconds(self) -> None:
+        """Test checkpointing every so many seconds"""
+        now = [100.0]
+        c = SCons.SConsign.Checkpointer(seconds=5, clock=lambda: now[0])
+        d = SCons.SConsign.DB(DummyNode('dir1'))
+        d.set_entry('aaa', DummySConsignEntry('aaa'))
+        now[0] = 104.0
+        c.task_done()
+        assert c.checkpoints == 0, c.checkpoints
+        now[0] = 105.0
+        c.task_done()
+        assert c.checkpoints == 1, c.checkpoints
+        d.set_entry('bbb', DummySConsignEntry('bbb'))
+        now[0] = 109.0
+        c.task_done()
+        assert c.checkpoints == 1, c.checkpoints
+        now[0] = 110.0
+        c.task_done()
+        assert c.checkpoints == 2, c.checkpoints
+        c.close()
+        assert list(self.fake_dbm.items) == ['dir1'], self.fake_dbm.items
+
+    def test_failure(self) -> None:
+        """Test that directories are written again if a checkpoint fails"""
+        self.fake_dbm.fail = True
+        d = SCons.SConsign.DB(DummyNode('dir1'))
+        d.set_entry('aaa', DummySConsignEntry('aaa'))
+        c = SCons.SConsign.Checkpointer(tasks=1)
+        c.task_done()
+        assert not d.changed
+        c.close()
+        assert d.dirty
+        assert c.error is None, c.error
+
+        self.fake_dbm.fail = False
+        SCons.SConsign.write()
+        assert list(self.fake_dbm.items) == ['dir1'], self.fake_dbm.items
+
+
+class PruneTestCase(SConsignTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.save = (SCons.SConsign.ForDirectory, SCons.SConsign.DB_Name,
+                     SCons.SConsign.DB_Module, SCons.Node.FS.default_fs)
+        SCons.SConsign.DataBase = {}
+
+    def tearDown(self) -> None:
+        (SCons.SConsign.ForDirectory, SCons.SConsign.DB_Name,
+         SCons.SConsign.DB_Module, SCons.Node.FS.default_fs) = self.save
+        SCons.SConsign.DataBase = {}
+        super().tearDown()
+
+    def test_Prune(self) -> None:
+        """Test removing stale entries from the database"""
+        test = self.test
+        test.subdir('sub')
+        for name in ('a.in', 'b.in', 'd.in', ['sub', 's.in']):
+            test.write(name, "x\n")
+        fs = SCons.Node.FS.FS(test.workpath(''))
+        SCons.Node.FS.default_fs = fs
+        SCons.SConsign.File(test.workpath('sconsign_file'), SCons.dblite)
+
+        def entries(*names):
+            return {n: DummySConsignEntry(n) for n in names}
+
+        db, mode = SCons.SConsign.Get_DataBase(fs.Top)
+        db['gone'] = pickle.dumps(entries('x'))
+        db['sub'] = pickle.dumps(entries('s.in', 'old.in'))
+        db['empty'] = pickle.dumps({})
+        test.subdir('empty')
+
+        top = fs.Top.sconsign()
+        for name in ('a.in', 'b.in', 'c.in'):
+            fs.File(name)
+        for name, entry in entries('a.in', 'b.in', 'c.in', 'd.in').items():
+            top.set_entry(name, entry)
+
+        removed = SCons.SConsign.Prune()
+        assert removed[:2] == (4, 2), removed
+        assert isinstance(removed[2], int), removed
+        assert sorted(top.entries) == ['a.in', 'b.in'], sorted(top.entries)
+
+        SCons.SConsign.write()
+        db = SCons.dblite.open(test.workpath('sconsign_file'))
+        assert sorted(db.keys()) == ['.', 'sub'], sorted(db.keys())
+        assert sorted(pickle.loads(db['.'])) == ['a.in', 'b.in']
+        assert sorted(pickle.loads(db['sub'])) == ['s.in']
+
+    def test_Prune_DirFile(self) -> None:
+        """Test that Prune does nothing without a database"""
+        SCons.SConsign.File(None)
+        assert SCons.SConsign.Prune() is None
+
 
 class writeTestCase(SConsignTestCase):
 
@@ -50,7 +50,13 @@ import SCons.Debug
 import SCons.Defaults
 import SCons.Environment
 import SCons.Errors
+import SCons.HashCache
+import SCons.Taskmaster.Adaptive
+import SCons.Taskmaster.History
+import SCons.Taskmaster.Memory
+import SCons.Taskmaster.Prepass
 import SCons.Taskmaster.Job
+import SCons.Taskmaster.Jobserver
 import SCons.Node
 import SCons.Node.FS
 import SCons.Platform
@@ -62,7 +68,7 @@ import SCons.Util
 import SCons.Warnings
 import SCons.Script.Interactive
 from .SConsOptions import SConsOption
-from SCons.Util.stats import count_stats, memory_stats, time_stats, ENABLE_JSON, write_scons_stats_file, JSON_OUTPUT_FILE
+from SCons.Util.stats import count_stats, memory_stats, time_stats, trace_events, ENABLE_JSON, write_scons_stats_file, JSON_OUTPUT_FILE
 
 from SCons import __version__ as SConsVersion
 
@@ -126,10 +132,26 @@ display = SCons.Util.display
 progress_display = SCons.Util.DisplayEngine()
 
 
+def format_eta(seconds) -> str:
+    """Format *seconds* left as ``H:MM:SS``, or ``?`` if unknown."""
+    if seconds is None:
+        return '?'
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%d:%02d:%02d' % (hours, minutes, seconds)
+
+
 class Progressor:
     prev = ''
     count = 0
     target_string = '$TARGET'
+    percent_string = '$PERCENT'
+    eta_string = '$ETA'
+    count_string = '$COUNT'
+    total_string = '$TOTAL'
+    # The SCons.Taskmaster.History.Estimate for the build, set before
+    # building if the progress string wants it.
+    estimate = None
 
     def __init__(self, obj, interval: int=1, file=None, overwrite: bool=False) -> None:
         if file is None:
@@ -140,14 +162,20 @@ class Progressor:
         self.interval = interval
         self.overwrite = overwrite
 
+        self.wants_estimate = False
         if callable(obj):
             self.func = obj
         elif SCons.Util.is_List(obj):
             self.func = self.spinner
-        elif obj.find(self.target_string) != -1:
-            self.func = self.replace_string
         else:
-            self.func = self.string
+            self.wants_estimate = any(
+                obj.find(s) != -1
+                for s in (self.percent_string, self.eta_string,
+                          self.count_string, self.total_string))
+            if self.wants_estimate or obj.find(self.target_string) != -1:
+                self.func = self.replace_string
+            else:
+                self.func = self.string
 
     def write(self, s) -> None:
         self.file.write(s)
@@ -169,7 +197,20 @@ class Progressor:
         self.write(self.obj)
 
     def replace_string(self, node) -> None:
-        self.write(self.obj.replace(self.target_string, str(node)))
+        s = self.obj.replace(self.target_string, str(node))
+        if self.wants_estimate:
+            estimate = self.estimate
+            if estimate is None:
+                percent, eta = '?', None
+                count = total = '?'
+            else:
+                percent, eta = '%3d%%' % (100 * estimate.fraction()), estimate.eta()
+                count, total = str(estimate.done_count), str(estimate.count)
+            s = s.replace(self.percent_string, percent)
+            s = s.replace(self.eta_string, format_eta(eta))
+            s = s.replace(self.count_string, count)
+            s = s.replace(self.total_string, total)
+        self.write(s)
 
     def __call__(self, node) -> None:
         self.count = self.count + 1
@@ -198,6 +239,12 @@ def GetBuildFailures():
 class BuildTask(SCons.Taskmaster.OutOfDateTask):
     """An SCons build task."""
     progress = ProgressObject
+    # When the tasks are timed: a list collecting the (name, seconds)
+    # taken by each executed task, and an optional Estimate to update.
+    durations = None
+    estimate = None
+    # A SCons.SConsign.Checkpointer told of each finished task, if any.
+    checkpointer = None
 
     def display(self, message) -> None:
         display('scons: ' + message)
@@ -259,6 +306,13 @@ class BuildTask(SCons.Taskmaster.OutOfDateTask):
             this_build_status = status
 
     def executed(self):
+        if self.durations is not None:
+            if self.execute_time is not None:
+                self.durations.append((str(self.node), self.execute_time))
+                if self.estimate is not None:
+                    self.estimate.done(str(self.targets[0]))
+            elif self.estimate is not None:
+                self.estimate.skip(str(self.targets[0]))
         t = self.targets[0]
         if self.top and not t.has_builder() and not t.side_effect:
             if not t.exists():
@@ -282,6 +336,8 @@ class BuildTask(SCons.Taskmaster.OutOfDateTask):
                 SCons.Taskmaster.OutOfDateTask.executed(self)
         else:
             SCons.Taskmaster.OutOfDateTask.executed(self)
+        if self.checkpointer is not None:
+            self.checkpointer.task_done()
 
     def failed(self) -> None:
         # Handle the failure of a build task.  The primary purpose here
@@ -1038,6 +1094,8 @@ def _main(parser):
     fs.set_SConstruct_dir(d)
 
     _set_debug_values(options)
+    if options.trace_events_file:
+        trace_events.enable(os.path.abspath(options.trace_events_file))
     SCons.Node.implicit_cache = options.implicit_cache
     SCons.Node.implicit_deps_changed = options.implicit_deps_changed
     SCons.Node.implicit_deps_unchanged = options.implicit_deps_unchanged
@@ -1210,6 +1268,9 @@ def _main(parser):
     SCons.Util.set_hash_format(options.hash_format)
     if options.md5_chunksize:
         SCons.Node.FS.File.hash_chunksize = options.md5_chunksize * 1024
+    if options.hash_cache:
+        SCons.Node.FS.File.hash_cache = SCons.HashCache.HashCache(
+            os.path.abspath(os.path.expanduser(options.hash_cache)))
 
     platform = SCons.Platform.platform_module()
 
@@ -1226,6 +1287,37 @@ def _main(parser):
             print('Found nothing to build')
             exit_status = 2
 
+def _setup_jobserver(options, num_jobs):
+    """Find or create the GNU make jobserver for this build.
+
+    Returns a tuple of the client through which job slots are taken
+    from a jobserver passed down in ``MAKEFLAGS``, or from the one
+    created for ``--jobserver`` if there is none, and that created
+    server.  Either may be ``None``.  With ``--jobserver``, the
+    jobserver is also passed on to the commands run by actions.
+    A server created for ``-j auto`` holds one job slot per CPU
+    rather than the job limit of twice that.
+    """
+    client = SCons.Taskmaster.Jobserver.Client.from_makeflags(
+        os.environ.get('MAKEFLAGS', ''))
+    server = None
+    if options.jobserver and client is None and num_jobs > 1:
+        try:
+            if options.jobs_auto:
+                slots = SCons.Taskmaster.Adaptive.cpu_count()
+            else:
+                slots = num_jobs
+            server = SCons.Taskmaster.Jobserver.Server(slots)
+        except (OSError, AttributeError) as e:
+            msg = "unable to create a jobserver: %s" % e
+            SCons.Warnings.warn(SCons.Warnings.NoParallelSupportWarning, msg)
+        else:
+            client = server.client()
+    if options.jobserver and client is not None:
+        SCons.Action.jobserver_makeflags = client.makeflags
+    return client, server
+
+
 def _build_targets(fs, options, targets, target_top):
 
     global this_build_status
@@ -1360,7 +1452,34 @@ def _build_targets(fs, options, targets, target_top):
             """Leave the order of dependencies alone."""
             return dependencies
 
-    taskmaster = SCons.Taskmaster.Taskmaster(nodes, task_class, order, options.taskmastertrace_file)
+    critical_path = None
+    duration_history = None
+    BuildTask.durations = None
+    BuildTask.estimate = None
+    wants_estimate = getattr(ProgressObject, 'wants_estimate', False)
+    if task_class is BuildTask and (options.critical_path or wants_estimate
+                                    or options.debug_slowest):
+        duration_history = SCons.Taskmaster.History.DurationHistory(
+            SCons.Taskmaster.History.history_filename(fs.Top))
+        BuildTask.durations = []
+        if options.critical_path:
+            critical_path = SCons.Taskmaster.History.CriticalPath(duration_history)
+        if wants_estimate:
+            BuildTask.estimate = SCons.Taskmaster.History.Estimate(
+                duration_history, nodes)
+            ProgressObject.estimate = BuildTask.estimate
+
+    BuildTask.checkpointer = None
+    if (task_class is BuildTask and options.sconsign_checkpoint is not None
+            and not options.no_exec):
+        BuildTask.checkpointer = SCons.SConsign.Checkpointer(
+            *options.sconsign_checkpoint)
+
+    taskmaster = SCons.Taskmaster.Taskmaster(nodes, task_class, order,
+                                             options.taskmastertrace_file,
+                                             critical_path,
+                                             duration_history is not None,
+                                             fs.pool_sizes)
 
     # Let the BuildTask objects get at the options to respond to the
     # various print_* settings, tree_printer list, etc.
@@ -1373,7 +1492,28 @@ def _build_targets(fs, options, targets, target_top):
     # to check if python configured with threads.
     global num_jobs
     num_jobs = options.num_jobs
-    jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster)
+    admission = []
+    adaptive = None
+    if options.jobs_auto and num_jobs > 1:
+        adaptive = SCons.Taskmaster.Adaptive.AdaptiveController(num_jobs)
+        admission.append(adaptive)
+    jobserver_client, jobserver = _setup_jobserver(options, num_jobs)
+    if jobserver_client is not None and num_jobs > 1:
+        admission.append(jobserver_client)
+    memory_admission = None
+    if (options.min_free_memory is not None
+            or options.max_memory_pressure is not None) and num_jobs > 1:
+        memory_history = SCons.Taskmaster.Memory.MemoryHistory(
+            SCons.Taskmaster.History.history_filename(
+                fs.Top, SCons.Taskmaster.Memory.MEMORY_SUFFIX))
+        memory_admission = SCons.Taskmaster.Memory.AdmissionController(
+            options.min_free_memory, options.max_memory_pressure,
+            memory_history)
+        # Consulted last, so a task counts as running, and its memory
+        # estimate is reserved, only once every controller admitted it.
+        admission.append(memory_admission)
+        SCons.Taskmaster.Memory.set_wait_hook(True)
+    jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster, admission)
     if num_jobs > 1:
         msg = None
         if jobs.num_jobs == 1 or not python_has_threads:
@@ -1403,13 +1543,69 @@ def _build_targets(fs, options, targets, target_top):
             progress_display("scons: " + failure_message)
         else:
             progress_display("scons: " + closing_message)
+        if BuildTask.checkpointer is not None:
+            BuildTask.checkpointer.close()
         if not options.no_exec:
             if jobs.were_interrupted():
                 progress_display("scons: writing .sconsign file.")
-            SCons.SConsign.write()
+            pruned = None
+            if options.sconsign_gc and not this_build_status:
+                # An unfinished build may not have found all the
+                # dependencies, so stale entries are only looked for
+                # after a successful one.
+                with trace_events.span('prune', 'sconsign'):
+                    pruned = SCons.SConsign.Prune()
+            with trace_events.span('write', 'sconsign'):
+                SCons.SConsign.write()
+            if pruned is not None and not options.silent:
+                sys.stdout.write("scons: sconsign gc: entries removed: %d, "
+                                 "directories removed: %d, bytes reclaimed: %d\n"
+                                 % pruned)
+            if critical_path is not None:
+                critical_path.update_history()
+            elif duration_history is not None:
+                for name, duration in BuildTask.durations:
+                    duration_history.record(name, duration)
+            if duration_history is not None:
+                duration_history.write()
+            if memory_admission is not None:
+                memory_admission.history.write()
+        if memory_admission is not None:
+            SCons.Taskmaster.Memory.set_wait_hook(False)
+        if jobserver_client is not None:
+            jobserver_client.close()
+        if SCons.Node.FS.File.hash_cache is not None:
+            SCons.Node.FS.File.hash_cache.close()
+        # So that the next build run by --interactive, or anything
+        # reading the cache after this one, finds the files.
+        SCons.CacheDir.flush()
 
     progress_display("scons: " + opening_message)
-    jobs.run(postfunc = jobs_postfunc)
+    with trace_events.span('preload', 'sconsign'):
+        SCons.SConsign.Preload(nodes)
+    if options.prepass and num_jobs > 1 and task_class is BuildTask:
+        with trace_events.span('prepass', 'prepass'):
+            SCons.Taskmaster.Prepass.prepass(nodes, num_jobs)
+    try:
+        jobs.run(postfunc = jobs_postfunc)
+    finally:
+        if jobserver is not None:
+            SCons.Action.jobserver_makeflags = None
+            jobserver.close()
+
+    if critical_path is not None and not options.silent:
+        critical_path.report(sys.stdout)
+
+    if options.debug_slowest:
+        slowest = sorted(BuildTask.durations, key=lambda d: d[1], reverse=True)
+        if slowest:
+            sys.stdout.write("Slowest targets:\n")
+            for name, duration in slowest[:options.debug_slowest]:
+                sys.stdout.write("    %f seconds: %s\n" % (duration, name))
+
+    if adaptive is not None:
+        for offset, limit in adaptive.changes:
+            time_stats.add_jobs_change(offset, limit)
 
     memory_stats.append('after building targets:')
     count_stats.append(('post-', 'build'))
@@ -1580,12 +1776,22 @@ def main() -> None:
         print("Total SConscript file execution time: %f seconds"%sconscript_time)
         print("Total SCons execution time: %f seconds"%scons_time)
         print("Total command execution time: %f seconds"%ct)
+        for change in time_stats.jobs_changes:
+            print("Jobs allowed from %f seconds: %d" % (change['time'], change['jobs']))
         time_stats.total_times(total_time, sconscript_time, scons_time, ct)
 
 
     if ENABLE_JSON:
         write_scons_stats_file()
 
+    if trace_events.enabled:
+        try:
+            trace_events.write()
+        except OSError as e:
+            msg = "Unable to write trace events file %s: %s" % (
+                trace_events.filename, e.strerror)
+            SCons.Warnings.warn(SCons.Warnings.TraceWriteErrorWarning, msg)
+
     sys.exit(exit_status)
 
 # Local Variables:
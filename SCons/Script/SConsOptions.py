@@ -32,6 +32,9 @@ import textwrap
 
 import SCons.Node.FS
 import SCons.Platform.virtualenv
+import SCons.SConsign
+import SCons.Taskmaster.Adaptive
+import SCons.Util
 import SCons.Warnings
 from . import Main
 
@@ -44,6 +47,8 @@ diskcheck_all = SCons.Node.FS.diskcheck_types()
 
 experimental_features = {'warp_speed', 'transporter', 'ninja', 'legacy_sched'}
 
+jobs_backend_options = ['thread', 'process']
+
 
 def diskcheck_convert(value):
     if value is None:
@@ -125,21 +130,26 @@ class SConsValues(optparse.Values):
     # search for UPDATE_SETOPTION_DOCS there.
     settable = [
         'clean',
+        'critical_path',
         'diskcheck',
         'duplicate',
         'experimental',
+        'hash_cache',
         'hash_chunksize',
         'hash_format',
         'help',
         'implicit_cache',
         'implicit_deps_changed',
         'implicit_deps_unchanged',
+        'jobs_backend',
         'max_drift',
         'md5_chunksize',
         'no_exec',
         'no_progress',
         'num_jobs',
+        'prepass',
         'random',
+        'sconsign_checkpoint',
         'silent',
         'stack_size',
         'warn',
@@ -165,12 +175,21 @@ class SConsValues(optparse.Values):
 
         # the following are for options that need some extra processing
         if name == 'num_jobs':
-            try:
-                value = int(value)
-                if value < 1:
-                    raise ValueError
-            except ValueError:
-                raise SCons.Errors.UserError("A positive integer is required: %s" % repr(value))
+            if value == 'auto':
+                self.__SConscript_settings__['jobs_auto'] = True
+                value = SCons.Taskmaster.Adaptive.auto_jobs()
+            else:
+                try:
+                    value = int(value)
+                    if value < 1:
+                        raise ValueError
+                except ValueError:
+                    raise SCons.Errors.UserError("A positive integer is required: %s" % repr(value))
+                self.__SConscript_settings__['jobs_auto'] = False
+        elif name == 'jobs_backend':
+            if value not in jobs_backend_options:
+                raise SCons.Errors.UserError(
+                    "Not a valid jobs backend: %s" % repr(value))
         elif name == 'max_drift':
             try:
                 value = int(value)
@@ -207,6 +226,13 @@ class SConsValues(optparse.Values):
             except ValueError:
                 raise SCons.Errors.UserError(
                     "An integer is required: %s" % repr(value))
+        elif name == 'sconsign_checkpoint':
+            if value is not None:
+                try:
+                    value = SCons.SConsign.parse_checkpoint(value)
+                except ValueError:
+                    raise SCons.Errors.UserError(
+                        "Not a valid checkpoint interval: %s" % repr(value))
         elif name in ('md5_chunksize', 'hash_chunksize'):
             try:
                 value = int(value)
@@ -834,6 +860,11 @@ def Parser(version):
                   help=opt_config_help,
                   metavar="MODE")
 
+    op.add_option('--critical-path',
+                  dest="critical_path", default=False,
+                  action="store_true",
+                  help="Schedule ready targets by longest remaining path")
+
     op.add_option('-D',
                   dest="climb_up", default=None,
                   action="store_const", const=2,
@@ -851,15 +882,32 @@ def Parser(version):
 
     debug_options = ["count", "duplicate", "explain", "findlibs",
                      "includes", "memoizer", "memory", "objects",
-                     "pdb", "prepare", "presub", "stacktrace",
+                     "pdb", "prepare", "presub", "slowest", "stacktrace",
                      "time", "action-timestamps", "json", "sconscript"]
 
+    # Number of targets listed by --debug=slowest without a count.
+    default_slowest = 10
+
     def opt_debug(option, opt, value__, parser,
                   debug_options=debug_options,
                   deprecated_debug_options=deprecated_debug_options,
                   removed_debug_options=removed_debug_options):
         for value in value__.split(','):
-            if value in debug_options:
+            if value.startswith('slowest='):
+                try:
+                    count = int(value[len('slowest='):])
+                except ValueError:
+                    count = 0
+                if count <= 0:
+                    raise OptionValueError(
+                        "`%s' is not a valid count for --debug=slowest"
+                        % value[len('slowest='):])
+                parser.values.debug_slowest = count
+                parser.values.debug.append('slowest')
+            elif value == 'slowest':
+                parser.values.debug_slowest = default_slowest
+                parser.values.debug.append(value)
+            elif value in debug_options:
                 parser.values.debug.append(value)
             elif value in deprecated_debug_options:
                 parser.values.debug.append(value)
@@ -886,6 +934,7 @@ def Parser(version):
                   action="callback", callback=opt_debug,
                   help=opt_debug_help,
                   metavar="TYPE")
+    op.set_defaults(debug_slowest=None)
 
     def opt_diskcheck(option, opt, value, parser):
         try:
@@ -973,6 +1022,13 @@ def Parser(version):
                   action="help",
                   help="Print this message and exit")
 
+    op.add_option('--hash-cache',
+                  nargs=1, type="string",
+                  dest='hash_cache', default=None,
+                  action="store",
+                  help="Share file content signatures in machine-local cache FILE",
+                  metavar="FILE")
+
     def warn_md5_chunksize_deprecated(option, opt, value, parser) -> None:
         if opt == '--md5-chunksize':
             SCons.Warnings.warn(SCons.Warnings.DeprecatedOptionsWarning,
@@ -1035,12 +1091,44 @@ def Parser(version):
                   action="store_true",
                   help="Run in interactive mode")
 
+    def opt_jobs(option, opt, value, parser) -> None:
+        if value == 'auto':
+            parser.values.jobs_auto = True
+            parser.values.num_jobs = SCons.Taskmaster.Adaptive.auto_jobs()
+        else:
+            try:
+                num_jobs = int(value)
+                if num_jobs < 1:
+                    raise ValueError
+            except ValueError:
+                raise OptionValueError(
+                    "option %s: 'auto' or a positive integer is required: %r"
+                    % (opt, value))
+            parser.values.num_jobs = num_jobs
+            parser.values.jobs_auto = False
+
     op.add_option('-j', '--jobs',
-                  nargs=1, type="int",
+                  nargs=1, type="string",
                   dest="num_jobs", default=1,
-                  action="store",
-                  help="Allow N jobs at once",
+                  action="callback", callback=opt_jobs,
+                  help="Allow N jobs at once, or adapt to the CPU load with 'auto'",
                   metavar="N")
+    # Set by -j auto, along with a num_jobs upper limit.
+    op.set_defaults(jobs_auto=False)
+
+    opt_jobs_backend_help = "Run Python function actions on [%s]" \
+                            % ", ".join(jobs_backend_options)
+
+    op.add_option('--jobs-backend',
+                  nargs=1, choices=jobs_backend_options,
+                  dest="jobs_backend", default="thread",
+                  help=opt_jobs_backend_help,
+                  metavar="BACKEND")
+
+    op.add_option('--jobserver',
+                  dest='jobserver', default=False,
+                  action="store_true",
+                  help="Share a GNU make jobserver with the commands run")
 
     op.add_option('-k', '--keep-going',
                   dest='keep_going', default=False,
@@ -1054,6 +1142,27 @@ def Parser(version):
                   help="Set maximum system clock drift to N seconds",
                   metavar="N")
 
+    op.add_option('--max-memory-pressure',
+                  nargs=1, type="float",
+                  dest='max_memory_pressure', default=None,
+                  action="store",
+                  help="Hold back new jobs while memory pressure is above PERCENT",
+                  metavar="PERCENT")
+
+    def opt_min_free_memory(option, opt, value, parser) -> None:
+        try:
+            size = SCons.Util.parse_size(value)
+        except ValueError:
+            raise OptionValueError("`%s' is not a valid memory size" % value)
+        setattr(parser.values, option.dest, size)
+
+    op.add_option('--min-free-memory',
+                  nargs=1, type="string",
+                  dest='min_free_memory', default=None,
+                  action="callback", callback=opt_min_free_memory,
+                  help="Hold back new jobs while free memory is below SIZE",
+                  metavar="SIZE")
+
     op.add_option('-n', '--no-exec', '--just-print', '--dry-run', '--recon',
                   dest='no_exec', default=False,
                   action="store_true",
@@ -1064,6 +1173,11 @@ def Parser(version):
                   action="store_false",
                   help="Don't search or use the usual site_scons dir")
 
+    op.add_option('--prepass',
+                  dest='prepass', default=False,
+                  action="store_true",
+                  help="Check files for changes on the -j threads before building")
+
     op.add_option('--profile',
                   nargs=1,
                   dest="profile_file", default=None,
@@ -1091,6 +1205,25 @@ def Parser(version):
                   action="store_true",
                   help="Don't print commands")
 
+    def opt_sconsign_checkpoint(option, opt, value, parser) -> None:
+        try:
+            interval = SCons.SConsign.parse_checkpoint(value)
+        except ValueError:
+            raise OptionValueError("`%s' is not a valid checkpoint interval" % value)
+        setattr(parser.values, option.dest, interval)
+
+    op.add_option('--sconsign-checkpoint',
+                  nargs=1, type="string",
+                  dest='sconsign_checkpoint', default=None,
+                  action="callback", callback=opt_sconsign_checkpoint,
+                  help="Save signatures every INTERVAL tasks (or seconds, with s)",
+                  metavar="INTERVAL")
+
+    op.add_option('--sconsign-gc',
+                  dest='sconsign_gc', default=False,
+                  action="store_true",
+                  help="Remove stale entries from the signature database")
+
     op.add_option('--site-dir',
                   nargs=1,
                   dest='site_dir', default=None,
@@ -1112,6 +1245,13 @@ def Parser(version):
                   help="Trace Node evaluation to FILE",
                   metavar="FILE")
 
+    op.add_option('--trace-events',
+                  nargs=1,
+                  dest="trace_events_file", default=None,
+                  action="store",
+                  help="Write a Chrome trace-event timeline of the build to FILE",
+                  metavar="FILE")
+
     tree_options = ["all", "derived", "prune", "status", "linedraw"]
 
     def opt_tree(option, opt, value, parser, tree_options=tree_options):
@@ -408,6 +408,7 @@ GlobalDefaultEnvironmentFunctions = [
     'Repository',
     'Requires',
     'SConsignFile',
+    'SetPool',
     'SideEffect',
     'Split',
     'Tag',
@@ -0,0 +1,174 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""Adaptive job count for ``-j auto``.
+
+With ``-j auto`` the parallel job runner may start up to
+:func:`auto_jobs` worker threads, but an :class:`AdaptiveController`
+only lets as many of them execute tasks at once as the CPUs can keep
+busy.  It starts at one job per CPU, and about once a second compares
+the CPU idle time (from ``/proc/stat``) and the load average: if the
+CPUs are idling while every allowed job is running, as when jobs are
+waiting on I/O such as cache retrieval, another job is allowed; if the
+CPUs are saturated or the system is overloaded, one fewer is.  Workers
+over the limit wait before executing their task.
+"""
+
+import os
+import threading
+import time
+
+stat_path = '/proc/stat'
+
+
+def cpu_count() -> int:
+    return os.cpu_count() or 1
+
+
+def auto_jobs() -> int:
+    """Return the most jobs ``-j auto`` will run at once."""
+    return 2 * cpu_count()
+
+
+def cpu_times():
+    """Return the ``(idle, total)`` CPU time so far, or ``None``.
+
+    The times are in clock ticks summed over all CPUs; time waiting
+    for I/O counts as idle.
+    """
+    try:
+        with open(stat_path) as f:
+            fields = f.readline().split()
+        if fields[0] != 'cpu':
+            return None
+        ticks = [int(t) for t in fields[1:]]
+    except (OSError, ValueError, IndexError):
+        return None
+    # user nice system idle iowait irq softirq steal guest guest_nice;
+    # guest time is already included in user time.
+    idle = sum(ticks[3:5])
+    return idle, sum(ticks[:8])
+
+
+def load_average():
+    """Return the one-minute load average, or ``None``."""
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+class AdaptiveController:
+    """Varies how many tasks may execute at once, up to *max_jobs*.
+
+    Has the same :meth:`admit` and :meth:`release` interface as
+    :class:`~SCons.Taskmaster.Memory.AdmissionController`.  Each change
+    of the limit is appended to :attr:`changes` as a tuple of seconds
+    since the controller was created and the new limit.
+    """
+
+    # Minimum number of seconds between adjustments.
+    sample_interval = 1.0
+
+    # Allow another job if more than this fraction of CPU time was idle
+    # while all allowed jobs were running...
+    grow_idle = 0.2
+
+    # ...and allow one fewer if less than this fraction was idle, or
+    # if the load average exceeds this many times the number of CPUs.
+    shrink_idle = 0.05
+    shrink_load = 1.5
+
+    def __init__(self, max_jobs, cpus=None) -> None:
+        self.cpus = cpus or cpu_count()
+        self.max_jobs = max_jobs
+        self.start = time.monotonic()
+        self.cv = threading.Condition(threading.Lock())
+        # Guarded by `cv`.
+        self.limit = min(self.cpus, max_jobs)
+        self.running = 0
+        self.saturated = False
+        self.sampled = self.start
+        self.times = cpu_times()
+        self.changes = [(0.0, self.limit)]
+
+    def _set_limit(self, limit, now) -> None:
+        self.limit = limit
+        self.saturated = self.running >= limit
+        self.changes.append((now - self.start, limit))
+        self.cv.notify_all()
+
+    def _adjust(self) -> None:
+        now = time.monotonic()
+        if now - self.sampled < self.sample_interval:
+            return
+        self.sampled = now
+        saturated, self.saturated = self.saturated, self.running >= self.limit
+        idle = None
+        times = cpu_times()
+        if times is not None and self.times is not None:
+            total = times[1] - self.times[1]
+            if total > 0:
+                idle = (times[0] - self.times[0]) / total
+        self.times = times
+        load = load_average()
+        if idle is None and load is not None:
+            # No CPU times: estimate the idle fraction from the load.
+            idle = max(0.0, 1.0 - load / self.cpus)
+        if idle is None:
+            return
+        overloaded = load is not None and load > self.shrink_load * self.cpus
+        if (idle < self.shrink_idle or overloaded) and self.limit > 1:
+            self._set_limit(self.limit - 1, now)
+        elif idle > self.grow_idle and saturated and self.limit < self.max_jobs:
+            self._set_limit(self.limit + 1, now)
+
+    def admit(self, task, interrupted=lambda: False):
+        """Wait until fewer than the allowed number of tasks are running.
+
+        Stops waiting if *interrupted* returns true.
+        """
+        with self.cv:
+            self._adjust()
+            while self.running >= self.limit and not interrupted():
+                self.saturated = True
+                self.cv.wait(self.sample_interval)
+                self._adjust()
+            self.running += 1
+            if self.running >= self.limit:
+                self.saturated = True
+        return None
+
+    def release(self, key) -> None:
+        """Note that a task admitted by :meth:`admit` has finished."""
+        with self.cv:
+            self.running -= 1
+            self._adjust()
+            self.cv.notify()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,137 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import unittest
+
+import TestCmd
+
+import SCons.Taskmaster.Adaptive
+from SCons.Taskmaster.Adaptive import AdaptiveController
+
+
+def stat(idle, busy) -> str:
+    # user nice system idle iowait irq softirq steal guest guest_nice
+    return "cpu  %d 0 0 %d 0 0 0 0 0 0\ncpu0 0 0 0 0 0 0 0 0 0 0\n" % (busy, idle)
+
+
+class AdaptiveTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.save = (SCons.Taskmaster.Adaptive.stat_path,
+                     SCons.Taskmaster.Adaptive.load_average)
+        SCons.Taskmaster.Adaptive.stat_path = self.test.workpath('stat')
+        SCons.Taskmaster.Adaptive.load_average = lambda: None
+
+    def tearDown(self) -> None:
+        (SCons.Taskmaster.Adaptive.stat_path,
+         SCons.Taskmaster.Adaptive.load_average) = self.save
+
+    def test_cpu_times(self) -> None:
+        """Test reading the CPU times"""
+        self.test.write('stat', "cpu  10 1 5 100 20 1 1 2 7 0\n")
+        times = SCons.Taskmaster.Adaptive.cpu_times()
+        assert times == (120, 140), times
+        self.test.write('stat', "intr 1 2 3\n")
+        assert SCons.Taskmaster.Adaptive.cpu_times() is None
+        SCons.Taskmaster.Adaptive.stat_path = self.test.workpath('nonexistent')
+        assert SCons.Taskmaster.Adaptive.cpu_times() is None
+
+    def _sample(self, ac, idle, busy) -> None:
+        self.test.write('stat', stat(idle, busy))
+        ac.sampled -= ac.sample_interval
+        with ac.cv:
+            ac._adjust()
+
+    def test_adjust(self) -> None:
+        """Test growing and shrinking the job limit"""
+        self.test.write('stat', stat(0, 0))
+        ac = AdaptiveController(4, cpus=2)
+        assert ac.limit == 2, ac.limit
+
+        # Idle CPUs, but not all allowed jobs running: no change.
+        ac.admit(None)
+        self._sample(ac, 50, 50)
+        assert ac.limit == 2, ac.limit
+
+        # Idle CPUs with the limit reached: grow, up to max_jobs.
+        ac.admit(None)
+        self._sample(ac, 100, 100)
+        assert ac.limit == 3, ac.limit
+        # Not saturated over the last interval.
+        self._sample(ac, 150, 150)
+        assert ac.limit == 3, ac.limit
+        ac.admit(None)
+        self._sample(ac, 200, 200)
+        assert ac.limit == 4, ac.limit
+        ac.admit(None)
+        self._sample(ac, 250, 250)
+        self._sample(ac, 300, 300)
+        assert ac.limit == 4, ac.limit
+
+        # Busy CPUs: shrink, down to one.
+        for i in range(5):
+            self._sample(ac, 300, 1000 + 100 * i)
+        assert ac.limit == 1, ac.limit
+        changes = [limit for _, limit in ac.changes]
+        assert changes == [2, 3, 4, 3, 2, 1], changes
+
+        for _ in range(4):
+            ac.release(None)
+        assert ac.running == 0
+
+    def test_admit(self) -> None:
+        """Test holding back tasks over the limit"""
+        ac = AdaptiveController(4, cpus=1)
+        ac.sample_interval = 0.01
+        ac.admit(None)
+        assert ac.running == 1
+        # Over the limit, only an interrupt ends the wait.
+        ac.admit(None, lambda: True)
+        assert ac.running == 2
+        ac.release(None)
+        ac.release(None)
+        assert ac.running == 0
+
+    def test_load_average(self) -> None:
+        """Test falling back to the load average"""
+        SCons.Taskmaster.Adaptive.stat_path = self.test.workpath('nonexistent')
+        SCons.Taskmaster.Adaptive.load_average = lambda: 7.0
+        ac = AdaptiveController(8, cpus=4)
+        ac.admit(None)
+        ac.sampled -= ac.sample_interval
+        with ac.cv:
+            ac._adjust()
+        assert ac.limit == 3, ac.limit
+        ac.release(None)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,331 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Build duration history and critical-path scheduling support.
+
+The :class:`DurationHistory` class keeps the execution time of each
+target from previous builds in a small file stored next to the
+``.sconsign`` database.  :class:`CriticalPath` uses that history to
+rank ready nodes by the longest chain of work still waiting on them
+(the "downstream" weight), records the graph of tasks actually executed
+by the current build, and computes the predicted and actual critical
+path when the build is done.  :class:`Estimate` uses it to weight the
+progress of a build by how long each part is expected to take.
+"""
+
+import os
+import pickle
+import time
+
+import SCons.Node.FS
+from SCons.compat import PICKLE_PROTOCOL
+
+HISTORY_SUFFIX = ".durations"
+
+
+def history_filename(top, suffix: str = HISTORY_SUFFIX) -> str:
+    """Return the path of a history file for this build.
+
+    The file is stored alongside the signature database: if
+    :func:`~SCons.Script.SConsignFile` selected a name, that name is
+    used as the base, else the default sconsign name in the top-level
+    directory.  *suffix* distinguishes the kinds of history.
+    """
+    import SCons.SConsign  # pylint: disable=import-outside-toplevel
+
+    name = SCons.SConsign.DB_Name
+    if name is None:
+        name = SCons.SConsign.current_sconsign_filename()
+    if not os.path.isabs(name):
+        name = os.path.join(top.get_abspath(), name)
+    return name + suffix
+
+
+class History:
+    """A dictionary of facts learned from previous builds.
+
+    The *entries* are pickled to *filename*; subclasses define what
+    the keys and values are.
+    """
+
+    def __init__(self, filename=None) -> None:
+        self.filename = filename
+        self.entries = {}
+        self.dirty = False
+        if filename is not None:
+            self.read()
+
+    def read(self) -> None:
+        """Load the history file, ignoring a missing or unreadable one."""
+        try:
+            with open(self.filename, 'rb') as f:
+                entries = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError, IndexError):
+            return
+        if isinstance(entries, dict):
+            self.entries = entries
+
+    def write(self) -> None:
+        """Write the history file, if changed, via a temporary file."""
+        if not self.dirty or self.filename is None:
+            return
+        tmp = self.filename + '.tmp%d' % os.getpid()
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump(self.entries, f, PICKLE_PROTOCOL)
+            os.replace(tmp, self.filename)
+        except OSError:
+            # History is purely advisory, so failure to save it must
+            # not fail the build.
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class DurationHistory(History):
+    """Per-target execution durations and weights from previous builds.
+
+    Entries are keyed by the string form of the target Node and hold a
+    ``(duration, weight)`` tuple, where *duration* is the wall-clock time
+    in seconds the target's action took the last time it ran, and
+    *weight* is the length of the longest chain of work from that target
+    up to the top of the build (the target's own duration included).
+    """
+
+    def duration(self, name, default=None):
+        try:
+            return self.entries[name][0]
+        except KeyError:
+            return default
+
+    def weight(self, name, default: float = 0.0) -> float:
+        try:
+            return self.entries[name][1]
+        except KeyError:
+            return default
+
+    def update(self, name, duration, weight) -> None:
+        self.entries[name] = (duration, weight)
+        self.dirty = True
+
+    def record(self, name, duration) -> None:
+        """Update the duration of *name*, keeping its weight."""
+        self.update(name, duration, self.weight(name, duration))
+
+
+class Estimate:
+    """Predicted and completed work for a progress display.
+
+    The work of a build is the sum of the durations recorded in
+    *history* for each group of targets built by one action, found by
+    walking the dependencies of *targets* known without scanning.
+    Groups not in the history count as the mean of those which are, or
+    as one second if none are.  As the build goes on, groups found to
+    be up to date drop out of the total with :meth:`skip`, and built
+    groups are added to the completed work with :meth:`done`.
+    """
+
+    def __init__(self, history, targets, clock=time.monotonic) -> None:
+        self.clock = clock
+        self.start = clock()
+        # group name -> predicted seconds, for groups not yet finished
+        self.pending = {}
+        self.completed = 0.0
+        self.total = 0.0
+        self.count = 0
+        self.done_count = 0
+        unknown = []
+        seen = set()
+        stack = list(targets)
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(node.all_children(scan=False))
+            if isinstance(node, SCons.Node.FS.Dir):
+                stack.extend(n for name, n in node.entries.items()
+                             if name not in ('.', '..'))
+            if not node.has_builder():
+                continue
+            group = node.get_executor().get_all_targets()
+            name = str(group[0])
+            if name in self.pending:
+                continue
+            durations = [history.duration(str(t)) for t in group]
+            durations = [d for d in durations if d is not None]
+            if durations:
+                self.pending[name] = max(durations)
+            else:
+                self.pending[name] = None
+                unknown.append(name)
+        known = [d for d in self.pending.values() if d is not None]
+        default = sum(known) / len(known) if known else 1.0
+        for name in unknown:
+            self.pending[name] = default
+        self.total = sum(self.pending.values())
+        self.count = len(self.pending)
+
+    def skip(self, name) -> None:
+        """Note that the group led by *name* did not need building."""
+        predicted = self.pending.pop(name, None)
+        if predicted is not None:
+            self.total -= predicted
+            self.count -= 1
+
+    def done(self, name) -> None:
+        """Note that the group led by *name* has been built."""
+        predicted = self.pending.pop(name, None)
+        if predicted is not None:
+            self.completed += predicted
+            self.done_count += 1
+
+    def fraction(self) -> float:
+        """Return the fraction of the work to do which is done."""
+        if self.total <= 0.0:
+            return 1.0
+        return min(self.completed / self.total, 1.0)
+
+    def eta(self):
+        """Return the estimated seconds left, or ``None`` if unknown.
+
+        The work left is scaled by the rate at which work has been
+        completed so far, which takes in the parallelism of the build.
+        """
+        if self.completed <= 0.0:
+            return None
+        elapsed = self.clock() - self.start
+        return max(self.total - self.completed, 0.0) * elapsed / self.completed
+
+
+class CriticalPath:
+    """Critical-path bookkeeping for one invocation of the Taskmaster.
+
+    :meth:`priority` is used by the Taskmaster to choose among ready
+    nodes.  :meth:`record` is called (under the Taskmaster's control,
+    so serialized) as each executed task completes; because children
+    always complete before their parents, the longest path ending at
+    each recorded node can be computed incrementally.
+    """
+
+    def __init__(self, history) -> None:
+        self.history = history
+        # name -> (actual duration, longest actual path ending here,
+        #          longest predicted path ending here, predecessor name)
+        self.records = {}
+        # names in the order they were recorded; children come first.
+        self.order = []
+        self.children = {}
+
+    def priority(self, node) -> float:
+        """Return the downstream weight of *node* from history."""
+        return self.history.weight(str(node))
+
+    def record(self, node, duration, children) -> None:
+        """Record that *node* was built in *duration* seconds.
+
+        Only *children* which were themselves recorded by this build
+        contribute edges to the executed graph.
+        """
+        name = str(node)
+        if name in self.records:
+            return
+        predicted = self.history.duration(name, 0.0)
+        kids = []
+        actual_max = predicted_max = 0.0
+        pred = None
+        for child in children:
+            cname = str(child)
+            try:
+                record = self.records[cname]
+            except KeyError:
+                continue
+            kids.append(cname)
+            if record[1] > actual_max:
+                actual_max = record[1]
+                pred = cname
+            predicted_max = max(predicted_max, record[2])
+        self.records[name] = (duration, actual_max + duration,
+                              predicted_max + predicted, pred)
+        self.children[name] = kids
+        self.order.append(name)
+
+    def critical_path(self):
+        """Return ``(predicted, actual, path)`` for the executed graph.
+
+        *path* is the list of ``(name, duration)`` tuples making up the
+        actual critical path, in build order.
+        """
+        if not self.records:
+            return 0.0, 0.0, []
+        predicted = max(r[2] for r in self.records.values())
+        name = max(self.records, key=lambda n: self.records[n][1])
+        actual = self.records[name][1]
+        path = []
+        while name is not None:
+            record = self.records[name]
+            path.append((name, record[0]))
+            name = record[3]
+        path.reverse()
+        return predicted, actual, path
+
+    def update_history(self) -> None:
+        """Fold this build's durations and weights into the history.
+
+        The downstream weight of each node is its own duration plus the
+        largest weight among the recorded parents which depend on it.
+        Walking the record order backwards visits parents first.
+        """
+        weights = {}
+        for name in reversed(self.order):
+            weights.setdefault(name, 0.0)
+            weight = weights[name] + self.records[name][0]
+            weights[name] = weight
+            for child in self.children[name]:
+                if weight > weights.get(child, 0.0):
+                    weights[child] = weight
+        for name in self.order:
+            self.history.update(name, self.records[name][0], weights[name])
+
+    def report(self, fp) -> None:
+        """Write a summary of the predicted and actual critical path."""
+        if not self.records:
+            return
+        predicted, actual, path = self.critical_path()
+        fp.write("Critical path: predicted %f seconds, actual %f seconds\n"
+                 % (predicted, actual))
+        for name, duration in path:
+            fp.write("    %f seconds: %s\n" % (duration, name))
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
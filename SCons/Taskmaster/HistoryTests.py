@@ -0,0 +1,224 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import io
+import os
+import unittest
+
+import TestCmd
+
+from SCons.Taskmaster.History import CriticalPath, DurationHistory, Estimate
+
+
+class DurationHistoryTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.filename = self.test.workpath('.sconsign.durations')
+
+    def test_missing(self) -> None:
+        """Test reading a history file which does not exist"""
+        history = DurationHistory(self.filename)
+        assert len(history) == 0, len(history)
+        assert history.duration('foo') is None
+        assert history.weight('foo') == 0.0
+
+    def test_corrupt(self) -> None:
+        """Test that a corrupt history file is ignored"""
+        self.test.write('.sconsign.durations', 'not a pickle\n')
+        history = DurationHistory(self.filename)
+        assert len(history) == 0, len(history)
+
+    def test_write_read(self) -> None:
+        """Test a history round trip"""
+        history = DurationHistory(self.filename)
+        history.write()
+        assert not os.path.exists(self.filename)
+        history.update('foo', 1.5, 4.0)
+        history.update('bar', 2.5, 2.5)
+        history.write()
+        assert not history.dirty
+
+        history = DurationHistory(self.filename)
+        assert len(history) == 2, len(history)
+        assert history.duration('foo') == 1.5, history.duration('foo')
+        assert history.weight('foo') == 4.0, history.weight('foo')
+        assert history.weight('bar') == 2.5, history.weight('bar')
+
+
+class CriticalPathTestCase(unittest.TestCase):
+
+    def _build(self, history):
+        # a -> c -> d, b -> d, e on its own.
+        cp = CriticalPath(history)
+        cp.record('a', 2.0, [])
+        cp.record('b', 1.0, [])
+        cp.record('e', 0.5, [])
+        cp.record('c', 3.0, ['a', 'src.c'])
+        cp.record('d', 1.0, ['b', 'c'])
+        return cp
+
+    def test_critical_path(self) -> None:
+        """Test computing the actual and predicted critical path"""
+        history = DurationHistory()
+        history.update('a', 1.0, 0.0)
+        history.update('c', 1.0, 0.0)
+        history.update('d', 1.0, 0.0)
+        cp = self._build(history)
+        predicted, actual, path = cp.critical_path()
+        assert predicted == 3.0, predicted
+        assert actual == 6.0, actual
+        assert path == [('a', 2.0), ('c', 3.0), ('d', 1.0)], path
+
+        fp = io.StringIO()
+        cp.report(fp)
+        expect = """\
+Critical path: predicted 3.000000 seconds, actual 6.000000 seconds
+    2.000000 seconds: a
+    3.000000 seconds: c
+    1.000000 seconds: d
+"""
+        assert fp.getvalue() == expect, fp.getvalue()
+
+    def test_empty(self) -> None:
+        """Test that nothing is reported when nothing was built"""
+        cp = CriticalPath(DurationHistory())
+        assert cp.critical_path() == (0.0, 0.0, [])
+        fp = io.StringIO()
+        cp.report(fp)
+        assert fp.getvalue() == '', fp.getvalue()
+
+    def test_update_history(self) -> None:
+        """Test downstream weights folded into the history"""
+        history = DurationHistory()
+        history.update('old', 7.0, 7.0)
+        cp = self._build(history)
+        cp.update_history()
+        assert history.weight('d') == 1.0, history.weight('d')
+        assert history.weight('c') == 4.0, history.weight('c')
+        assert history.weight('b') == 2.0, history.weight('b')
+        assert history.weight('a') == 6.0, history.weight('a')
+        assert history.weight('e') == 0.5, history.weight('e')
+        assert history.duration('c') == 3.0, history.duration('c')
+        # entries for targets not built this time are kept
+        assert history.weight('old') == 7.0, history.weight('old')
+        assert cp.priority('a') == 6.0, cp.priority('a')
+
+
+class Executor:
+    def __init__(self, targets) -> None:
+        self.targets = targets
+
+    def get_all_targets(self):
+        return self.targets
+
+
+class Node:
+    def __init__(self, name, children=(), builder: bool=True) -> None:
+        self.name = name
+        self.children = list(children)
+        self.builder = builder
+        self.executor = Executor([self])
+
+    def __str__(self) -> str:
+        return self.name
+
+    def all_children(self, scan: bool=True):
+        return self.children
+
+    def has_builder(self) -> bool:
+        return self.builder
+
+    def get_executor(self):
+        return self.executor
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class EstimateTestCase(unittest.TestCase):
+
+    def test_estimate(self) -> None:
+        """Test progress weighted by previous durations"""
+        history = DurationHistory()
+        history.update('a', 6.0, 6.0)
+        history.update('b', 2.0, 2.0)
+        source = Node('b.in', builder=False)
+        b = Node('b', [source])
+        # c and c2 are built by one action, and have no history.
+        c = Node('c')
+        c2 = Node('c2')
+        c.executor = c2.executor = Executor([c, c2])
+        a = Node('a', [b, c, c2, source])
+        clock = Clock()
+        estimate = Estimate(history, [a], clock)
+        # c counts as the mean of the known durations.
+        assert estimate.pending == {'a': 6.0, 'b': 2.0, 'c': 4.0}, estimate.pending
+        assert estimate.total == 12.0, estimate.total
+        assert estimate.count == 3, estimate.count
+        assert estimate.eta() is None
+        assert estimate.fraction() == 0.0
+
+        estimate.skip('c')
+        assert estimate.total == 8.0, estimate.total
+        clock.now = 5.0
+        estimate.done('b')
+        estimate.done('b')
+        assert estimate.fraction() == 0.25, estimate.fraction()
+        assert estimate.done_count == 1, estimate.done_count
+        # 6 seconds of work left, done at 2 seconds of work per 5.
+        assert estimate.eta() == 15.0, estimate.eta()
+        estimate.done('a')
+        assert estimate.fraction() == 1.0
+        assert estimate.eta() == 0.0
+
+    def test_no_history(self) -> None:
+        """Test progress by node count when nothing is known"""
+        estimate = Estimate(DurationHistory(), [Node('a', [Node('b')])])
+        assert estimate.total == 2.0, estimate.total
+        estimate.done('b')
+        assert estimate.fraction() == 0.5, estimate.fraction()
+
+    def test_record(self) -> None:
+        """Test recording a duration without a critical path"""
+        history = DurationHistory()
+        history.record('a', 2.0)
+        assert history.entries == {'a': (2.0, 2.0)}, history.entries
+        history.update('a', 2.0, 5.0)
+        history.record('a', 3.0)
+        assert history.entries == {'a': (3.0, 5.0)}, history.entries
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
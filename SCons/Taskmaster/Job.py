@@ -29,6 +29,7 @@ stop, and wait on jobs.
 
 import SCons.compat
 
+import collections
 import logging
 import os
 import queue
@@ -38,7 +39,9 @@ import threading
 
 from enum import Enum
 
+import SCons.Action
 import SCons.Errors
+import SCons.Taskmaster.Adaptive
 import SCons.Warnings
 
 
@@ -71,11 +74,17 @@ class Jobs:
     methods for starting, stopping, and waiting on all N jobs.
     """
 
-    def __init__(self, num, taskmaster) -> None:
+    def __init__(self, num, taskmaster, admission=()) -> None:
         """
         Create 'num' jobs using the given taskmaster. The exact implementation
         used varies with the number of jobs requested and the state of the `legacy_sched` flag
         to `--experimental`.
+
+        *admission* is a sequence of admission controllers, such as a
+        :class:`~SCons.Taskmaster.Memory.AdmissionController` or a
+        :class:`~SCons.Taskmaster.Jobserver.Client`, which the default
+        parallel scheduler asks, in order, before executing each task.
+        A task only starts once all of them have admitted it.
         """
 
         # Importing GetOption here instead of at top of file to avoid
@@ -94,9 +103,12 @@ class Jobs:
             else:
                 self.job = Serial(taskmaster)
         else:
-            self.job = NewParallel(taskmaster, num, stack_size)
+            self.job = NewParallel(taskmaster, num, stack_size, admission)
 
         self.num_jobs = num
+        self.jobs_auto = bool(GetOption('jobs_auto'))
+        self.backend = GetOption('jobs_backend') or 'thread'
+        self.process_pool = None
 
     def run(self, postfunc=lambda: None) -> None:
         """Run the jobs.
@@ -108,12 +120,52 @@ class Jobs:
         against keyboard interrupts and is guaranteed to run to
         completion."""
         self._setup_sig_handler()
+        self._start_process_pool()
         try:
             self.job.start()
         finally:
+            self._stop_process_pool()
             postfunc()
             self._reset_sig_handler()
 
+    def _start_process_pool(self) -> None:
+        """Start the worker processes for ``--jobs-backend=process``.
+
+        Only parallel builds get a pool: with a single job there is
+        nothing for the function actions to overlap with.  Command
+        actions are unaffected and keep running on the job threads.
+        """
+        if self.backend != 'process' or self.num_jobs < 2:
+            return
+        # pylint: disable=import-outside-toplevel
+        import concurrent.futures
+        import multiprocessing
+
+        # Forking a process which is already running job threads is
+        # unsafe, so prefer a start method which does not.
+        methods = multiprocessing.get_all_start_methods()
+        method = 'forkserver' if 'forkserver' in methods else 'spawn'
+        # The job limit of -j auto is twice the CPU count, which is
+        # more processes than there are CPUs to run them.
+        if self.jobs_auto:
+            workers = SCons.Taskmaster.Adaptive.cpu_count()
+        else:
+            workers = self.num_jobs
+        self.process_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(method),
+            initializer=_process_worker_init,
+        )
+        SCons.Action.process_pool = self.process_pool
+
+    def _stop_process_pool(self) -> None:
+        """Shut down the worker processes, if any were started."""
+        if self.process_pool is None:
+            return
+        SCons.Action.process_pool = None
+        self.process_pool.shutdown(wait=True)
+        self.process_pool = None
+
     def were_interrupted(self):
         """Returns whether the jobs were interrupted by a signal."""
         return self.job.interrupted()
@@ -172,6 +224,16 @@ class Jobs:
             pass
 
 
+def _process_worker_init() -> None:
+    """Initialize a process pool worker.
+
+    Interrupts are handled by the main SCons process, which stops the
+    Taskmaster and shuts the pool down; the workers just finish the
+    call they are running.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
 class Serial:
     """This class is used to execute tasks in series, and is more efficient
     than Parallel, but is only appropriate for non-parallel builds. Only
@@ -471,13 +533,16 @@ class NewParallel:
         def __exit__(self, *args):
             pass
 
-    def __init__(self, taskmaster, num, stack_size) -> None:
+    def __init__(self, taskmaster, num, stack_size, admission=()) -> None:
         self.taskmaster = taskmaster
         self.max_workers = num
         self.stack_size = stack_size
         self.interrupted = InterruptState()
         self.workers = []
 
+        # Admission control only matters if tasks can overlap.
+        self.admission = list(admission) if num > 1 else []
+
         # The `tm_lock` is what ensures that we only have one
         # thread interacting with the taskmaster at a time. It
         # also protects access to our state that gets updated
@@ -499,6 +564,21 @@ class NewParallel:
         self.results_queue_lock = (threading.Lock if self.max_workers > 1 else NewParallel.FakeLock)()
         self.results_queue = []
 
+        # The number of failed tasks in the results queue, or being
+        # retired, guarded by `results_queue_lock`. While there are
+        # any, threads do not take tasks from the ready queue without
+        # `tm_lock`: the failure may stop the build, and the tasks
+        # queued must then not be started.
+        self.failures_pending = 0
+
+        # Tasks found by a search beyond the one the searching thread
+        # will execute itself, prepared and ready for execution. They
+        # are counted in `jobs`. Only the searching thread appends to
+        # the queue, under `tm_lock`, but any thread may pop from it
+        # without that lock: deque appends and pops are atomic. If the
+        # taskmaster is stopped, the queued tasks are cancelled.
+        self.ready_queue = collections.deque()
+
         if self.taskmaster.trace:
             self.trace = self._setup_logging()
         else:
@@ -559,6 +639,18 @@ class NewParallel:
         if prev_size is not None:
             threading.stack_size(prev_size)
 
+    def _cancel_ready_tasks(self) -> None:
+        """Cancel the tasks in the ready queue.  Called under `tm_lock`."""
+        while self.ready_queue:
+            try:
+                task = self.ready_queue.popleft()
+            except IndexError:
+                break
+            if self.trace:
+                self.trace_message("Cancelling queued task")
+            task.cancel()
+            self.jobs -= 1
+
     def _work(self):
 
         task = None
@@ -566,161 +658,227 @@ class NewParallel:
         while True:
 
             # Obtain `tm_lock`, granting exclusive access to the taskmaster.
-            with self.can_search_cv:
+            # Fast path: if an earlier search found more tasks than the
+            # searching thread could execute itself, take one from the
+            # ready queue without contending for `tm_lock`. Results of
+            # a task we just completed are already in the results
+            # queue, and will be retired by the next search.
+            queued = None
+            if self.ready_queue and not self.failures_pending:
+                try:
+                    queued = self.ready_queue.popleft()
+                except IndexError:
+                    pass
 
+            if queued is not None:
                 if self.trace:
-                    self.trace_message("Gained exclusive access")
-
-                # Capture whether we got here with `task` set,
-                # then drop our reference to the task as we are no
-                # longer interested in the actual object.
-                completed_task = (task is not None)
-                task = None
-
-                # We will only have `completed_task` set here if
-                # we have looped back after executing a task. If
-                # we have completed a task and find that we are
-                # stalled, we should speculatively indicate that
-                # we are no longer stalled by transitioning to the
-                # 'ready' state which will bypass the condition
-                # wait so that we immediately process the results
-                # queue and hopefully light up new
-                # work. Otherwise, stay stalled, and we will wait
-                # in the condvar. Some other thread will come back
-                # here with a completed task.
-                if self.state == NewParallel.State.STALLED and completed_task:
-                    if self.trace:
-                        self.trace_message("Detected stall with completed task, bypassing wait")
-                    self.state = NewParallel.State.READY
+                    self.trace_message("Took task from ready queue")
+                task = queued
+            else:
+                with self.can_search_cv:
 
-                # Wait until we are neither searching nor stalled.
-                while self.state == NewParallel.State.SEARCHING or self.state == NewParallel.State.STALLED:
                     if self.trace:
-                        self.trace_message("Search already in progress, waiting")
-                    self.can_search_cv.wait()
-
-                # If someone set the completed flag, bail.
-                if self.state == NewParallel.State.COMPLETED:
+                        self.trace_message("Gained exclusive access")
+
+                    # Capture whether we got here with `task` set,
+                    # then drop our reference to the task as we are no
+                    # longer interested in the actual object.
+                    completed_task = (task is not None)
+                    task = None
+
+                    # We will only have `completed_task` set here if
+                    # we have looped back after executing a task. If
+                    # we have completed a task and find that we are
+                    # stalled, we should speculatively indicate that
+                    # we are no longer stalled by transitioning to the
+                    # 'ready' state which will bypass the condition
+                    # wait so that we immediately process the results
+                    # queue and hopefully light up new
+                    # work. Otherwise, stay stalled, and we will wait
+                    # in the condvar. Some other thread will come back
+                    # here with a completed task.
+                    if self.state == NewParallel.State.STALLED and completed_task:
+                        if self.trace:
+                            self.trace_message("Detected stall with completed task, bypassing wait")
+                        self.state = NewParallel.State.READY
+
+                    # Wait until we are neither searching nor stalled.
+                    while self.state == NewParallel.State.SEARCHING or self.state == NewParallel.State.STALLED:
+                        if self.trace:
+                            self.trace_message("Search already in progress, waiting")
+                        self.can_search_cv.wait()
+
+                    # If someone set the completed flag, bail.
+                    if self.state == NewParallel.State.COMPLETED:
+                        if self.trace:
+                            self.trace_message("Completion detected, breaking from main loop")
+                        break
+
+                    # Set the searching flag to indicate that a thread
+                    # is currently in the critical section for
+                    # taskmaster work.
+                    #
                     if self.trace:
-                        self.trace_message("Completion detected, breaking from main loop")
-                    break
+                        self.trace_message("Starting search")
+                    self.state = NewParallel.State.SEARCHING
+
+                    # Bulk acquire the tasks in the results queue
+                    # under the result queue lock, then process them
+                    # all outside that lock. We need to process the
+                    # tasks in the results queue before looking for
+                    # new work because we might be unable to find new
+                    # work if we don't.
+                    results_queue = []
+                    with self.results_queue_lock:
+                        results_queue, self.results_queue = self.results_queue, results_queue
 
-                # Set the searching flag to indicate that a thread
-                # is currently in the critical section for
-                # taskmaster work.
-                #
-                if self.trace:
-                    self.trace_message("Starting search")
-                self.state = NewParallel.State.SEARCHING
-
-                # Bulk acquire the tasks in the results queue
-                # under the result queue lock, then process them
-                # all outside that lock. We need to process the
-                # tasks in the results queue before looking for
-                # new work because we might be unable to find new
-                # work if we don't.
-                results_queue = []
-                with self.results_queue_lock:
-                    results_queue, self.results_queue = self.results_queue, results_queue
-
-                if self.trace:
-                    self.trace_message(f"Found {len(results_queue)} completed tasks to process")
-                for (rtask, rresult) in results_queue:
-                    if rresult:
-                        rtask.executed()
-                    else:
-                        if self.interrupted():
+                    if self.trace:
+                        self.trace_message(f"Found {len(results_queue)} completed tasks to process")
+                    failures = 0
+                    for (rtask, rresult) in results_queue:
+                        if rresult:
+                            rtask.executed()
+                        else:
+                            if self.interrupted():
+                                try:
+                                    raise SCons.Errors.BuildError(
+                                        rtask.targets[0], errstr=interrupt_msg)
+                                except Exception:
+                                    rtask.exception_set()
+
+                            # Let the failed() callback function arrange
+                            # for the build to stop if that's appropriate.
+                            rtask.failed()
+                            failures += 1
+
+                        rtask.postprocess()
+                        self.jobs -= 1
+
+                    # We are done with any task objects that were in
+                    # the results queue.
+                    results_queue.clear()
+
+                    # If a failure stopped the taskmaster, the tasks
+                    # queued by earlier searches must not start.
+                    if self.ready_queue and self.taskmaster.stopped():
+                        self._cancel_ready_tasks()
+                    if failures:
+                        with self.results_queue_lock:
+                            self.failures_pending -= failures
+
+                    # A task queued by an earlier search may have been
+                    # left for us: take it rather than searching, and
+                    # let the next thread in to take another.
+                    if self.ready_queue:
+                        try:
+                            task = self.ready_queue.popleft()
+                        except IndexError:
+                            pass
+                        else:
+                            if self.trace:
+                                self.trace_message("Took task from ready queue")
+                            self.state = NewParallel.State.READY
+                            self.can_search_cv.notify()
+
+                    # Now, turn the crank on the taskmaster until we
+                    # either run out of tasks, or find enough tasks
+                    # that need execution to keep this thread and
+                    # any idle workers busy. If we run out of tasks,
+                    # go idle until results arrive if jobs are
+                    # pending, or mark the walk as complete if not.
+                    while self.state == NewParallel.State.SEARCHING:
+                        if self.trace:
+                            self.trace_message("Searching for new tasks")
+                        found = self.taskmaster.next_task()
+
+                        if found:
+                            # We found a task. Walk it through the
+                            # task lifecycle. If it does not need
+                            # execution, just complete the task and
+                            # look for the next one. Otherwise, keep
+                            # it for this thread or queue it for
+                            # another.
                             try:
-                                raise SCons.Errors.BuildError(
-                                    rtask.targets[0], errstr=interrupt_msg)
+                                found.prepare()
                             except Exception:
-                                rtask.exception_set()
-
-                        # Let the failed() callback function arrange
-                        # for the build to stop if that's appropriate.
-                        rtask.failed()
-
-                    rtask.postprocess()
-                    self.jobs -= 1
-
-                # We are done with any task objects that were in
-                # the results queue.
-                results_queue.clear()
+                                found.exception_set()
+                                found.failed()
+                                found.postprocess()
+                            else:
+                                if not found.needs_execute():
+                                    if self.trace:
+                                        self.trace_message("Found internal task")
+                                    found.executed()
+                                    found.postprocess()
+                                else:
+                                    self.jobs += 1
+                                    if task is None:
+                                        if self.trace:
+                                            self.trace_message("Found task requiring execution")
+                                        task = found
+                                    else:
+                                        if self.trace:
+                                            self.trace_message("Found task requiring execution, queueing it")
+                                        self.ready_queue.append(found)
+                                    # This thread will be busy taking care of
+                                    # `execute`ing its task. If we haven't
+                                    # reached the limit, spawn a new thread to
+                                    # pick up queued tasks or turn the crank.
+                                    self._maybe_start_worker()
+                                    # Stop searching once every worker
+                                    # which isn't executing a task has one
+                                    # waiting for it in the ready queue,
+                                    # so that we don't delay our own task.
+                                    # Indicate that we are no longer
+                                    # searching so we can drop out of this
+                                    # loop, execute the task outside the
+                                    # lock, and allow another thread in.
+                                    executing = self.jobs - len(self.ready_queue)
+                                    idle = len(self.workers) - executing
+                                    if self.jobs >= self.max_workers or len(self.ready_queue) >= idle:
+                                        self.state = NewParallel.State.READY
+                                        self.can_search_cv.notify()
+
+                        elif task is not None:
+                            # We found no more tasks, but we do have
+                            # one of our own to execute. Give the
+                            # next thread a chance to search.
+                            if self.trace:
+                                self.trace_message("Found no further task requiring execution")
+                            self.state = NewParallel.State.READY
+                            self.can_search_cv.notify()
 
-                # Now, turn the crank on the taskmaster until we
-                # either run out of tasks, or find a task that
-                # needs execution. If we run out of tasks, go idle
-                # until results arrive if jobs are pending, or
-                # mark the walk as complete if not.
-                while self.state == NewParallel.State.SEARCHING:
-                    if self.trace:
-                        self.trace_message("Searching for new tasks")
-                    task = self.taskmaster.next_task()
-
-                    if task:
-                        # We found a task. Walk it through the
-                        # task lifecycle. If it does not need
-                        # execution, just complete the task and
-                        # look for the next one. Otherwise,
-                        # indicate that we are no longer searching
-                        # so we can drop out of this loop, execute
-                        # the task outside the lock, and allow
-                        # another thread in to search.
-                        try:
-                            task.prepare()
-                        except Exception:
-                            task.exception_set()
-                            task.failed()
-                            task.postprocess()
                         else:
-                            if not task.needs_execute():
+                            # We failed to find a task, so this thread
+                            # cannot continue turning the taskmaster
+                            # crank. We must exit the loop.
+                            if self.jobs:
+                                # No task was found, but there are
+                                # outstanding jobs executing that
+                                # might unblock new tasks when they
+                                # complete. Transition to the stalled
+                                # state. We do not need a notify,
+                                # because we know there are threads
+                                # outstanding that will re-enter the
+                                # loop.
+                                #
                                 if self.trace:
-                                    self.trace_message("Found internal task")
-                                task.executed()
-                                task.postprocess()
+                                    self.trace_message("Found no task requiring execution, but have jobs: marking stalled")
+                                self.state = NewParallel.State.STALLED
                             else:
-                                self.jobs += 1
+                                # We didn't find a task and there are
+                                # no jobs outstanding, so there is
+                                # nothing that will ever return
+                                # results which might unblock new
+                                # tasks. We can conclude that the walk
+                                # is complete. Update our state to
+                                # note completion and awaken anyone
+                                # sleeping on the condvar.
+                                #
                                 if self.trace:
-                                    self.trace_message("Found task requiring execution")
-                                self.state = NewParallel.State.READY
-                                self.can_search_cv.notify()
-                                # This thread will be busy taking care of
-                                # `execute`ing this task. If we haven't
-                                # reached the limit, spawn a new thread to
-                                # turn the crank and find the next task.
-                                self._maybe_start_worker()
-
-                    else:
-                        # We failed to find a task, so this thread
-                        # cannot continue turning the taskmaster
-                        # crank. We must exit the loop.
-                        if self.jobs:
-                            # No task was found, but there are
-                            # outstanding jobs executing that
-                            # might unblock new tasks when they
-                            # complete. Transition to the stalled
-                            # state. We do not need a notify,
-                            # because we know there are threads
-                            # outstanding that will re-enter the
-                            # loop.
-                            #
-                            if self.trace:
-                                self.trace_message("Found no task requiring execution, but have jobs: marking stalled")
-                            self.state = NewParallel.State.STALLED
-                        else:
-                            # We didn't find a task and there are
-                            # no jobs outstanding, so there is
-                            # nothing that will ever return
-                            # results which might unblock new
-                            # tasks. We can conclude that the walk
-                            # is complete. Update our state to
-                            # note completion and awaken anyone
-                            # sleeping on the condvar.
-                            #
-                            if self.trace:
-                                self.trace_message("Found no task requiring execution, and have no jobs: marking complete")
-                            self.state = NewParallel.State.COMPLETED
-                            self.can_search_cv.notify_all()
+                                    self.trace_message("Found no task requiring execution, and have no jobs: marking complete")
+                                self.state = NewParallel.State.COMPLETED
+                                self.can_search_cv.notify_all()
 
             # We no longer hold `tm_lock` here. If we have a task,
             # we can now execute it. If there are threads waiting
@@ -730,6 +888,13 @@ class NewParallel:
                 if self.trace:
                     self.trace_message("Executing task")
                 ok = True
+                # Hold the task back, outside `tm_lock`, until the
+                # admission controllers let it start.
+                admitted = []
+                for controller in self.admission:
+                    if self.trace:
+                        self.trace_message("Waiting for admission")
+                    admitted.append((controller, controller.admit(task, self.interrupted)))
                 try:
                     if self.interrupted():
                         raise SCons.Errors.BuildError(
@@ -738,6 +903,8 @@ class NewParallel:
                 except Exception:
                     ok = False
                     task.exception_set()
+                for controller, key in reversed(admitted):
+                    controller.release(key)
 
                 # Grab the results queue lock and enqueue the
                 # executed task and state. The next thread into
@@ -748,6 +915,8 @@ class NewParallel:
                     self.trace_message("Enqueueing executed task results")
                 with self.results_queue_lock:
                     self.results_queue.append((task, ok))
+                    if not ok:
+                        self.failures_pending += 1
 
             # Tricky state "fallthrough" here. We are going back
             # to the top of the loop, which behaves differently
@@ -26,6 +26,7 @@ import random
 import math
 import os
 
+import SCons.Action
 import SCons.Taskmaster.Job
 from SCons.Script.Main import OptionsParser
 
@@ -138,6 +139,9 @@ class Task:
     def postprocess(self) -> None:
         self.taskmaster.num_postprocessed = self.taskmaster.num_postprocessed + 1
 
+    def cancel(self) -> None:
+        self.taskmaster.num_cancelled = self.taskmaster.num_cancelled + 1
+
     def exception_set(self) -> None:
         pass
 
@@ -183,6 +187,9 @@ class ExceptionTask:
     def postprocess(self) -> None:
         self.taskmaster.num_postprocessed = self.taskmaster.num_postprocessed + 1
 
+    def cancel(self) -> None:
+        self.taskmaster.num_cancelled = self.taskmaster.num_cancelled + 1
+
     def exception_set(self) -> None:
         self.taskmaster.exception_set()
 
@@ -198,6 +205,7 @@ class Taskmaster:
         self.num_iterated = 0
         self.num_executed = 0
         self.num_failed = 0
+        self.num_cancelled = 0
         self.num_postprocessed = 0
         self.parallel_list = [0] * (n+1)
         self.found_parallel = False
@@ -240,6 +248,9 @@ class Taskmaster:
     def exception_set(self) -> None:
         pass
 
+    def stopped(self):
+        return self.stop
+
     def cleanup(self) -> None:
         pass
 
@@ -387,6 +398,63 @@ class ParallelExceptionTestCase(JobTestCase):
         self.assertTrue(taskmaster.num_postprocessed >= 1,
                     "one or more tasks should have been postprocessed")
 
+class ProcessPoolTask(Task):
+    def _do_something(self) -> None:
+        pid = SCons.Action.process_pool.submit(os.getpid).result()
+        with self.taskmaster.guard:
+            self.taskmaster.pids.append(pid)
+
+class ProcessBackendTestCase(JobTestCase):
+
+    def runTest(self) -> None:
+        """test parallel jobs with the process backend"""
+
+        OptionsParser.values.jobs_backend = 'process'
+        try:
+            taskmaster = Taskmaster(4, self, ProcessPoolTask)
+            taskmaster.pids = []
+            jobs = SCons.Taskmaster.Job.Jobs(2, taskmaster)
+            jobs.run()
+
+            jobs = SCons.Taskmaster.Job.Jobs(1, Taskmaster(1, self, Task))
+            jobs.run()
+        finally:
+            OptionsParser.values.jobs_backend = None
+
+        self.assertTrue(taskmaster.all_tasks_are_executed(),
+                        "all the tests were not executed")
+        self.assertEqual(len(taskmaster.pids), 4)
+        self.assertNotIn(os.getpid(), taskmaster.pids)
+        self.assertIsNone(SCons.Action.process_pool)
+        self.assertIsNone(jobs.process_pool)
+
+class AdmissionTestCase(JobTestCase):
+
+    def runTest(self) -> None:
+        """test parallel jobs asking an admission controller"""
+
+        class Admission:
+            def __init__(self) -> None:
+                self.admitted = []
+                self.released = []
+
+            def admit(self, task, interrupted):
+                self.admitted.append(task.i)
+                return task.i
+
+            def release(self, key) -> None:
+                self.released.append(key)
+
+        admission = Admission()
+        taskmaster = Taskmaster(num_tasks, self, RandomTask)
+        jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster, [admission])
+        jobs.run()
+
+        self.assertTrue(taskmaster.all_tasks_are_executed(),
+                        "all the tests were not executed")
+        self.assertEqual(sorted(admission.admitted), list(range(1, num_tasks + 1)))
+        self.assertEqual(sorted(admission.released), list(range(1, num_tasks + 1)))
+
 #---------------------------------------------------------------------
 # Above tested Job object with contrived Task and Taskmaster objects.
 # Now test Job object with actual Task and Taskmaster objects.
@@ -523,6 +591,50 @@ class _SConsTaskTest(JobTestCase):
                         "no nodes ran at all.")
 
 
+class ReadyQueueFailureTest(JobTestCase):
+    def runTest(self) -> None:
+        """test that queued tasks do not start after a failure"""
+        started = []
+
+        class recordnode(goodnode):
+            def build(self, **kw) -> None:
+                started.append(self)
+
+        class failnode(badnode):
+            def build(self, **kw):
+                started.append(self)
+                raise Exception('failnode exception')
+
+        bad = failnode()
+        queued = recordnode()
+        later = recordnode()
+        taskmaster = SCons.Taskmaster.Taskmaster([bad, queued, later],
+                                                 tasker=SCons.Taskmaster.AlwaysTask)
+        jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster)
+
+        # Add workers which never run. The search which finds the
+        # failing task queues the next tasks for them, so the only
+        # thread comes back to the queue just after the failure.
+        class IdleWorker:
+            def join(self) -> None:
+                pass
+
+        def add_idle_workers() -> None:
+            workers = jobs.job.workers
+            while sum(isinstance(w, IdleWorker) for w in workers) < 2:
+                workers.append(IdleWorker())
+
+        jobs.job._maybe_start_worker = add_idle_workers
+        jobs.run()
+
+        self.assertEqual(started, [bad])
+        self.assertEqual(bad.get_state(), SCons.Node.failed)
+        self.assertEqual(queued.get_state(), SCons.Node.no_state)
+        self.assertEqual(later.get_state(), SCons.Node.no_state)
+        self.assertFalse(jobs.job.ready_queue)
+        self.assertEqual(jobs.job.jobs, 0)
+
+
 class SerialTaskTest(_SConsTaskTest):
     def runTest(self) -> None:
         """test serial jobs with actual Taskmaster and Task"""
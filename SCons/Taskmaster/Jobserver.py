@@ -0,0 +1,217 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""GNU make jobserver support.
+
+A jobserver is a pipe or named FIFO preloaded with one byte ("token")
+per job slot beyond the first.  Every process sharing it owns one
+implicit slot, and must read a token before running each further job
+at the same time, writing it back when that job is done.  This lets
+``make``, ``ninja``, ``cargo`` and SCons builds nested inside one
+another share a single ``-j`` budget instead of multiplying it.
+
+When SCons is run from ``make`` the parent's jobserver is found in the
+``--jobserver-auth`` (or older ``--jobserver-fds``) word of ``MAKEFLAGS``
+and a :class:`Client` is consulted by the parallel job runner before
+each task is executed.  With ``--jobserver``, SCons creates a
+:class:`Server` if there is no parent jobserver to share, and passes
+its FIFO on in ``MAKEFLAGS`` to the commands it runs.
+
+Only the POSIX forms of the protocol are supported; the FIFO form
+needs GNU make 4.4 or later in the children.
+"""
+
+import os
+import select
+import shutil
+import tempfile
+import threading
+
+AUTH_PREFIXES = ('--jobserver-auth=', '--jobserver-fds=')
+
+
+def parse_makeflags(makeflags):
+    """Return the jobserver described by *makeflags*, or ``None``.
+
+    The result is ``('fifo', path)`` or ``('pipe', (rfd, wfd))``.  If
+    the jobserver is given more than once, the last one wins, like
+    ``make`` itself.  Negative descriptors mean the parent did not
+    make its jobserver available to this command.
+    """
+    auth = None
+    for word in makeflags.split():
+        for prefix in AUTH_PREFIXES:
+            if word.startswith(prefix):
+                auth = word[len(prefix):]
+    if auth is None:
+        return None
+    if auth.startswith('fifo:'):
+        return ('fifo', auth[len('fifo:'):])
+    rfd, _, wfd = auth.partition(',')
+    try:
+        rfd, wfd = int(rfd), int(wfd)
+    except ValueError:
+        # The Windows form, a semaphore name, is not supported.
+        return None
+    if rfd < 0 or wfd < 0:
+        return None
+    return ('pipe', (rfd, wfd))
+
+
+class Client:
+    """Takes a jobserver token for each task beyond the first.
+
+    Has the same :meth:`admit` and :meth:`release` interface as
+    :class:`~SCons.Taskmaster.Memory.AdmissionController`.  *rfd* is
+    polled before it is read, so that a wait for a token can be
+    abandoned when the build is interrupted; it should be non-blocking
+    in case another process takes the token first.  The descriptors in
+    *owned* were opened for this client, and are closed by :meth:`close`.
+    """
+
+    # Number of seconds between checks for an interrupt, or for the
+    # implicit slot being freed, while waiting for a token.
+    poll_interval = 0.5
+
+    def __init__(self, rfd, wfd, makeflags=None, owned=()) -> None:
+        self.rfd = rfd
+        self.wfd = wfd
+        self.owned = list(owned)
+        # What to pass on to child commands in MAKEFLAGS to share
+        # this jobserver with them, if that is possible.
+        self.makeflags = makeflags
+        self.lock = threading.Lock()
+        # Guarded by `lock`.
+        self.implicit = True
+
+    @classmethod
+    def from_makeflags(cls, makeflags):
+        """Return a client for the jobserver in *makeflags*, or ``None``.
+
+        The jobserver is ignored if its FIFO cannot be opened or its
+        descriptors were not inherited.
+        """
+        auth = parse_makeflags(makeflags)
+        if auth is None:
+            return None
+        kind, where = auth
+        try:
+            if kind == 'fifo':
+                # Our own open file description, so making it
+                # non-blocking does not affect anyone else.
+                fd = os.open(where, os.O_RDWR | os.O_NONBLOCK)
+                return cls(fd, fd, '--jobserver-auth=fifo:' + where, (fd,))
+            rfd, wfd = where
+            os.fstat(rfd)
+            os.fstat(wfd)
+        except (OSError, AttributeError):
+            return None
+        # The inherited pipe shares its file description, and so its
+        # blocking mode, with the other processes using it. On Linux
+        # a private description can be opened through /proc; failing
+        # that, the read is left blocking.
+        try:
+            rfd = os.open('/proc/self/fd/%d' % rfd, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return cls(rfd, wfd)
+        return cls(rfd, wfd, owned=(rfd,))
+
+    def _read_token(self):
+        try:
+            return os.read(self.rfd, 1)
+        except (BlockingIOError, InterruptedError):
+            return None
+
+    def admit(self, task, interrupted=lambda: False):
+        """Wait for a job slot for *task*.
+
+        Returns the token to pass to :meth:`release`: ``None`` for the
+        implicit slot, or the byte read from the jobserver.  Stops
+        waiting, without a slot, if *interrupted* returns true.
+        """
+        while True:
+            with self.lock:
+                if self.implicit:
+                    self.implicit = False
+                    return None
+            if interrupted():
+                return b''
+            readable, _, _ = select.select([self.rfd], [], [], self.poll_interval)
+            if readable:
+                token = self._read_token()
+                if token is not None:
+                    # An empty token means the jobserver went away.
+                    return token
+
+    def release(self, token) -> None:
+        """Give back the job slot taken by :meth:`admit`."""
+        if token is None:
+            with self.lock:
+                self.implicit = True
+        elif token:
+            try:
+                os.write(self.wfd, token)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Close the descriptors opened for this client."""
+        while self.owned:
+            try:
+                os.close(self.owned.pop())
+            except OSError:
+                pass
+
+
+class Server:
+    """A jobserver FIFO holding *jobs* - 1 tokens.
+
+    :meth:`client` returns the :class:`Client` through which this
+    process takes its own job slots.
+    """
+
+    def __init__(self, jobs) -> None:
+        self.jobs = jobs
+        self.dir = tempfile.mkdtemp(prefix='scons-jobserver-')
+        self.path = os.path.join(self.dir, 'fifo')
+        try:
+            os.mkfifo(self.path, 0o600)
+            self.fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+            os.write(self.fd, b'+' * (jobs - 1))
+        except OSError:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            raise
+
+    def client(self) -> Client:
+        return Client(self.fd, self.fd, '--jobserver-auth=fifo:' + self.path)
+
+    def close(self) -> None:
+        """Close and remove the FIFO."""
+        os.close(self.fd)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,124 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import unittest
+
+import TestCmd
+
+from SCons.Taskmaster.Jobserver import Client, Server, parse_makeflags
+
+
+class JobserverTestCase(unittest.TestCase):
+
+    def test_parse_makeflags(self) -> None:
+        """Test finding the jobserver in MAKEFLAGS"""
+        assert parse_makeflags('') is None
+        assert parse_makeflags('-j4') is None
+        auth = parse_makeflags(' -j4 --jobserver-auth=fifo:/tmp/GMfifo1')
+        assert auth == ('fifo', '/tmp/GMfifo1'), auth
+        auth = parse_makeflags('k -j --jobserver-fds=3,4')
+        assert auth == ('pipe', (3, 4)), auth
+        auth = parse_makeflags('--jobserver-auth=3,4 --jobserver-auth=5,6')
+        assert auth == ('pipe', (5, 6)), auth
+        assert parse_makeflags('--jobserver-auth=-2,-2') is None
+        assert parse_makeflags('--jobserver-auth=gmake_semaphore_1234') is None
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), "requires os.mkfifo")
+    def test_server(self) -> None:
+        """Test taking and giving back job slots"""
+        server = Server(3)
+        try:
+            client = server.client()
+            assert client.makeflags == '--jobserver-auth=fifo:' + server.path
+            first = client.admit(None)
+            assert first is None, first
+            second = client.admit(None)
+            third = client.admit(None)
+            assert second == third == b'+', (second, third)
+            # All slots are taken, so only an interrupt ends the wait.
+            client.poll_interval = 0.01
+            assert client.admit(None, lambda: True) == b''
+            client.release(b'')
+            client.release(second)
+            client.release(first)
+            # The implicit slot is preferred.
+            assert client.admit(None) is None
+            client.release(None)
+            client.release(third)
+            # The server's descriptor is left for the server to close.
+            client.close()
+            assert len(os.read(server.fd, 10)) == 2
+        finally:
+            server.close()
+        assert not os.path.exists(server.path)
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), "requires os.mkfifo")
+    def test_from_makeflags(self) -> None:
+        """Test joining the jobserver of a parent make"""
+        test = TestCmd.TestCmd(workdir='')
+        assert Client.from_makeflags('-j4') is None
+        fifo = test.workpath('fifo')
+        assert Client.from_makeflags('--jobserver-auth=fifo:' + fifo) is None
+        os.mkfifo(fifo)
+        client = Client.from_makeflags('-j4 --jobserver-auth=fifo:' + fifo)
+        try:
+            assert client.makeflags == '--jobserver-auth=fifo:' + fifo
+            os.write(client.wfd, b'+')
+            assert client.admit(None) is None
+            assert client.admit(None) == b'+'
+        finally:
+            client.close()
+        with self.assertRaises(OSError):
+            os.fstat(client.rfd)
+
+        rfd, wfd = os.pipe()
+        try:
+            client = Client.from_makeflags('--jobserver-auth=%d,%d' % (rfd, wfd))
+            assert client.makeflags is None
+            os.write(wfd, b'x')
+            assert client.admit(None) is None
+            token = client.admit(None)
+            assert token == b'x', token
+            client.release(token)
+            assert os.read(rfd, 1) == b'x'
+            client.close()
+            # Only the descriptor opened for the client is closed.
+            os.fstat(rfd)
+            os.fstat(wfd)
+        finally:
+            os.close(rfd)
+            os.close(wfd)
+        bad = max(rfd, wfd) + 100
+        assert Client.from_makeflags('--jobserver-auth=%d,%d' % (bad, bad)) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,249 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Memory-aware admission control for parallel builds.
+
+An :class:`AdmissionController` is consulted by the parallel job runner
+before each task is executed.  It samples the memory available on the
+system (``MemAvailable`` from ``/proc/meminfo``) and the memory pressure
+reported by the kernel (``/proc/pressure/memory``), and holds the task
+back while starting it would leave less free memory than requested, or
+while the pressure is above the limit.  The peak memory use of the
+commands each task spawned is recorded per builder in a
+:class:`MemoryHistory`, so the next build can account for what a task
+is about to use before that shows up in the system figures.
+
+Where the ``/proc`` files are not available the controller never holds
+tasks back.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import SCons.Platform.posix
+from SCons.Taskmaster.History import History
+
+MEMORY_SUFFIX = ".memory"
+
+meminfo_path = '/proc/meminfo'
+pressure_path = '/proc/pressure/memory'
+
+_local = threading.local()
+
+
+def available_memory():
+    """Return the memory available for new work, in bytes, or ``None``."""
+    try:
+        with open(meminfo_path) as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def memory_pressure():
+    """Return the "some" memory pressure over the last 10 seconds.
+
+    This is the percentage of time at least one task was stalled
+    waiting for memory, or ``None`` if it is not available.
+    """
+    try:
+        with open(pressure_path) as f:
+            for line in f:
+                fields = line.split()
+                if fields and fields[0] == 'some':
+                    for field in fields[1:]:
+                        name, _, value = field.partition('=')
+                        if name == 'avg10':
+                            return float(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def record_child_rss(nbytes) -> None:
+    """Note the peak resident size of a finished child process.
+
+    Called by the spawn functions; the largest value seen while the
+    current thread is executing an admitted task is recorded against
+    the task's builder when it is released.
+    """
+    peak = getattr(_local, 'peak', None)
+    if peak is not None and nbytes > peak:
+        _local.peak = nbytes
+
+
+def wait_process(proc) -> int:
+    """Wait for the :class:`subprocess.Popen` object *proc* to finish.
+
+    While an admitted task is executing on this thread, the child is
+    reaped with :func:`os.wait4` so that its peak resident size (which
+    includes that of its own waited-for children) can be recorded.
+    Returns the exit code like :meth:`subprocess.Popen.wait`.
+    """
+    if getattr(_local, 'peak', None) is None or not hasattr(os, 'wait4'):
+        return proc.wait()
+    try:
+        _, status, rusage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        return proc.wait()
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes.
+    scale = 1 if sys.platform == 'darwin' else 1024
+    record_child_rss(rusage.ru_maxrss * scale)
+    return proc.returncode
+
+
+def set_wait_hook(enable) -> None:
+    """Have the POSIX spawn functions wait with :func:`wait_process`.
+
+    Enabled while memory admission control is in use; otherwise spawned
+    commands are waited for with :meth:`subprocess.Popen.wait` as usual.
+    """
+    SCons.Platform.posix.wait_hook = wait_process if enable else None
+
+
+def builder_key(task):
+    """Return the name memory estimates for *task* are recorded under."""
+    node = task.node
+    builder = node.get_builder()
+    if builder is None:
+        return None
+    return builder.get_name(node.get_build_env())
+
+
+class MemoryHistory(History):
+    """Peak memory use of the commands run by each builder.
+
+    Entries are keyed by builder name and hold the largest peak
+    resident size, in bytes, seen for a single task of that builder.
+    """
+
+    def estimate(self, key) -> int:
+        return self.entries.get(key, 0)
+
+    def update(self, key, peak) -> None:
+        if peak > self.entries.get(key, 0):
+            self.entries[key] = peak
+            self.dirty = True
+
+
+class AdmissionController:
+    """Decides when the job runner may start another task.
+
+    A task is admitted if no other admitted task is running, so the
+    build always makes progress, or if the memory pressure is at most
+    *max_pressure* and the available memory, less the estimates of the
+    recently admitted tasks, less the estimate for this task, is at
+    least *min_free* bytes.  Either limit may be ``None``.
+
+    A task counts as running from the moment it is admitted, so the
+    controller should be the last one the job runner consults: a task
+    still waiting for another controller must not hold memory in
+    reserve or let later tasks past the progress rule.
+    """
+
+    # Minimum number of seconds between samples of the /proc files.
+    sample_interval = 0.5
+
+    # Number of seconds an admitted task's estimate is held in reserve,
+    # giving its commands time to show up in the available memory.
+    settle_time = 5.0
+
+    def __init__(self, min_free=None, max_pressure=None, history=None) -> None:
+        self.min_free = min_free
+        self.max_pressure = max_pressure
+        self.history = history if history is not None else MemoryHistory()
+        self.cv = threading.Condition(threading.Lock())
+        # Guarded by `cv`.
+        self.running = 0
+        self.pending = deque()
+        self.available = None
+        self.pressure = None
+        self.sampled = None
+
+    def _sample(self) -> None:
+        now = time.monotonic()
+        if self.sampled is None or now - self.sampled >= self.sample_interval:
+            self.sampled = now
+            if self.min_free is not None:
+                self.available = available_memory()
+            if self.max_pressure is not None:
+                self.pressure = memory_pressure()
+
+    def _admissible(self, estimate) -> bool:
+        if not self.running:
+            return True
+        self._sample()
+        if self.pressure is not None and self.pressure > self.max_pressure:
+            return False
+        if self.available is not None:
+            pending = self.pending
+            settled = time.monotonic() - self.settle_time
+            while pending and pending[0][0] < settled:
+                pending.popleft()
+            reserved = sum(e for _, e in pending)
+            if self.available - reserved - estimate < self.min_free:
+                return False
+        return True
+
+    def admit(self, task, interrupted=lambda: False):
+        """Wait until *task* may start.
+
+        Returns a token to pass to :meth:`release` once the task has
+        finished executing.  Stops waiting if *interrupted* returns true.
+        """
+        key = builder_key(task)
+        estimate = self.history.estimate(key)
+        with self.cv:
+            while not self._admissible(estimate) and not interrupted():
+                self.cv.wait(self.sample_interval)
+            self.running += 1
+            if estimate:
+                self.pending.append((time.monotonic(), estimate))
+        _local.peak = 0
+        return key
+
+    def release(self, key) -> None:
+        """Note that the task admitted as *key* has finished."""
+        peak = getattr(_local, 'peak', None)
+        _local.peak = None
+        with self.cv:
+            self.running -= 1
+            if key is not None and peak:
+                self.history.update(key, peak)
+            self.cv.notify_all()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
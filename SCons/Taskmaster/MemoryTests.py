@@ -0,0 +1,199 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import TestCmd
+
+import SCons.Platform.posix
+import SCons.Taskmaster.Memory
+from SCons.Taskmaster.Memory import AdmissionController, MemoryHistory
+
+MEMINFO = """\
+MemTotal:       16303848 kB
+MemFree:          931536 kB
+MemAvailable:    8151924 kB
+Buffers:          525456 kB
+"""
+
+PRESSURE = """\
+some avg10=12.50 avg60=3.20 avg300=0.80 total=1234567
+full avg10=1.00 avg60=0.20 avg300=0.00 total=12345
+"""
+
+
+class Builder:
+    def __init__(self, name) -> None:
+        self.name = name
+
+    def get_name(self, env):
+        return self.name
+
+
+class Node:
+    def __init__(self, builder) -> None:
+        self.builder = builder
+
+    def get_builder(self):
+        return self.builder
+
+    def get_build_env(self):
+        return None
+
+
+class Task:
+    def __init__(self, name) -> None:
+        self.node = Node(Builder(name))
+
+
+class MemoryTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.save_paths = (SCons.Taskmaster.Memory.meminfo_path,
+                           SCons.Taskmaster.Memory.pressure_path)
+        self.test.write('meminfo', MEMINFO)
+        self.test.write('pressure', PRESSURE)
+        SCons.Taskmaster.Memory.meminfo_path = self.test.workpath('meminfo')
+        SCons.Taskmaster.Memory.pressure_path = self.test.workpath('pressure')
+
+    def tearDown(self) -> None:
+        (SCons.Taskmaster.Memory.meminfo_path,
+         SCons.Taskmaster.Memory.pressure_path) = self.save_paths
+
+    def test_available_memory(self) -> None:
+        """Test reading the available memory"""
+        available = SCons.Taskmaster.Memory.available_memory()
+        assert available == 8151924 * 1024, available
+        SCons.Taskmaster.Memory.meminfo_path = self.test.workpath('nonexistent')
+        assert SCons.Taskmaster.Memory.available_memory() is None
+
+    def test_memory_pressure(self) -> None:
+        """Test reading the memory pressure"""
+        pressure = SCons.Taskmaster.Memory.memory_pressure()
+        assert pressure == 12.5, pressure
+        SCons.Taskmaster.Memory.pressure_path = self.test.workpath('nonexistent')
+        assert SCons.Taskmaster.Memory.memory_pressure() is None
+
+    def test_history(self) -> None:
+        """Test recording peak memory use per builder"""
+        history = MemoryHistory(self.test.workpath('history'))
+        assert history.estimate('Program') == 0
+        history.update('Program', 1000)
+        history.update('Program', 500)
+        assert history.estimate('Program') == 1000
+        history.write()
+        history = MemoryHistory(self.test.workpath('history'))
+        assert history.estimate('Program') == 1000
+
+    def test_admission(self) -> None:
+        """Test holding back tasks while memory is short"""
+        history = MemoryHistory()
+        history.update('Program', 3 * 1024 ** 3)
+        ac = AdmissionController(min_free=1024 ** 3, history=history)
+
+        # The first task is always admitted.
+        first = ac.admit(Task('Program'))
+        assert first == 'Program', first
+        assert ac.running == 1
+
+        # About 7.8G available, less 3G pending for the first task,
+        # less 3G for this one, leaves more than 1G.
+        second = ac.admit(Task('Program'))
+        assert ac.running == 2
+        assert not ac._admissible(3 * 1024 ** 3)
+        assert ac._admissible(0)
+
+        # An interrupted wait gives up.
+        ac.admit(Task('Program'), lambda: True)
+        assert ac.running == 3
+        ac.release(second)
+        ac.release(first)
+        ac.release(None)
+        assert ac.running == 0
+
+        ac = AdmissionController(max_pressure=10.0)
+        ac.admit(Task('Object'))
+        assert not ac._admissible(0)
+        ac.max_pressure = 20.0
+        assert ac._admissible(0)
+
+    @unittest.skipUnless(hasattr(os, 'wait4'), "requires os.wait4")
+    def test_wait_process(self) -> None:
+        """Test recording the peak memory use of a command"""
+        history = MemoryHistory()
+        ac = AdmissionController(min_free=0, history=history)
+        key = ac.admit(Task('Command'))
+        cmd = [sys.executable, '-c', 'x = bytearray(64 * 1024 * 1024); print(len(x))']
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+        status = SCons.Taskmaster.Memory.wait_process(proc)
+        assert status == 0, status
+        proc = subprocess.Popen([sys.executable, '-c', 'raise SystemExit(3)'])
+        status = SCons.Taskmaster.Memory.wait_process(proc)
+        assert status == 3, status
+        ac.release(key)
+        assert history.estimate('Command') >= 64 * 1024 * 1024, history.entries
+
+        # Outside an admitted task, nothing is recorded.
+        proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+        assert SCons.Taskmaster.Memory.wait_process(proc) == 0
+        assert len(history) == 1
+
+    @unittest.skipUnless(hasattr(os, 'wait4'), "requires os.wait4")
+    def test_set_wait_hook(self) -> None:
+        """Test that spawned commands are only reaped by wait4 when enabled"""
+        cmd = [sys.executable, '-c', 'raise SystemExit(3)']
+        history = MemoryHistory()
+        ac = AdmissionController(min_free=0, history=history)
+        key = ac.admit(Task('Command'))
+        try:
+            with mock.patch('os.wait4', side_effect=os.wait4) as wait4:
+                status = SCons.Platform.posix.exec_subprocess(cmd, os.environ)
+                assert status == 3, status
+                assert not wait4.called
+
+                SCons.Taskmaster.Memory.set_wait_hook(True)
+                try:
+                    status = SCons.Platform.posix.exec_subprocess(cmd, os.environ)
+                finally:
+                    SCons.Taskmaster.Memory.set_wait_hook(False)
+                assert status == 3, status
+                assert wait4.called
+            assert SCons.Platform.posix.wait_hook is None
+        finally:
+            ac.release(key)
+        assert 'Command' in history.entries, history.entries
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,172 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""Speculative up-to-date checking ahead of the Taskmaster.
+
+The Taskmaster decides whether each node is up to date one at a time,
+under its lock, and on an incremental build most of that time goes on
+``stat`` calls, reading stored signatures from the ``.sconsign`` data
+and computing the content signatures of source files.  :func:`prepass`
+does that work for every file reachable from the targets through
+explicit dependencies on a pool of threads before the walk starts.
+The results land in the nodes' memoized values, where the Taskmaster
+finds them.
+
+Only dependencies known without scanning are visited: sources,
+``Depends()`` dependencies and the entries of directory targets.
+Content signatures are computed only for existing source files used
+by targets whose environment decides on content, so that no more
+files are read than the build would read anyway.  Where the decider
+looks at the timestamp first, only source files whose timestamp or
+size differs from their stored signature information are hashed, as
+after a fresh checkout or a switch of branches.  The hashing functions
+release the GIL, so the files are read and hashed in parallel.
+"""
+
+import concurrent.futures
+
+import SCons.Defaults
+import SCons.Environment
+import SCons.Node.FS
+
+# What is wanted of a file, in increasing order: a source file may be
+# used by targets with different deciders, and the most wanted wins.
+NO_CONTENT = 0
+CHANGED_CONTENT = 1
+CONTENT = 2
+
+
+def _wants_content(env) -> int:
+    """Return which content signatures *env*'s decider will ask for.
+
+    That is :data:`CONTENT` if sources are decided by content,
+    :data:`CHANGED_CONTENT` if by content only once their timestamp
+    has changed, else :data:`NO_CONTENT`.
+    """
+    decide = env.decide_source
+    if decide is SCons.Environment.default_decide_source:
+        decide = SCons.Defaults.DefaultEnvironment().decide_source
+    func = getattr(decide, '__func__', None)
+    if func is SCons.Environment.Base._changed_content:
+        return CONTENT
+    if func is SCons.Environment.Base._changed_timestamp_then_content:
+        return CHANGED_CONTENT
+    return NO_CONTENT
+
+
+def _is_plain_file(node) -> bool:
+    """Return whether *node* is a file which is safe to look at early.
+
+    Sources in a variant directory are left alone, as checking whether
+    they exist copies them there.
+    """
+    if not isinstance(node, SCons.Node.FS.File):
+        return False
+    return node.is_derived() or node.srcnode() is node
+
+
+def collect(targets):
+    """Find the files reachable from *targets* without scanning.
+
+    Returns a dictionary mapping each file to whether its content
+    signature is wanted, as one of :data:`NO_CONTENT` (always for
+    derived files), :data:`CHANGED_CONTENT` or :data:`CONTENT`.  The directory
+    holding each file has its ``.sconsign`` data loaded, as that is not
+    safe to do from several threads.
+    """
+    files = {}
+    seen = set()
+    stack = list(targets)
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        if isinstance(node, SCons.Node.FS.Entry):
+            # As the Taskmaster would, decide what it is first.
+            node = node.disambiguate()
+        if isinstance(node, SCons.Node.FS.Dir):
+            stack.extend(n for name, n in node.entries.items()
+                         if name not in ('.', '..'))
+            continue
+        if not _is_plain_file(node):
+            continue
+        files.setdefault(node, NO_CONTENT)
+        node.dir.sconsign()
+        # Look up any Repository copy now, as that may create nodes.
+        node.rfile()
+        if not node.has_builder():
+            continue
+        try:
+            content = _wants_content(node.get_build_env())
+        except Exception:
+            content = NO_CONTENT
+        children = list(node.sources) + list(node.depends)
+        for child in children:
+            if isinstance(child, SCons.Node.FS.Entry):
+                child = child.disambiguate()
+            if content and _is_plain_file(child) and not child.has_builder():
+                if content > files.get(child, NO_CONTENT):
+                    files[child] = content
+            stack.append(child)
+    return files
+
+
+def _stat_changed(node, ninfo) -> bool:
+    """Return whether *node* differs in timestamp or size from *ninfo*."""
+    rfile = node.rfile()
+    return (getattr(ninfo, 'timestamp', None) != rfile.getmtime()
+            or getattr(ninfo, 'size', None) != rfile.getsize())
+
+
+def _check(node, content) -> None:
+    # Stick to methods which only read the file system and memoize
+    # what they find: exists() may copy a file into a variant directory.
+    try:
+        info = node.get_stored_info()
+        if node.rfile().stat() is None or not content:
+            return
+        if content == CONTENT or _stat_changed(node, info.ninfo):
+            node.get_csig()
+    except Exception:
+        # The Taskmaster will run into it again, and report it.
+        pass
+
+
+def prepass(targets, num_jobs) -> int:
+    """Check the files reachable from *targets* on *num_jobs* threads.
+
+    Returns the number of files checked.
+    """
+    files = collect(targets)
+    with concurrent.futures.ThreadPoolExecutor(num_jobs) as pool:
+        for _ in pool.map(_check, files.keys(), files.values()):
+            pass
+    return len(files)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,140 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+
+import TestCmd
+
+import SCons.Environment
+import SCons.Node.FS
+import SCons.SConsign
+import SCons.Taskmaster.Prepass
+
+
+class PrepassTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.save_cwd = os.getcwd()
+        self.test.subdir('sub')
+        self.test.write('a.in', "a.in\n")
+        self.test.write(['sub', 'b.in'], "b.in\n")
+        os.chdir(self.test.workpath(''))
+        SCons.Node.FS.default_fs = None
+        SCons.SConsign.Reset()
+
+    def tearDown(self) -> None:
+        os.chdir(self.save_cwd)
+        SCons.Node.FS.default_fs = None
+        SCons.SConsign.Reset()
+
+    def test_collect(self) -> None:
+        """Test finding the files reachable from the targets"""
+        env = SCons.Environment.Environment(tools=[])
+        env.Decider('content')
+        a = env.Command('a.out', 'a.in', "cp $SOURCE $TARGET")[0]
+        b = env.Command('sub/b.out', 'sub/b.in', "cp $SOURCE $TARGET")[0]
+        env.Depends(b, a)
+        fs = SCons.Node.FS.get_default_fs()
+        Prepass = SCons.Taskmaster.Prepass
+        files = Prepass.collect([b])
+        assert files == {b: Prepass.NO_CONTENT, a: Prepass.NO_CONTENT,
+                         fs.File('a.in'): Prepass.CONTENT,
+                         fs.File('sub/b.in'): Prepass.CONTENT}, files
+
+        # Sources of a target which decides by timestamp are visited,
+        # but their contents are not wanted.
+        tenv = SCons.Environment.Environment(tools=[])
+        tenv.Decider('timestamp-newer')
+        c = tenv.Command('c.out', 'a.in', "cp $SOURCE $TARGET")[0]
+        files = Prepass.collect([c])
+        assert files == {c: Prepass.NO_CONTENT,
+                         fs.File('a.in'): Prepass.NO_CONTENT}, files
+
+        # Sources of a target which decides by timestamp, then content
+        # are hashed if changed, unless another target wants them anyway.
+        menv = SCons.Environment.Environment(tools=[])
+        menv.Decider('content-timestamp')
+        d = menv.Command('d.out', 'a.in', "cp $SOURCE $TARGET")[0]
+        files = Prepass.collect([d])
+        assert files[fs.File('a.in')] == Prepass.CHANGED_CONTENT, files
+        files = Prepass.collect([a, d])
+        assert files[fs.File('a.in')] == Prepass.CONTENT, files
+
+        # Directory targets take in their entries.
+        files = SCons.Taskmaster.Prepass.collect([fs.Dir('sub')])
+        assert b in files and files[fs.File('sub/b.in')], files
+
+    def test_prepass(self) -> None:
+        """Test memoizing what the Taskmaster will look at"""
+        env = SCons.Environment.Environment(tools=[])
+        env.Decider('content')
+        a = env.Command('a.out', 'a.in', "cp $SOURCE $TARGET")[0]
+        b = env.Command('b.out', 'missing.in', "cp $SOURCE $TARGET")[0]
+        fs = SCons.Node.FS.get_default_fs()
+        count = SCons.Taskmaster.Prepass.prepass([a, b], 4)
+        assert count == 4, count
+        source = fs.File('a.in')
+        assert source._memo['stat'] is not None
+        assert source.get_ninfo().csig == SCons.Util.hash_signature("a.in\n")
+        missing = fs.File('missing.in')
+        assert missing._memo['stat'] is None
+        assert not hasattr(missing.get_ninfo(), 'csig')
+        assert 'get_stored_info' in a._memo
+
+    def test_prepass_changed(self) -> None:
+        """Test hashing only changed sources for content-timestamp"""
+        env = SCons.Environment.Environment(tools=[])
+        env.Decider('content-timestamp')
+        a = env.Command('a.out', 'a.in', "cp $SOURCE $TARGET")[0]
+        b = env.Command('b.out', 'sub/b.in', "cp $SOURCE $TARGET")[0]
+        fs = SCons.Node.FS.get_default_fs()
+        a_in = fs.File('a.in')
+        b_in = fs.File('sub/b.in')
+
+        # Record b.in as it is now, and a.in with another size.
+        for node, size in ((a_in, 0), (b_in, b_in.getsize())):
+            entry = SCons.SConsign.SConsignEntry()
+            entry.binfo = node.new_binfo()
+            entry.ninfo = node.new_ninfo()
+            entry.ninfo.timestamp = node.getmtime()
+            entry.ninfo.size = size
+            entry.ninfo.csig = 'stored'
+            node.dir.sconsign().set_entry(node.name, entry)
+            node.clear_memoized_values()
+
+        count = SCons.Taskmaster.Prepass.prepass([a, b], 4)
+        assert count == 4, count
+        assert a_in.get_ninfo().csig == SCons.Util.hash_signature("a.in\n")
+        assert not hasattr(b_in.get_ninfo(), 'csig')
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
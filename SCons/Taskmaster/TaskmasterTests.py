@@ -68,6 +68,7 @@ class Node:
         self._bsig_val = None
         self._current_val = 0
         self.always_build = None
+        self.pool = None
 
     def disambiguate(self):
         return self
@@ -541,6 +542,113 @@ class TaskmasterTestCase(unittest.TestCase):
         s = n2.get_state()
         assert s == SCons.Node.executed, s
 
+    def test_next_task_critical_path(self) -> None:
+        """Test fetching tasks ordered by critical path
+        """
+        import SCons.Taskmaster.History
+
+        history = SCons.Taskmaster.History.DurationHistory()
+        history.update('n2', 1.0, 5.0)
+        history.update('n3', 2.0, 3.0)
+        history.update('n4', 1.0, 1.0)
+        critical_path = SCons.Taskmaster.History.CriticalPath(history)
+
+        n1 = Node("n1")
+        n2 = Node("n2")
+        n3 = Node("n3")
+        s1 = Node("s1")
+        s1.builder = None
+        n4 = Node("n4", [n1, n2, n3, s1])
+        tm = SCons.Taskmaster.Taskmaster([n4], critical_path=critical_path)
+
+        # The source is handed out as soon as it is found.
+        t = tm.next_task()
+        assert t.get_target() == s1, t.get_target()
+        t.executed()
+        t.postprocess()
+
+        order = []
+        while True:
+            t = tm.next_task()
+            if t is None:
+                break
+            order.append(str(t.get_target()))
+            t.prepare()
+            t.execute()
+            assert t.execute_time is not None
+            t.executed()
+            t.postprocess()
+        assert order == ['n2', 'n3', 'n1', 'n4'], order
+        predicted, actual, path = critical_path.critical_path()
+        assert [name for name, duration in path][-1] == 'n4', path
+
+        # Nothing is timed for a target retrieved from the cache.
+        n5 = Node("n5")
+        n5.cached = True
+        tm = SCons.Taskmaster.Taskmaster([n5], time_tasks=True)
+        t = tm.next_task()
+        t.prepare()
+        t.execute()
+        assert t.execute_time is None, t.execute_time
+        t.executed()
+        t.postprocess()
+
+        # Stopping the build drops the queued nodes.
+        n1 = Node("n1")
+        n2 = Node("n2")
+        n3 = Node("n3", [n1, n2])
+        tm = SCons.Taskmaster.Taskmaster([n3], critical_path=critical_path)
+        t = tm.next_task()
+        assert t.get_target() == n2, t.get_target()
+        assert len(tm.ready_nodes) == 1, tm.ready_nodes
+        tm.stop()
+        assert tm.next_task() is None
+        assert tm.ready_nodes == [], tm.ready_nodes
+
+    def test_next_task_pools(self) -> None:
+        """Test holding back tasks whose job pool is full
+        """
+        n1 = Node("n1")
+        n2 = Node("n2")
+        n3 = Node("n3")
+        n4 = Node("n4")
+        n5 = Node("n5", [n1, n2, n3, n4])
+        for n in (n1, n2, n3):
+            n.pool = 'link'
+
+        tm = SCons.Taskmaster.Taskmaster([n5], pool_sizes={'link': 2})
+        tasks = [tm.next_task() for _ in range(3)]
+        names = [str(t.get_target()) for t in tasks]
+        assert 'n4' in names, names
+        held = [n for n in (n1, n2, n3) if str(n) not in names]
+        assert len(held) == 1, names
+        assert tm.pool_waiting == {'link': held}, tm.pool_waiting
+        assert tm.pool_jobs == {'link': 2}, tm.pool_jobs
+        assert tm.next_task() is None
+
+        # Finishing a task in the pool releases the held node.
+        t = [t for t in tasks if t.get_target().pool][0]
+        t.executed()
+        t.postprocess()
+        assert tm.pool_waiting == {}, tm.pool_waiting
+        assert tm.pool_jobs == {'link': 1}, tm.pool_jobs
+        t = tm.next_task()
+        assert t.get_target() == held[0], t.get_target()
+        assert tm.pool_jobs == {'link': 2}, tm.pool_jobs
+
+        # Stopping the build drops the held nodes.
+        n1 = Node("n1")
+        n2 = Node("n2")
+        n3 = Node("n3", [n1, n2])
+        n1.pool = n2.pool = 'link'
+        tm = SCons.Taskmaster.Taskmaster([n3], pool_sizes={'link': 1})
+        t = tm.next_task()
+        assert tm.next_task() is None
+        assert len(tm.pool_waiting['link']) == 1, tm.pool_waiting
+        tm.stop()
+        assert tm.next_task() is None
+        assert tm.pool_waiting == {}, tm.pool_waiting
+
     def test_make_ready_out_of_date(self) -> None:
         """Test the Task.make_ready() method's list of out-of-date Nodes
         """
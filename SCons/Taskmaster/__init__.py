@@ -46,8 +46,10 @@ Task
     The Taskmaster instantiates a Task object for each (set of)
     target(s) that it decides need to be evaluated and/or built.
 """
+import heapq
 import io
 import sys
+import time
 from abc import ABC, abstractmethod
 from itertools import chain
 import logging
@@ -56,6 +58,7 @@ import SCons.Errors
 import SCons.Node
 import SCons.Warnings
 from SCons.Util import DispatchingFormatter
+from SCons.Util.stats import trace_events
 
 StateString = SCons.Node.StateString
 NODE_NO_STATE = SCons.Node.no_state
@@ -137,6 +140,7 @@ class Task(ABC):
         self.targets = targets
         self.top = top
         self.node = node
+        self.execute_time = None
         self.exc_clear()
 
     def trace_message(self, node, description: str='node') -> None:
@@ -228,7 +232,9 @@ class Task(ABC):
         try:
             cached_targets = []
             for t in self.targets:
-                if not t.retrieve_from_cache():
+                with trace_events.span('retrieve', 'cache', target=t):
+                    retrieved = t.retrieve_from_cache()
+                if not retrieved:
                     break
                 cached_targets.append(t)
             if len(cached_targets) < len(self.targets):
@@ -243,9 +249,18 @@ class Task(ABC):
                     except OSError as e:
                         SCons.Warnings.warn(SCons.Warnings.CacheCleanupErrorWarning,
                             "Failed copying all target files from cache, Error while attempting to remove file %s retrieved from cache: %s" % (t.get_internal_path(), e))
-                self.targets[0].build()
+                # Only the build itself is timed: a task satisfied from
+                # the cache has no duration to record, and retrieving or
+                # pushing files says nothing about the cost of the build.
+                if self.tm.time_tasks:
+                    start_time = time.perf_counter()
+                with trace_events.span('execute', 'action', target=self.targets[0]):
+                    self.targets[0].build()
+                if self.tm.time_tasks:
+                    self.execute_time = time.perf_counter() - start_time
                 for t in self.targets:
-                    t.push_to_cache()
+                    with trace_events.span('push', 'cache', target=t):
+                        t.push_to_cache()
             else:
                 for t in cached_targets:
                     t.cached = 1
@@ -296,6 +311,13 @@ class Task(ABC):
         if T:
             self.trace_message(self.node)
 
+        if self.execute_time is not None and self.tm.critical_path is not None:
+            # Record before the targets get a chance to release their
+            # executors below; the children are needed for the graph.
+            executor = self.node.get_executor()
+            children = executor.get_all_children() if executor else []
+            self.tm.critical_path.record(self.node, self.execute_time, children)
+
         for t in self.targets:
             if t.get_state() == NODE_EXECUTING:
                 for side_effect in t.side_effects:
@@ -366,6 +388,27 @@ class Task(ABC):
 
         self.tm.will_not_build(self.targets, lambda n: n.set_state(NODE_FAILED))
 
+    def cancel(self) -> None:
+        """
+        Abandons a prepared task which will not be executed, because the
+        build was stopped before it started.
+
+        The targets go back to having no state, like nodes which were
+        never visited, and are removed from the pending children.
+        """
+        T = self.tm.trace
+        if T:
+            self.trace_message(self.node)
+
+        for t in self.targets:
+            t.set_state(NODE_NO_STATE)
+            for s in t.side_effects:
+                if s.get_state() == NODE_EXECUTING:
+                    s.set_state(NODE_NO_STATE)
+        self.tm.will_not_build(self.targets)
+        if self.tm.pool_claims:
+            self.tm.release_pool(self.node)
+
     def make_ready_all(self) -> None:
         """
         Marks all targets in a task ready for execution.
@@ -445,6 +488,9 @@ class Task(ABC):
         if T:
             self.trace_message(self.node)
 
+        if self.tm.pool_claims:
+            self.tm.release_pool(self.node)
+
         # We may have built multiple targets, some of which may have
         # common parents waiting for this build.  Count up how many
         # targets each parent was waiting for so we can subtract the
@@ -604,9 +650,30 @@ def find_cycle(stack, visited):
 class Taskmaster:
     """
     The Taskmaster for walking the dependency DAG.
+
+    If a :class:`~SCons.Taskmaster.History.CriticalPath` object is
+    supplied as *critical_path*, ready nodes which have a builder are
+    not handed out in the order the walk finds them.  Instead, up to
+    :attr:`ready_window` of them are collected and the one with the
+    longest remaining downstream path (according to the durations
+    recorded by previous builds) is handed out first.
+
+    If *time_tasks* is true, or a *critical_path* is supplied, the
+    wall-clock time each task takes to build its targets is stored in
+    its :attr:`Task.execute_time`, which stays ``None`` for a task whose
+    targets were retrieved from the cache.
+
+    *pool_sizes* maps the names of the job pools set by ``SetPool()``
+    to how many tasks for targets in each may be handed out at once.
     """
 
-    def __init__(self, targets=[], tasker=None, order=None, trace=None) -> None:
+    # Maximum number of ready nodes collected before choosing one
+    # when scheduling by critical path.
+    ready_window = 256
+
+    def __init__(self, targets=[], tasker=None, order=None, trace=None,
+                 critical_path=None, time_tasks: bool = False,
+                 pool_sizes=None) -> None:
         self.original_top = targets
         self.top_targets_left = targets[:]
         self.top_targets_left.reverse()
@@ -620,6 +687,14 @@ class Taskmaster:
         self.message = None
         self.next_candidate = self.find_next_candidate
         self.pending_children = set()
+        self.critical_path = critical_path
+        self.time_tasks = time_tasks or critical_path is not None
+        self.ready_nodes = []
+        self.ready_count = 0
+        self.pool_sizes = pool_sizes if pool_sizes is not None else {}
+        self.pool_jobs = {}
+        self.pool_waiting = {}
+        self.pool_claims = {}
         self.trace = False
         self.configure_trace(trace)
 
@@ -724,6 +799,14 @@ class Taskmaster:
             candidates = self.candidates
             self.candidates = []
             self.will_not_build(candidates)
+        if self.ready_nodes:
+            ready_nodes = [entry[2] for entry in self.ready_nodes]
+            self.ready_nodes = []
+            self.will_not_build(ready_nodes)
+        if self.pool_waiting:
+            waiting = list(chain.from_iterable(self.pool_waiting.values()))
+            self.pool_waiting = {}
+            self.will_not_build(waiting)
         return None
 
     def _validate_pending_children(self) -> None:
@@ -880,7 +963,8 @@ class Taskmaster:
             executor = node.get_executor()
 
             try:
-                children = executor.get_all_children()
+                with trace_events.span('scan', 'scan', target=node):
+                    children = executor.get_all_children()
             except SystemExit:
                 exc_value = sys.exc_info()[1]
                 e = SCons.Errors.ExplicitExit(node, exc_value.code)
@@ -1012,6 +1096,58 @@ class Taskmaster:
 
         return None
 
+    def _find_next_critical_node(self):
+        """
+        Finds the ready node with the longest remaining downstream path.
+
+        Ready nodes found by :meth:`_find_next_ready_node` are pushed on
+        a priority queue keyed by the downstream weight reported by the
+        critical path object, and the heaviest is returned.  Nodes
+        with no builder are returned right away, as are nodes for which
+        an exception was recorded: there is nothing to gain by delaying
+        them.  Ties (including nodes with no history) keep the order in
+        which the walk found them.
+
+        The walk continues until it runs out of candidates or the queue
+        holds :attr:`ready_window` nodes.  Nodes sitting in the queue
+        stay in the pending state, so they are checked again when popped
+        in case another task already took care of them, or one of their
+        side effects started building in the meantime.
+        """
+        T = self.trace
+        while True:
+            node = self._find_next_ready_node()
+            if node is None:
+                break
+            if self.ready_exc or not node.has_builder():
+                return node
+            priority = self.critical_path.priority(node)
+            heapq.heappush(self.ready_nodes,
+                           (-priority, self.ready_count, node))
+            self.ready_count += 1
+            if T:
+                self.trace.debug('Queued %s with priority %f' %
+                                 (self.tm_trace_node(node), priority))
+            if len(self.ready_nodes) >= self.ready_window:
+                break
+
+        while self.ready_nodes:
+            node = heapq.heappop(self.ready_nodes)[2]
+            if node.get_state() != NODE_PENDING:
+                continue
+            wait_side_effects = False
+            for se in node.get_executor().get_action_side_effects():
+                if se.get_state() == NODE_EXECUTING:
+                    se.add_to_waiting_s_e(node)
+                    wait_side_effects = True
+            if wait_side_effects:
+                continue
+            if T:
+                self.trace.debug('Dequeued %s' % self.tm_trace_node(node))
+            return node
+
+        return None
+
     def next_task(self):
         """
         Returns the next task to be executed.
@@ -1019,10 +1155,17 @@ class Taskmaster:
         This simply asks for the next Node to be evaluated, and then wraps
         it in the specific Task subclass with which we were initialized.
         """
-        node = self._find_next_ready_node()
+        while True:
+            if self.critical_path is not None:
+                node = self._find_next_critical_node()
+            else:
+                node = self._find_next_ready_node()
 
-        if node is None:
-            return None
+            if node is None:
+                return None
+
+            if not self.pool_sizes or self.ready_exc or not self._hold_for_pool(node):
+                break
 
         executor = node.get_executor()
         if executor is None:
@@ -1047,6 +1190,54 @@ class Taskmaster:
 
         return task
 
+    def _hold_for_pool(self, node) -> bool:
+        """
+        Claims a slot in the job pool of *node*, if it belongs to one.
+
+        Returns ``True`` if the pool is already running as many tasks as
+        it allows.  The node is then held back, still pending, until a
+        task from the same pool finishes and :meth:`release_pool` puts
+        it back on the candidates list, much like a node waiting for a
+        side effect.  Other ready nodes are not held up meanwhile.
+        """
+        executor = node.get_executor()
+        if executor is None:
+            return False
+        for t in executor.get_all_targets():
+            if t.pool is not None:
+                pool = t.pool
+                break
+        else:
+            return False
+
+        size = self.pool_sizes.get(pool)
+        if size is None:
+            return False
+        running = self.pool_jobs.get(pool, 0)
+        if running >= size:
+            self.pool_waiting.setdefault(pool, []).append(node)
+            if self.trace:
+                self.trace.debug('Holding back %s: pool %s is full' %
+                                 (self.tm_trace_node(node), pool))
+            return True
+        self.pool_jobs[pool] = running + 1
+        self.pool_claims[node] = pool
+        return False
+
+    def release_pool(self, node) -> None:
+        """
+        Releases the pool slot claimed for *node*, if any, and puts the
+        nodes held back for that pool back on the candidates list.
+        """
+        pool = self.pool_claims.pop(node, None)
+        if pool is None:
+            return
+        self.pool_jobs[pool] -= 1
+        waiting = self.pool_waiting.pop(pool, None)
+        if waiting:
+            waiting.reverse()
+            self.candidates.extend(waiting)
+
     def will_not_build(self, nodes, node_func=lambda n: None) -> None:
         """
         Perform clean-up about nodes that will never be built. Invokes
@@ -1098,6 +1289,12 @@ class Taskmaster:
         """
         self.next_candidate = self.no_next_candidate
 
+    def stopped(self) -> bool:
+        """
+        Returns whether :meth:`stop` was called.
+        """
+        return self.next_candidate == self.no_next_candidate
+
     def cleanup(self):
         """
         Check for dependency cycles.
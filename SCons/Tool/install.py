@@ -260,6 +260,26 @@ def installFunc(target, source, env) -> int:
 
     return 0
 
+def _copyFiles(pairs) -> int:
+    """Copy each ``(dest, source)`` pair of paths with :func:`copyFunc`."""
+    for dest, source in pairs:
+        if copyFunc(dest, source, None):
+            return 1
+    return 0
+
+def _installProcessArgs(target, source, env):
+    """Return the call doing an install for running in another process.
+
+    Only the default :func:`copyFunc` is sent to a worker process; a
+    custom INSTALL function may need the construction environment.
+    """
+    if env.get('INSTALL') is not copyFunc or len(target) != len(source):
+        return None
+    pairs = [(t.get_abspath(), s.get_abspath()) for t, s in zip(target, source)]
+    return _copyFiles, (pairs,), {}
+
+installFunc.process_args = _installProcessArgs
+
 def installFuncVersionedLib(target, source, env) -> int:
     """Install a versioned library into a target.
 
@@ -45,7 +45,7 @@ is unpredictable whether the expansion will occur.
 import SCons
 from SCons.Node import Node
 from SCons.Node.Python import Value
-from SCons.Util import is_String, is_Sequence, is_Dict, to_bytes
+from SCons.Util import is_String, is_Sequence, is_Dict, to_bytes, to_Text
 
 
 TEXTFILE_FILE_WRITE_MODE = 'w'
@@ -76,7 +76,8 @@ def _do_subst(node, subs):
     return contents
 
 
-def _action(target, source, env):
+def _prepare(env):
+    """Return the line separator, substitutions and encoding to use."""
 
     # prepare the line separator
     linesep = env['LINESEPARATOR']
@@ -117,11 +118,15 @@ def _action(target, source, env):
     # Pull file encoding from the environment or default to UTF-8
     file_encoding = env.get('FILE_ENCODING', 'utf-8')
 
-    # write the file
+    return linesep, subs, file_encoding
+
+
+def _write(path, source, linesep, subs, file_encoding) -> None:
+    """Write the *source* nodes, or their contents, to *path*."""
     try:
-        target_file = open(target[0].get_path(), TEXTFILE_FILE_WRITE_MODE, newline='', encoding=file_encoding)
+        target_file = open(path, TEXTFILE_FILE_WRITE_MODE, newline='', encoding=file_encoding)
     except OSError as e:
-        raise SCons.Errors.UserError("Can't write target file %s [%s]" % (target[0],e))
+        raise SCons.Errors.UserError("Can't write target file %s [%s]" % (path, e))
 
     # separate lines by 'linesep' only if linesep is not empty
     lsep = None
@@ -134,6 +139,44 @@ def _action(target, source, env):
     target_file.close()
 
 
+class _Contents:
+    """Stand-in for a source node, passed to :func:`_write` in a worker process."""
+
+    def __init__(self, path=None, text=None) -> None:
+        self.path = path
+        self.text = text
+
+    def get_text_contents(self) -> str:
+        if self.path is None:
+            return self.text
+        with open(self.path, 'rb') as f:
+            return to_Text(f.read())
+
+
+def _action(target, source, env):
+    linesep, subs, file_encoding = _prepare(env)
+    _write(target[0].get_path(), source, linesep, subs, file_encoding)
+
+
+def _process_args(target, source, env):
+    """Return the call writing *target* for running in another process.
+
+    Files are read by the worker; the text of other nodes is read here.
+    """
+    linesep, subs, file_encoding = _prepare(env)
+    contents = []
+    for node in source:
+        if isinstance(node, SCons.Node.FS.File):
+            contents.append(_Contents(path=node.rfile().get_abspath()))
+        else:
+            contents.append(_Contents(text=node.get_text_contents()))
+    args = (target[0].get_abspath(), contents, linesep, subs, file_encoding)
+    return _write, args, {}
+
+
+_action.process_args = _process_args
+
+
 def _strfunc(target, source, env) -> str:
     return "Creating '%s'" % target[0]
 
@@ -61,12 +61,19 @@ from SCons.Util import (
     get_environment_var,
     get_native_path,
     get_os_env_bool,
+    get_current_hash_algorithm_used,
+    get_hash_format,
+    get_hash_formats,
     hash_collect,
+    hash_file_signature,
+    hash_chunks_signature,
     hash_signature,
+    register_hash_format,
     is_Dict,
     is_List,
     is_String,
     is_Tuple,
+    parse_size,
     print_tree,
     render_tree,
     set_hash_format,
@@ -84,6 +91,7 @@ from SCons.Util.hashes import (
     _attempt_get_hash_function,
     _get_hash_object,
     _set_allowed_viable_default_hashes,
+    _HASH_PROVIDERS,
 )
 
 try:
@@ -858,6 +866,19 @@ bling
         s4 = silent_intern("spam")
         assert id(s1) == id(s4)
 
+    def test_parse_size(self) -> None:
+        """Test the parse_size() function"""
+        assert parse_size(1000) == 1000
+        assert parse_size('1000') == 1000
+        assert parse_size('4k') == 4096
+        assert parse_size('2M') == 2 * 1024 ** 2
+        assert parse_size('1.5G') == 3 * 1024 ** 3 // 2
+        assert parse_size(' 3 GB ') == 3 * 1024 ** 3
+        assert parse_size('1tb') == 1024 ** 4
+        for bad in ('', 'G', '-1', '12X', '1 2', -5):
+            with self.assertRaises(ValueError, msg=repr(bad)):
+                parse_size(bad)
+
     @unittest.skipUnless(has_psutil, "requires psutil")
     def test_wait_for_process_to_die_success_psutil(self) -> None:
         self._test_wait_for_process(wait_for_process_to_die)
@@ -923,6 +944,59 @@ class HashTestCase(unittest.TestCase):
                 s = hash_signature('222', hash_format=algorithm)
                 assert expected[1] == s, s
 
+    def test_file_signature(self) -> None:
+        """Test generating the signature of a file in chunks"""
+        test = TestCmd.TestCmd(workdir='')
+        data = bytes(range(256)) * 40
+        test.write('file', data)
+        fname = test.workpath('file')
+        for algorithm in get_hash_formats():
+            expected = hash_signature(data, hash_format=algorithm)
+            for chunksize in (1000, 4096, 65536):
+                s = hash_file_signature(fname, chunksize, hash_format=algorithm)
+                assert s == expected, (algorithm, chunksize, s)
+        test.write('empty', b'')
+        s = hash_file_signature(test.workpath('empty'), hash_format='md5')
+        assert s == hash_signature(b'', hash_format='md5'), s
+
+    def test_chunks_signature(self) -> None:
+        """Test generating the signature of data in pieces"""
+        data = bytes(range(256)) * 40
+        chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+        for algorithm in get_hash_formats():
+            s = hash_chunks_signature(chunks, hash_format=algorithm)
+            assert s == hash_signature(data, hash_format=algorithm), (algorithm, s)
+        s = hash_chunks_signature(iter([]), hash_format='md5')
+        assert s == hash_signature(b'', hash_format='md5'), s
+
+    def test_register_hash_format(self) -> None:
+        """Test adding a hash format"""
+        class Summer:
+            def __init__(self) -> None:
+                self.total = 0
+            def update(self, data) -> None:
+                self.total += sum(bytes(data))
+            def hexdigest(self) -> str:
+                return '%08x' % self.total
+
+        save = (get_hash_format(), dict(_HASH_PROVIDERS))
+        try:
+            register_hash_format('Summer', Summer)
+            assert 'summer' in get_hash_formats(), get_hash_formats()
+            assert hash_signature(b'\x01\x02', hash_format='summer') == '00000003'
+            set_hash_format('SUMMER')
+            assert get_current_hash_algorithm_used() == 'summer'
+            assert hash_signature(b'\x05') == '00000005'
+            with self.assertRaises(SCons.Errors.UserError):
+                register_hash_format('md5', Summer)
+            assert 'blake2b' in get_hash_formats(), get_hash_formats()
+            s = hash_signature('111', hash_format='blake2b')
+            assert len(s) == 64, s
+        finally:
+            _HASH_PROVIDERS.clear()
+            _HASH_PROVIDERS.update(save[1])
+            set_hash_format(save[0])
+
 # this uses mocking out, which is platform specific, however, the FIPS
 # behavior this is testing is also platform-specific, and only would be
 # visible in hosts running Linux with the fips_mode kernel flag along
@@ -94,10 +94,13 @@ from .hashes import (
     ALLOWED_HASH_FORMATS,
     DEFAULT_HASH_FORMATS,
     get_hash_format,
+    get_hash_formats,
+    register_hash_format,
     set_hash_format,
     get_current_hash_algorithm_used,
     hash_signature,
     hash_file_signature,
+    hash_chunks_signature,
     hash_collect,
     MD5signature,
     MD5filesignature,
@@ -1287,6 +1290,30 @@ def cmp(a, b) -> bool:
     return (a > b) - (a < b)
 
 
+_size_units = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+
+def parse_size(value) -> int:
+    """Convert a size with an optional unit suffix to a number of bytes.
+
+    The suffixes ``K``, ``M``, ``G`` and ``T`` (in either case, and
+    optionally followed by ``B``) multiply by powers of 1024, so
+    ``"512M"`` and ``"512mb"`` are both 512 MiB.  Integers are
+    returned unchanged.
+
+    Raises:
+        ValueError: *value* is not a valid size.
+    """
+    if isinstance(value, int):
+        if value < 0:
+            raise ValueError(value)
+        return value
+    m = re.fullmatch(r'\s*(\d+(?:\.\d*)?)\s*([kmgt]?)b?\s*', str(value), re.I)
+    if not m:
+        raise ValueError(value)
+    return int(float(m.group(1)) * _size_units[m.group(2).lower()])
+
+
 def print_time():
     """Hack to return a value from Main if can't import Main."""
     # this specifically violates the rule of Util not depending on other
@@ -22,6 +22,9 @@ DEFAULT_HASH_FORMATS = ['md5', 'sha1', 'sha256']
 ALLOWED_HASH_FORMATS = []
 _HASH_FUNCTION = None
 _HASH_FORMAT = None
+# Hash formats added with register_hash_format(): the name maps to
+# a callable returning a new hash object.
+_HASH_PROVIDERS = {}
 
 
 def _attempt_init_of_python_3_9_hash_object(hash_function_object, sys_used=sys):
@@ -115,6 +118,43 @@ def _set_allowed_viable_default_hashes(hashlib_used, sys_used=sys) -> None:
 _set_allowed_viable_default_hashes(hashlib)
 
 
+def register_hash_format(name, constructor) -> None:
+    """Make another hash format available to :func:`set_hash_format`.
+
+    *constructor* is called with no arguments to make a new hash object,
+    which must have the :meth:`update` and :meth:`hexdigest` methods of
+    a :mod:`hashlib` object; :meth:`update` is passed bytes-like objects.
+    Registering a name again replaces the earlier constructor, but
+    the formats in :data:`DEFAULT_HASH_FORMATS` can't be replaced.
+
+    Raises:
+        UserError: *name* is one of the default formats.
+    """
+    name = name.lower()
+    if name in DEFAULT_HASH_FORMATS:
+        from SCons.Errors import UserError  # pylint: disable=import-outside-toplevel
+
+        raise UserError(f'Hash format "{name}" is provided by hashlib')
+    _HASH_PROVIDERS[name] = constructor
+
+
+def get_hash_formats():
+    """Returns the names of the hash formats which can be used."""
+    return ALLOWED_HASH_FORMATS + sorted(_HASH_PROVIDERS)
+
+
+# BLAKE2b, with a 256-bit digest, is in every Python's hashlib.
+register_hash_format('blake2b', functools.partial(hashlib.blake2b, digest_size=32))
+
+try:
+    import xxhash
+except ImportError:
+    pass
+else:
+    # The 128-bit XXH3 hash is much faster than the cryptographic ones.
+    register_hash_format('xxh128', xxhash.xxh3_128)
+
+
 def get_hash_format():
     """Retrieves the hash format or ``None`` if not overridden.
 
@@ -162,6 +202,9 @@ def set_hash_format(hash_format, hashlib_used=hashlib, sys_used=sys):
     _HASH_FORMAT = hash_format
     if hash_format:
         hash_format_lower = hash_format.lower()
+        if hash_format_lower in _HASH_PROVIDERS:
+            _HASH_FUNCTION = hash_format_lower
+            return
         if hash_format_lower not in ALLOWED_HASH_FORMATS:
             from SCons.Errors import (  # pylint: disable=import-outside-toplevel
                 UserError,
@@ -187,7 +230,7 @@ def set_hash_format(hash_format, hashlib_used=hashlib, sys_used=sys):
                 raise UserError(
                     'Hash format "%s" is not supported by SCons. Only '
                     'the following hash formats are supported: %s'
-                    % (hash_format_lower, ', '.join(ALLOWED_HASH_FORMATS))
+                    % (hash_format_lower, ', '.join(get_hash_formats()))
                 )
 
             raise UserError(
@@ -197,8 +240,8 @@ def set_hash_format(hash_format, hashlib_used=hashlib, sys_used=sys):
                 'supports: %s'
                 % (
                     hash_format_lower,
-                    ', '.join(DEFAULT_HASH_FORMATS),
-                    ', '.join(ALLOWED_HASH_FORMATS),
+                    ', '.join(DEFAULT_HASH_FORMATS + sorted(_HASH_PROVIDERS)),
+                    ', '.join(get_hash_formats()),
                 )
             )
 
@@ -273,6 +316,8 @@ def _get_hash_object(hash_format, hashlib_used=hashlib, sys_used=sys):
         hashlib object.
     """
     if hash_format is None:
+        if _HASH_FUNCTION in _HASH_PROVIDERS:
+            return _HASH_PROVIDERS[_HASH_FUNCTION]()
         if _HASH_FUNCTION is None:
             from SCons.Errors import (  # pylint: disable=import-outside-toplevel
                 UserError,
@@ -286,6 +331,9 @@ def _get_hash_object(hash_format, hashlib_used=hashlib, sys_used=sys):
             getattr(hashlib_used, _HASH_FUNCTION, None), sys_used
         )
 
+    if hash_format in _HASH_PROVIDERS:
+        return _HASH_PROVIDERS[hash_format]()
+
     if not hasattr(hashlib, hash_format):
         from SCons.Errors import UserError  # pylint: disable=import-outside-toplevel
 
@@ -320,7 +368,10 @@ def hash_signature(s, hash_format=None):
 
 def hash_file_signature(fname, chunksize: int=65536, hash_format=None):
     """
-    Generate the md5 signature of a file
+    Generate the signature of a file
+
+    The file is read unbuffered, *chunksize* bytes at a time, into
+    one buffer which is passed to the hash object without copying.
 
     Args:
         fname: file to hash
@@ -332,16 +383,32 @@ def hash_file_signature(fname, chunksize: int=65536, hash_format=None):
     """
 
     m = _get_hash_object(hash_format)
-    with open(fname, "rb") as f:
+    buf = bytearray(chunksize)
+    view = memoryview(buf)
+    with open(fname, "rb", buffering=0) as f:
         while True:
-            blck = f.read(chunksize)
-            if not blck:
+            n = f.readinto(buf)
+            if not n:
                 break
-            m.update(to_bytes(blck))
-        # TODO: can use this when base is Python 3.8+
-        # while (blk := f.read(chunksize)) != b'':
-        #     m.update(to_bytes(blk))
+            m.update(view[:n])
+
+    return m.hexdigest()
+
 
+def hash_chunks_signature(chunks, hash_format=None):
+    """
+    Generate the signature of data given as an iterable of byte strings
+
+    Args:
+        chunks: iterable of bytes-like objects, hashed in order
+        hash_format: Specify to override default hash format
+
+    Returns:
+        String of Hex digits representing the signature
+    """
+    m = _get_hash_object(hash_format)
+    for chunk in chunks:
+        m.update(chunk)
     return m.hexdigest()
 
 
@@ -40,13 +40,20 @@ There are basically two types of stats:
 2. Counter. Counting the number of events and/or objects created. This
    would likely only be reported at the end of a given SCons run,
    though it might be useful to query during a run.
+
+Separately, spans of work done by each thread can be recorded for
+export in the Chrome trace-event format (``--trace-events``).
 """
 
 from abc import ABC
 
+import contextlib
+import os
 import platform
 import json
 import sys
+import threading
+import time
 from datetime import datetime
 
 import SCons.Debug
@@ -137,6 +144,7 @@ class TimeStats(Stats):
         super().__init__()
         self.totals = {}
         self.commands = {}  # we get order from insertion order, and can address individual via dict
+        self.jobs_changes = []
 
     def total_times(self, build_time, sconscript_time, scons_exec_time, command_exec_time):
         self.totals = {
@@ -153,10 +161,97 @@ class TimeStats(Stats):
                                   'end' : finish_time,
                                   'duration': finish_time - start_time}
 
+    def add_jobs_change(self, offset, jobs):
+        """Record that ``-j auto`` allowed *jobs* jobs from *offset* seconds."""
+        self.jobs_changes.append({'time': offset, 'jobs': jobs})
+
+
+class TraceEvents:
+    """Spans of build activity in the Chrome trace-event format.
+
+    Each span is a "complete" (``X``) event on the lane of the thread
+    which recorded it, so a parallel build shows one lane per worker.
+    The file written by :meth:`write` can be loaded into Perfetto or
+    ``chrome://tracing``.  While disabled, :meth:`span` returns a
+    shared do-nothing context manager.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.filename = None
+        self.events = []
+        self.threads = {}
+        self.origin = 0.0
+
+    def enable(self, filename) -> None:
+        self.filename = filename
+        self.origin = time.perf_counter()
+        self.enabled = True
+
+    def span(self, name, cat, **args):
+        """Return a context manager recording a span called *name*.
+
+        *cat* is the event category.  The values of *args* are
+        converted to strings only if the span is recorded, so callers
+        may pass Nodes directly.
+        """
+        if not self.enabled:
+            return _null_span
+        return _Span(self, name, cat, args)
+
+    def add(self, name, cat, start, end, args=None) -> None:
+        """Record a span from *start* to *end* (:func:`time.perf_counter`)."""
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': (start - self.origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': os.getpid(),
+            'tid': tid,
+        }
+        if args:
+            event['args'] = {k: str(v) for k, v in args.items()}
+        self.events.append(event)
+
+    def write(self) -> None:
+        """Write the recorded spans to the trace file."""
+        pid = os.getpid()
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                     'tid': tid, 'args': {'name': name}}
+                    for tid, name in self.threads.items()]
+        with open(self.filename, 'w') as tf:
+            json.dump({'traceEvents': metadata + self.events,
+                       'displayTimeUnit': 'ms'}, tf)
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, trace, name, cat, args) -> None:
+        self.trace = trace
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.trace.add(self.name, self.cat, self.start,
+                       time.perf_counter(), self.args)
+
+
+_null_span = contextlib.nullcontext()
 
 count_stats = CountStats()
 memory_stats = MemStats()
 time_stats = TimeStats()
+trace_events = TraceEvents()
 
 
 def write_scons_stats_file():
@@ -193,6 +288,8 @@ def write_scons_stats_file():
     if time_stats.enabled:
         json_structure['Time'] = {'Commands': time_stats.commands,
                                   'Totals': time_stats.totals}
+        if time_stats.jobs_changes:
+            json_structure['Time']['Jobs'] = time_stats.jobs_changes
 
     # Now add information about this build to the JSON file
     json_structure['Build_Info'] = {
@@ -0,0 +1,206 @@
+#! /usr/bin/env python
+#
+# SCons - a Software Constructor
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Serve an SCons cache directory over HTTP.
+
+Builds on other machines can then share the derived files in it by
+giving the URL of this server to CacheDir().  Files are stored in the
+cache directory as a local build would store them, uncompressed, so a
+build on the same machine can also use the directory directly.  If the
+cache configuration sets a maximum size, the least recently used files
+are evicted as files are pushed.
+"""
+
+import argparse
+import http.server
+import os
+import re
+import shutil
+import stat
+import sys
+import uuid
+
+import SCons.CacheDir
+
+# Cache entries are named by build signatures; anything else is refused.
+_NAME_RE = re.compile(r'[0-9A-Za-z][0-9A-Za-z_-]*')
+
+
+class CacheRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Handles the GET, HEAD and PUT requests of the cache protocol."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SConsCacheServer/1.0'
+
+    def entry(self):
+        """Return the path of the requested entry, or ``None``.
+
+        Only the last part of the URL path names the entry, so a
+        server can be reached through any prefix.
+        """
+        name = self.path.partition('?')[0].rpartition('/')[2]
+        if not _NAME_RE.fullmatch(name):
+            return None
+        cache = self.server.cache
+        subdir = name[:cache.config['prefix_len']].upper()
+        return os.path.join(cache.path, subdir, name)
+
+    def reply(self, code) -> None:
+        """Send a response without a body, keeping the connection."""
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_entry(self, body) -> None:
+        path = self.entry()
+        if path is None:
+            self.reply(400)
+            return
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.reply(404)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(st.st_size))
+            self.send_header('X-SCons-Mode', '%o' % stat.S_IMODE(st.st_mode))
+            self.end_headers()
+            if body:
+                shutil.copyfileobj(f, self.wfile, SCons.CacheDir.COPY_CHUNKSIZE)
+        if body:
+            try:
+                # The modification time records when the file was last
+                # used, for eviction.
+                os.utime(path, None)
+            except OSError:
+                pass
+
+    def do_GET(self) -> None:
+        self.send_entry(body=True)
+
+    def do_HEAD(self) -> None:
+        self.send_entry(body=False)
+
+    def do_PUT(self) -> None:
+        path = self.entry()
+        try:
+            length = int(self.headers['Content-Length'])
+        except (TypeError, ValueError):
+            # Without a length the body cannot be skipped, so the
+            # connection is closed.
+            self.send_error(411)
+            return
+        if path is None or self.server.readonly:
+            self.close_connection = True
+            self.reply(400 if path is None else 403)
+            return
+        tmp = "%s.tmp%s" % (path, uuid.uuid4().hex)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'xb') as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, SCons.CacheDir.COPY_CHUNKSIZE))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            if remaining:
+                # The client went away.
+                os.unlink(tmp)
+                self.close_connection = True
+                return
+            try:
+                mode = int(self.headers.get('X-SCons-Mode', '644'), 8) & 0o777
+            except ValueError:
+                mode = 0o644
+            os.chmod(tmp, mode | stat.S_IRUSR)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            self.close_connection = True
+            self.send_error(500)
+            return
+        self.server.cache.pushed(length)
+        self.reply(201)
+
+    def log_message(self, format, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class CacheServer(http.server.ThreadingHTTPServer):
+    """An HTTP server for the cache directory *path*.
+
+    The directory is created, and its configuration read, as for a
+    CacheDir.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, path, readonly=False, quiet=False) -> None:
+        self.cache = SCons.CacheDir.CacheDir(path)
+        self.readonly = readonly
+        self.quiet = quiet
+        super().__init__(address, CacheRequestHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve an scons cache directory over HTTP')
+    parser.add_argument('cache_dir', metavar='cache-dir',
+                        help='Path to scons cache directory')
+    parser.add_argument('--bind', default='localhost', metavar='<address>',
+                        help='Address to listen on (default: localhost)')
+    parser.add_argument('--port', default=8000, type=int, metavar='<number>',
+                        help='Port to listen on, 0 for any (default: 8000)')
+    parser.add_argument('--readonly', action='store_true',
+                        help='Refuse to store files')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='Do not log requests')
+    args = parser.parse_args()
+
+    server = CacheServer((args.bind, args.port), args.cache_dir,
+                         readonly=args.readonly, quiet=args.quiet)
+    host, port = server.server_address[:2]
+    print("Serving %s on http://%s:%d/" % (args.cache_dir, host, port))
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -37,18 +37,53 @@ import time
 import pickle
 
 import SCons.compat
+import SCons.dbshard
 import SCons.SConsign
+import SCons.SConsignRecord
+
+
+# SCons database modules, by the suffix they give their files.
+SCons_DB_Modules = {
+    '.dbindex': 'SCons.dbindex',
+    '.dblite': 'SCons.dblite',
+    '.dblog': 'SCons.dblog',
+    '.sqlite': 'SCons.dbsqlite',
+}
 
 
 def my_whichdb(filename):
-    if filename[-7:] == ".dblite":
-        return "SCons.dblite"
+    for suffix, dbm_name in SCons_DB_Modules.items():
+        if filename.endswith(suffix):
+            return dbm_name
+    for suffix, dbm_name in SCons_DB_Modules.items():
+        try:
+            with open(filename + suffix, "rb"):
+                return dbm_name
+        except OSError:
+            pass
+    return whichdb(filename)
+
+
+def shard_dbm_name(dirname):
+    """Return the database module of the shards in *dirname*."""
     try:
-        with open(filename + ".dblite", "rb"):
-            return "SCons.dblite"
+        names = sorted(os.listdir(dirname))
     except OSError:
-        pass
-    return whichdb(filename)
+        return None
+    for name in names:
+        dbm_name = my_whichdb(os.path.join(dirname, name))
+        if dbm_name:
+            return dbm_name
+    return None
+
+
+def import_dbm(dbm_name):
+    """Import the database module *dbm_name*."""
+    dbm = importlib.import_module(dbm_name)
+    if dbm_name in SCons_DB_Modules.values():
+        # Ensure that we don't ignore corrupt DB files,
+        dbm.IGNORE_CORRUPT_DBFILES = False
+    return dbm
 
 
 class Flagger:
@@ -269,6 +304,15 @@ class Do_SConsignDB:
         self.dbm = dbm
 
     def __call__(self, fname):
+        if os.path.isdir(fname):
+            # The directory of a sharded database.
+            try:
+                db = SCons.dbshard.open(fname, "r", module=self.dbm)
+            except (OSError, ValueError) as e:
+                sys.stderr.write("sconsign: %s\n" % e)
+                return
+            self.printdb(db)
+            return
         # The *dbm modules stick their own file suffixes on the names
         # that are passed in.  This causes us to jump through some
         # hoops here.
@@ -313,7 +357,9 @@ class Do_SConsignDB:
             if exc_type.__name__ == "ValueError":
                 sys.stderr.write("unrecognized pickle protocol.\n")
             return
+        self.printdb(db)
 
+    def printdb(self, db) -> None:
         if Print_Directories:
             for dir in Print_Directories:
                 try:
@@ -333,7 +379,12 @@ class Do_SConsignDB:
             print('=== ' + dir + ':')
         except TypeError:
             print('=== ' + dir.decode() + ':')
-        printentries(pickle.loads(val), dir)
+        if SCons.SConsignRecord.is_encoded(val):
+            entries = SCons.SConsignRecord.decode(
+                val, SCons.SConsign.SConsignEntry)
+        else:
+            entries = pickle.loads(val)
+        printentries(entries, dir)
 
 
 def Do_SConsignDir(name):
@@ -420,18 +471,13 @@ Options:
         elif o in ('-f', '--format'):
             # Try to map the given DB format to a known module
             # name, that we can then try to import...
-            Module_Map = {'dblite': 'SCons.dblite', 'sconsign': None}
+            Module_Map = {'dbindex': 'SCons.dbindex', 'dblite': 'SCons.dblite',
+                          'dblog': 'SCons.dblog', 'sqlite': 'SCons.dbsqlite',
+                          'sconsign': None}
             dbm_name = Module_Map.get(a, a)
             if dbm_name:
                 try:
-                    if dbm_name != "SCons.dblite":
-                        dbm = importlib.import_module(dbm_name)
-                    else:
-                        import SCons.dblite
-
-                        dbm = SCons.dblite
-                        # Ensure that we don't ignore corrupt DB files,
-                        SCons.dblite.IGNORE_CORRUPT_DBFILES = False
+                    dbm = import_dbm(dbm_name)
                 except ImportError:
                     sys.stderr.write("sconsign: illegal file format `%s'\n" % a)
                     print(helpstr)
@@ -462,17 +508,15 @@ Options:
         if not args:
             args = [".sconsign.dblite"]
         for a in args:
-            dbm_name = my_whichdb(a)
+            if os.path.isdir(a):
+                dbm_name = shard_dbm_name(a)
+            else:
+                dbm_name = my_whichdb(a)
             if dbm_name:
-                Map_Module = {'SCons.dblite': 'dblite'}
-                if dbm_name != "SCons.dblite":
-                    dbm = importlib.import_module(dbm_name)
-                else:
-                    import SCons.dblite
-
-                    dbm = SCons.dblite
-                    # Ensure that we don't ignore corrupt DB files,
-                    SCons.dblite.IGNORE_CORRUPT_DBFILES = False
+                Map_Module = {'SCons.dbindex': 'dbindex', 'SCons.dblite': 'dblite',
+                              'SCons.dblog': 'dblog',
+                              'SCons.dbsqlite': 'sqlite'}
+                dbm = import_dbm(dbm_name)
                 Do_SConsignDB(Map_Module.get(dbm_name, dbm_name), dbm)(a)
             else:
                 Do_SConsignDir(a)
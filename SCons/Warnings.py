@@ -158,6 +158,9 @@ class StackSizeWarning(WarningOnByDefault):
 class TargetNotBuiltWarning(SConsWarning): # TODO: should go to OnByDefault
     """A target build indicated success but the file is not found."""
 
+class TraceWriteErrorWarning(WarningOnByDefault):
+    """The ``--trace-events`` file could not be written."""
+
 class VisualCMissingWarning(WarningOnByDefault):
     """Requested MSVC version not found and policy is to not fail."""
 
@@ -0,0 +1,358 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+A signature database read through a memory map.
+
+The file holds a sorted index of its keys, so looking up the value
+stored for one directory takes a binary search of the mapped file,
+without reading or deserializing the rest of it.  Opening the database
+costs the same however large it is, which suits ``scons -q`` and the
+``sconsign`` utility on large projects, which look at only some of
+the directories in it.  The interface is modeled on the Python
+:mod:`dbm` modules, like :mod:`SCons.dblite`.
+
+The file starts with :data:`MAGIC` and the number of keys, followed by
+one index slot for each key in order of its UTF-8 bytes, holding the
+offset of the key, the key and value lengths, and a CRC-32 of the key
+and value.  The keys and values themselves follow the index.  Values
+changed in a writable database are held in memory, and sync writes a
+new file through a temporary file, copying the unchanged values
+across from the old one.
+"""
+
+import io
+import mmap
+import os
+import struct
+import zlib
+
+IGNORE_CORRUPT_DBFILES = False
+
+
+class DbindexError(Exception):
+    """A file could not be read as a dbindex database."""
+
+
+def corruption_warning(filename) -> None:
+    """Local warning for corrupt db.
+
+    SCons overwrites this with a different warning function in
+    SConsign.py.
+    """
+    print("Warning: Discarding corrupt database:", filename)
+
+
+DBINDEX_SUFFIX = ".dbindex"
+TMP_SUFFIX = ".tmp"
+
+MAGIC = b"SConsDBIdx1\n"
+
+# Number of keys.
+_HEADER = struct.Struct("<Q")
+
+# Key offset, key length, value length, CRC-32 of key and value.
+_SLOT = struct.Struct("<QIII")
+
+
+class _Dbindex:
+    """Memory-mapped signature database class.
+
+    The *file_base_name*, *flag* and *mode* arguments are as for
+    :class:`SCons.dblite._Dblite`.
+    """
+
+    _open = staticmethod(io.open)
+
+    # As in dblite, keep references to what sync() needs, as it may be
+    # called from __del__ at interpreter teardown.
+    try:
+        _os_chown = staticmethod(os.chown)
+    except AttributeError:
+        _os_chown = None
+    _os_replace = staticmethod(os.replace)
+    _os_fsync = staticmethod(os.fsync)
+
+    def __init__(self, file_base_name, flag='r', mode=0o666) -> None:
+        assert flag in ("r", "w", "c", "n")
+
+        base, ext = os.path.splitext(file_base_name)
+        if ext == DBINDEX_SUFFIX:
+            self._file_name = file_base_name
+            self._tmp_name = base + TMP_SUFFIX
+        else:
+            self._file_name = file_base_name + DBINDEX_SUFFIX
+            self._tmp_name = file_base_name + TMP_SUFFIX
+
+        self._flag = flag
+        self._mode = mode
+        self._mm = None
+        self._count = 0
+        # Keys stored (or deleted, as None) since the last sync.
+        self._pending = {}
+        self._rewrite = False
+
+        if self._os_chown is not None and 0 in (os.geteuid(), os.getegid()):
+            try:
+                statinfo = os.stat(self._file_name)
+                self._chown_to = statinfo.st_uid
+                self._chgrp_to = statinfo.st_gid
+            except OSError:
+                self._chown_to = int(os.environ.get('SUDO_UID', -1))
+                self._chgrp_to = int(os.environ.get('SUDO_GID', -1))
+        else:
+            self._chown_to = -1
+            self._chgrp_to = -1
+
+        if self._flag == "n":
+            self._rewrite = True
+            self.sync()
+            return
+        try:
+            self._map()
+        except OSError:
+            if self._flag != "c":
+                raise
+            self._rewrite = True
+            self.sync()
+
+    def opener(self, path, flags):
+        """Open helper which creates files with the requested mode."""
+        return os.open(path, flags, mode=self._mode)
+
+    def _map(self) -> None:
+        with io.open(self._file_name, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                # An empty file, as left by dblite-style creation; the
+                # next sync writes the header.
+                self._rewrite = True
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(MAGIC) + _HEADER.size
+        if size < start or mm[:len(MAGIC)] != MAGIC:
+            mm.close()
+            self._corrupt()
+            return
+        count, = _HEADER.unpack_from(mm, len(MAGIC))
+        if start + count * _SLOT.size > size:
+            mm.close()
+            self._corrupt()
+            return
+        self._mm = mm
+        self._count = count
+
+    def _unmap(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._count = 0
+
+    def _corrupt(self) -> None:
+        if not IGNORE_CORRUPT_DBFILES:
+            raise DbindexError("Not a dbindex database: %s" % self._file_name)
+        corruption_warning(self._file_name)
+        self._rewrite = True
+
+    def _slot(self, i):
+        return _SLOT.unpack_from(self._mm, len(MAGIC) + _HEADER.size + i * _SLOT.size)
+
+    def _key(self, i) -> bytes:
+        offset, klen, _, _ = self._slot(i)
+        return self._mm[offset:offset + klen]
+
+    def _find(self, key):
+        """Return the index slot of the bytes *key*, or ``None``."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = self._key(mid)
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return self._slot(mid)
+        return None
+
+    def _value(self, slot):
+        """Return the value for *slot*, or ``None`` if it is damaged."""
+        offset, klen, vlen, crc = slot
+        end = offset + klen + vlen
+        if end > len(self._mm):
+            return None
+        value = self._mm[offset + klen:end]
+        if zlib.crc32(value, zlib.crc32(self._mm[offset:offset + klen])) != crc:
+            return None
+        return value
+
+    def close(self) -> None:
+        if self._flag != "r" and (self._pending or self._rewrite):
+            self._write()
+        self._unmap()
+
+    def __del__(self) -> None:
+        self.close()
+
+    def sync(self) -> None:
+        """Write a new file holding the changes since the last sync."""
+        self._check_writable()
+        if not self._pending and not self._rewrite:
+            return
+        self._write()
+        self._map()
+
+    def _write(self) -> None:
+        # The new contents, as key -> value bytes or old index slot.
+        records = {}
+        for i in range(self._count):
+            records[self._key(i)] = self._slot(i)
+        for key, value in self._pending.items():
+            key = key.encode('utf-8')
+            if value is None:
+                records.pop(key, None)
+            else:
+                records[key] = value
+        chunks = []
+        for key in sorted(records):
+            value = records[key]
+            if isinstance(value, tuple):
+                crc = value[3]
+                value = self._value(value)
+                if value is None:
+                    # Damaged on disk: drop it rather than copy it.
+                    continue
+            else:
+                crc = zlib.crc32(value, zlib.crc32(key))
+            chunks.append((key, value, crc))
+        index = bytearray()
+        offset = len(MAGIC) + _HEADER.size + len(chunks) * _SLOT.size
+        for key, value, crc in chunks:
+            index += _SLOT.pack(offset, len(key), len(value), crc)
+            offset += len(key) + len(value)
+        with self._open(self._tmp_name, "wb", opener=self.opener) as f:
+            f.write(MAGIC)
+            f.write(_HEADER.pack(len(chunks)))
+            f.write(index)
+            for key, value, _ in chunks:
+                f.write(key)
+                f.write(value)
+            f.flush()
+            self._os_fsync(f.fileno())
+        # The old file must not be mapped when it is replaced on Windows.
+        self._unmap()
+        self._os_replace(self._tmp_name, self._file_name)
+        if self._os_chown is not None and self._chown_to > 0:
+            try:
+                self._os_chown(self._file_name, self._chown_to, self._chgrp_to)
+            except OSError:
+                pass
+        self._pending = {}
+        self._rewrite = False
+
+    def _check_writable(self):
+        if self._flag == "r":
+            raise OSError(f"Read-only database: {self._file_name}")
+
+    def __getitem__(self, key):
+        try:
+            value = self._pending[key]
+        except KeyError:
+            pass
+        else:
+            if value is None:
+                raise KeyError(key)
+            return value
+        slot = self._find(key.encode('utf-8'))
+        if slot is None:
+            raise KeyError(key)
+        value = self._value(slot)
+        if value is None:
+            if not IGNORE_CORRUPT_DBFILES:
+                raise DbindexError("Damaged record for %s in %s"
+                                   % (key, self._file_name))
+            corruption_warning(self._file_name)
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._check_writable()
+
+        if not isinstance(key, str):
+            raise TypeError(f"key `{key}' must be a string but is {type(key)}")
+
+        if not isinstance(value, bytes):
+            raise TypeError(f"value `{value}' must be bytes but is {type(value)}")
+
+        self._pending[key] = value
+
+    def __delitem__(self, key):
+        self._check_writable()
+        if key not in self:
+            raise KeyError(key)
+        self._pending[key] = None
+
+    def keys(self):
+        keys = {self._key(i).decode('utf-8') for i in range(self._count)}
+        for key, value in self._pending.items():
+            if value is None:
+                keys.discard(key)
+            else:
+                keys.add(key)
+        return sorted(keys)
+
+    def items(self):
+        items = []
+        for key in self.keys():
+            try:
+                items.append((key, self[key]))
+            except KeyError:
+                # A damaged record, which has been warned about.
+                pass
+        return items
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key) -> bool:
+        try:
+            value = self._pending[key]
+        except KeyError:
+            return self._find(key.encode('utf-8')) is not None
+        return value is not None
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+def open(file, flag="r", mode: int = 0o666):  # pylint: disable=redefined-builtin
+    return _Dbindex(file, flag, mode)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,143 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+
+import TestCmd
+
+import SCons.dbindex
+
+
+class dbindexTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.base = self.test.workpath('db')
+        self.file = self.base + SCons.dbindex.DBINDEX_SUFFIX
+        self.save_ignore = SCons.dbindex.IGNORE_CORRUPT_DBFILES
+        self.save_warning = SCons.dbindex.corruption_warning
+        self.warnings = []
+        SCons.dbindex.corruption_warning = self.warnings.append
+
+    def tearDown(self) -> None:
+        SCons.dbindex.IGNORE_CORRUPT_DBFILES = self.save_ignore
+        SCons.dbindex.corruption_warning = self.save_warning
+
+    def test_basic(self) -> None:
+        """Test storing, reading back and deleting records"""
+        db = SCons.dbindex.open(self.base, 'n')
+        assert len(db) == 0
+        db['foo'] = b'bar'
+        db['dir/sub'] = b'x' * 100
+        assert db['foo'] == b'bar'
+        db.sync()
+        db = SCons.dbindex.open(self.base, 'c')
+        assert db.keys() == ['dir/sub', 'foo'], db.keys()
+        assert db['foo'] == b'bar'
+        del db['foo']
+        assert 'foo' not in db
+        with self.assertRaises(KeyError):
+            db['foo']
+        db['dir/sub'] = b'y'
+        db['ü'] = b''
+        db.close()
+        db = SCons.dbindex.open(self.file)
+        assert dict(db.items()) == {'dir/sub': b'y', 'ü': b''}, dict(db.items())
+        with self.assertRaises(OSError):
+            db.sync()
+        with self.assertRaises(OSError):
+            db['foo'] = b'bar'
+        db.close()
+        with self.assertRaises(TypeError):
+            SCons.dbindex.open(self.base, 'w')[(1, 2)] = b'tuple'
+        with self.assertRaises(TypeError):
+            SCons.dbindex.open(self.base, 'w')['list'] = [1, 2]
+        with self.assertRaises(OSError):
+            SCons.dbindex.open(self.test.workpath('missing'), 'w')
+
+    def test_lookup(self) -> None:
+        """Test looking up keys in a large database"""
+        db = SCons.dbindex.open(self.base, 'c')
+        for i in range(1000):
+            db['dir%d/sub' % i] = b'value%d' % i
+        db.close()
+        db = SCons.dbindex.open(self.base)
+        for i in (0, 1, 499, 998, 999):
+            assert db['dir%d/sub' % i] == b'value%d' % i
+        assert 'dir1000/sub' not in db
+        assert 'dir' not in db
+        assert len(db) == 1000
+        # Only the index is searched: the keys not looked at are
+        # never read.
+        slots = []
+        save_slot = db._slot
+        db._slot = lambda i: slots.append(i) or save_slot(i)
+        db['dir500/sub']
+        assert len(slots) <= 12, slots
+
+    def test_corrupt(self) -> None:
+        """Test files and records which are damaged"""
+        self.test.write(self.file, b'not a database')
+        with self.assertRaises(SCons.dbindex.DbindexError):
+            SCons.dbindex.open(self.base, 'c')
+        SCons.dbindex.IGNORE_CORRUPT_DBFILES = True
+        db = SCons.dbindex.open(self.base, 'c')
+        assert len(db) == 0
+        assert self.warnings == [self.file], self.warnings
+        db['a'] = b'first'
+        db['b'] = b'second'
+        db.close()
+        db = SCons.dbindex.open(self.base)
+        assert dict(db.items()) == {'a': b'first', 'b': b'second'}
+        db.close()
+
+        # A damaged value is missing, and dropped by the next sync.
+        with open(self.file, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b'X')
+        SCons.dbindex.IGNORE_CORRUPT_DBFILES = False
+        db = SCons.dbindex.open(self.base)
+        assert db['a'] == b'first'
+        with self.assertRaises(SCons.dbindex.DbindexError):
+            db['b']
+        db.close()
+        SCons.dbindex.IGNORE_CORRUPT_DBFILES = True
+        db = SCons.dbindex.open(self.base, 'w')
+        with self.assertRaises(KeyError):
+            db['b']
+        assert dict(db.items()) == {'a': b'first'}, dict(db.items())
+        db['c'] = b'third'
+        db.close()
+        db = SCons.dbindex.open(self.base)
+        assert dict(db.items()) == {'a': b'first', 'c': b'third'}, dict(db.items())
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,326 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+An append-only signature database.
+
+Like :mod:`SCons.dblite`, the whole database is held in memory as a
+dictionary and has an interface modeled on the Python :mod:`dbm`
+modules.  Instead of rewriting the whole file when it is synced,
+only the records stored or deleted since the last sync are appended
+to the end of the file, so the time taken depends on how much changed
+in the build rather than on the size of the database.
+
+The file starts with :data:`MAGIC`, followed by records each made up
+of a header holding the key length, the value length (-1 for a
+deleted key) and a CRC-32 of the key and value, then the UTF-8 key
+and the value itself.  A later record for a key replaces any earlier
+one.  A record left incomplete or damaged by an interrupted write,
+and anything after it, is dropped when the file is read, and the next
+sync writes over it.  When superseded records make up more than half
+of a file larger than :data:`COMPACT_MIN_SIZE`, sync rewrites it with
+only the live records, through a temporary file;
+:meth:`_Dblog.compact` does that on demand.
+"""
+
+import io
+import os
+import struct
+import zlib
+
+IGNORE_CORRUPT_DBFILES = False
+
+
+class DblogError(Exception):
+    """A file could not be read as a dblog database."""
+
+
+def corruption_warning(filename) -> None:
+    """Local warning for corrupt db.
+
+    SCons overwrites this with a different warning function in
+    SConsign.py.
+    """
+    print("Warning: Discarding corrupt database:", filename)
+
+
+DBLOG_SUFFIX = ".dblog"
+TMP_SUFFIX = ".tmp"
+
+MAGIC = b"SConsDBLog1\n"
+
+# Key length, value length (-1 if deleted), CRC-32 of key and value.
+_HEADER = struct.Struct("<IiI")
+
+# Files smaller than this are never compacted automatically.
+COMPACT_MIN_SIZE = 1024 * 1024
+
+
+def _record(key, value) -> bytes:
+    if value is None:
+        return _HEADER.pack(len(key), -1, zlib.crc32(key)) + key
+    return (_HEADER.pack(len(key), len(value), zlib.crc32(value, zlib.crc32(key)))
+            + key + value)
+
+
+class _Dblog:
+    """Append-only signature database class.
+
+    The *file_base_name*, *flag* and *mode* arguments are as for
+    :class:`SCons.dblite._Dblite`.
+    """
+
+    _open = staticmethod(io.open)
+
+    # As in dblite, keep references to what sync() needs, as it may be
+    # called from __del__ at interpreter teardown.
+    try:
+        _os_chown = staticmethod(os.chown)
+    except AttributeError:
+        _os_chown = None
+    _os_replace = staticmethod(os.replace)
+    _os_fsync = staticmethod(os.fsync)
+    _record = staticmethod(_record)
+
+    def __init__(self, file_base_name, flag='r', mode=0o666) -> None:
+        assert flag in ("r", "w", "c", "n")
+
+        base, ext = os.path.splitext(file_base_name)
+        if ext == DBLOG_SUFFIX:
+            self._file_name = file_base_name
+            self._tmp_name = base + TMP_SUFFIX
+        else:
+            self._file_name = file_base_name + DBLOG_SUFFIX
+            self._tmp_name = file_base_name + TMP_SUFFIX
+
+        self._flag = flag
+        self._mode = mode
+        self._dict = {}
+        # Keys stored (or deleted, as None) since the last sync.
+        self._pending = {}
+        # Size of the records for the keys in _dict, and of the valid
+        # part of the file.  Anything beyond _end is junk to overwrite.
+        self._live = 0
+        self._end = 0
+        self._rewrite = False
+
+        if self._os_chown is not None and 0 in (os.geteuid(), os.getegid()):
+            try:
+                statinfo = os.stat(self._file_name)
+                self._chown_to = statinfo.st_uid
+                self._chgrp_to = statinfo.st_gid
+            except OSError:
+                self._chown_to = int(os.environ.get('SUDO_UID', -1))
+                self._chgrp_to = int(os.environ.get('SUDO_GID', -1))
+        else:
+            self._chown_to = -1
+            self._chgrp_to = -1
+
+        if self._flag == "n":
+            self._create()
+            return
+        try:
+            with io.open(self._file_name, "rb") as f:
+                data = f.read()
+        except OSError:
+            if self._flag != "c":
+                raise
+            self._create()
+            return
+        self._load(data)
+
+    def opener(self, path, flags):
+        """Open helper which creates files with the requested mode."""
+        return os.open(path, flags, mode=self._mode)
+
+    def _create(self) -> None:
+        with io.open(self._file_name, "wb", opener=self.opener) as f:
+            f.write(MAGIC)
+        self._end = len(MAGIC)
+
+    def _load(self, data) -> None:
+        if not data:
+            # An empty file, as left by dblite-style creation; the
+            # next sync writes the header.
+            self._rewrite = True
+            return
+        if not data.startswith(MAGIC):
+            if IGNORE_CORRUPT_DBFILES:
+                corruption_warning(self._file_name)
+                self._rewrite = True
+                return
+            raise DblogError("Not a dblog database: %s" % self._file_name)
+        offset = len(MAGIC)
+        size = len(data)
+        entries = self._dict
+        sizes = {}
+        while offset + _HEADER.size <= size:
+            klen, vlen, crc = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            end = start + klen + max(vlen, 0)
+            if end > size:
+                break
+            key = data[start:start + klen]
+            value = None if vlen < 0 else data[start + klen:end]
+            check = zlib.crc32(key)
+            if value is not None:
+                check = zlib.crc32(value, check)
+            if check != crc:
+                break
+            try:
+                key = key.decode('utf-8')
+            except UnicodeDecodeError:
+                break
+            if value is None:
+                entries.pop(key, None)
+                sizes.pop(key, None)
+            else:
+                entries[key] = value
+                sizes[key] = end - offset
+            offset = end
+        # Anything past the last good record was being written when a
+        # build was interrupted; it is written over by the next sync.
+        self._end = offset
+        self._live = sum(sizes.values())
+
+    def close(self) -> None:
+        if self._flag != "r" and (self._pending or self._rewrite):
+            self.sync()
+
+    def __del__(self) -> None:
+        self.close()
+
+    def _needs_compaction(self) -> bool:
+        waste = self._end - len(MAGIC) - self._live
+        return self._end > COMPACT_MIN_SIZE and waste > self._live
+
+    def sync(self) -> None:
+        """Append the records changed since the last sync to the file."""
+        self._check_writable()
+        if self._rewrite:
+            self.compact()
+            return
+        if not self._pending:
+            return
+        chunks = []
+        for key, value in self._pending.items():
+            chunks.append(self._record(key.encode('utf-8'), value))
+        with self._open(self._file_name, "r+b") as f:
+            f.seek(self._end)
+            f.truncate()
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            self._os_fsync(f.fileno())
+            self._end = f.tell()
+        self._pending = {}
+        if self._needs_compaction():
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the file with only the current records."""
+        self._check_writable()
+        live = 0
+        with self._open(self._tmp_name, "wb", opener=self.opener) as f:
+            f.write(MAGIC)
+            for key, value in self._dict.items():
+                chunk = self._record(key.encode('utf-8'), value)
+                live += len(chunk)
+                f.write(chunk)
+            f.flush()
+            self._os_fsync(f.fileno())
+        self._os_replace(self._tmp_name, self._file_name)
+        if self._os_chown is not None and self._chown_to > 0:
+            try:
+                self._os_chown(self._file_name, self._chown_to, self._chgrp_to)
+            except OSError:
+                pass
+        self._live = live
+        self._end = len(MAGIC) + live
+        self._pending = {}
+        self._rewrite = False
+
+    def _check_writable(self):
+        if self._flag == "r":
+            raise OSError(f"Read-only database: {self._file_name}")
+
+    def _set_live(self, key, value) -> None:
+        # Keep the size of the live records up to date, to tell
+        # when the file is worth compacting.
+        kb = len(key.encode('utf-8'))
+        old = self._dict.get(key)
+        if old is not None:
+            self._live -= _HEADER.size + kb + len(old)
+        if value is not None:
+            self._live += _HEADER.size + kb + len(value)
+
+    def __getitem__(self, key):
+        return self._dict[key]
+
+    def __setitem__(self, key, value):
+        self._check_writable()
+
+        if not isinstance(key, str):
+            raise TypeError(f"key `{key}' must be a string but is {type(key)}")
+
+        if not isinstance(value, bytes):
+            raise TypeError(f"value `{value}' must be bytes but is {type(value)}")
+
+        if self._dict.get(key) == value:
+            return
+        self._set_live(key, value)
+        self._dict[key] = value
+        self._pending[key] = value
+
+    def __delitem__(self, key):
+        self._check_writable()
+        self._set_live(key, None)
+        del self._dict[key]
+        self._pending[key] = None
+
+    def keys(self):
+        return self._dict.keys()
+
+    def items(self):
+        return self._dict.items()
+
+    def values(self):
+        return self._dict.values()
+
+    __iter__ = keys
+
+    def __contains__(self, key) -> bool:
+        return key in self._dict
+
+    def __len__(self) -> int:
+        return len(self._dict)
+
+
+def open(file, flag="r", mode: int = 0o666):  # pylint: disable=redefined-builtin
+    return _Dblog(file, flag, mode)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,166 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+
+import TestCmd
+
+import SCons.dblog
+
+
+class dblogTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.base = self.test.workpath('db')
+        self.file = self.base + SCons.dblog.DBLOG_SUFFIX
+        self.save_ignore = SCons.dblog.IGNORE_CORRUPT_DBFILES
+        self.save_warning = SCons.dblog.corruption_warning
+        self.warnings = []
+        SCons.dblog.corruption_warning = self.warnings.append
+
+    def tearDown(self) -> None:
+        SCons.dblog.IGNORE_CORRUPT_DBFILES = self.save_ignore
+        SCons.dblog.corruption_warning = self.save_warning
+
+    def test_basic(self) -> None:
+        """Test storing, reading back and deleting records"""
+        db = SCons.dblog.open(self.base, 'n')
+        assert len(db) == 0
+        db['foo'] = b'bar'
+        db['dir/sub'] = b'x' * 100
+        db.sync()
+        db = SCons.dblog.open(self.base, 'c')
+        assert sorted(db.keys()) == ['dir/sub', 'foo'], list(db.keys())
+        assert db['foo'] == b'bar'
+        del db['foo']
+        db['dir/sub'] = b'y'
+        db.close()
+        db = SCons.dblog.open(self.file)
+        assert dict(db.items()) == {'dir/sub': b'y'}, dict(db.items())
+        with self.assertRaises(OSError):
+            db.sync()
+        with self.assertRaises(TypeError):
+            SCons.dblog.open(self.base, 'w')[(1, 2)] = b'tuple'
+        with self.assertRaises(TypeError):
+            SCons.dblog.open(self.base, 'w')['list'] = [1, 2]
+        with self.assertRaises(OSError):
+            SCons.dblog.open(self.test.workpath('missing'), 'w')
+
+    def test_append(self) -> None:
+        """Test that a sync appends only what changed"""
+        db = SCons.dblog.open(self.base, 'c')
+        for i in range(10):
+            db['key%d' % i] = b'value%d' % i
+        db.sync()
+        size = os.path.getsize(self.file)
+        db = SCons.dblog.open(self.base, 'c')
+        db['key3'] = b'value3'
+        db.sync()
+        assert os.path.getsize(self.file) == size
+        db['key3'] = b'changed'
+        db.sync()
+        record = SCons.dblog._record(b'key3', b'changed')
+        assert os.path.getsize(self.file) == size + len(record)
+        with open(self.file, 'rb') as f:
+            assert f.read().endswith(record)
+
+    def test_recovery(self) -> None:
+        """Test dropping a record cut short by an interrupted write"""
+        db = SCons.dblog.open(self.base, 'c')
+        db['a'] = b'1'
+        db.sync()
+        db['b'] = b'2'
+        db.sync()
+        good = os.path.getsize(self.file)
+        with open(self.file, 'ab') as f:
+            f.write(SCons.dblog._record(b'c', b'3')[:-1])
+        db = SCons.dblog.open(self.base, 'c')
+        assert dict(db.items()) == {'a': b'1', 'b': b'2'}, dict(db.items())
+        db['d'] = b'4'
+        db.sync()
+        assert os.path.getsize(self.file) == good + len(SCons.dblog._record(b'd', b'4'))
+        db = SCons.dblog.open(self.base)
+        assert dict(db.items()) == {'a': b'1', 'b': b'2', 'd': b'4'}, dict(db.items())
+
+        # A damaged record ends the readable part of the file.
+        with open(self.file, 'r+b') as f:
+            f.seek(good - 1)
+            f.write(b'X')
+        db = SCons.dblog.open(self.base)
+        assert dict(db.items()) == {'a': b'1'}, dict(db.items())
+
+    def test_compact(self) -> None:
+        """Test rewriting a file full of superseded records"""
+        save_min = SCons.dblog.COMPACT_MIN_SIZE
+        SCons.dblog.COMPACT_MIN_SIZE = 0
+        try:
+            db = SCons.dblog.open(self.base, 'c')
+            db['a'] = b'x' * 100
+            db['b'] = b'y' * 100
+            db.sync()
+            size = os.path.getsize(self.file)
+            db['a'] = b'z' * 100
+            db.sync()
+            assert os.path.getsize(self.file) > size
+            db['b'] = b'w' * 100
+            db.sync()
+            assert os.path.getsize(self.file) > size
+            # Now more than half the file is superseded.
+            db['a'] = b'x' * 100
+            db.sync()
+            assert os.path.getsize(self.file) == size
+        finally:
+            SCons.dblog.COMPACT_MIN_SIZE = save_min
+        db['a'] = b'v'
+        db.sync()
+        assert os.path.getsize(self.file) > size
+        db.compact()
+        assert not os.path.exists(self.base + SCons.dblog.TMP_SUFFIX)
+        db = SCons.dblog.open(self.base)
+        assert dict(db.items()) == {'a': b'v', 'b': b'w' * 100}, dict(db.items())
+        assert os.path.getsize(self.file) == size - 99
+
+    def test_corrupt(self) -> None:
+        """Test a file which is not a dblog database"""
+        self.test.write(self.file, b'not a database')
+        with self.assertRaises(SCons.dblog.DblogError):
+            SCons.dblog.open(self.base, 'c')
+        SCons.dblog.IGNORE_CORRUPT_DBFILES = True
+        db = SCons.dblog.open(self.base, 'c')
+        assert len(db) == 0
+        assert self.warnings == [self.file], self.warnings
+        db.close()
+        with open(self.file, 'rb') as f:
+            assert f.read() == SCons.dblog.MAGIC
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
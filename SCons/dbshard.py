@@ -0,0 +1,268 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+A signature database split into shards.
+
+The keys of the database are the paths of directories.  They are
+shared out among several databases of the underlying module, kept in
+one directory, either by the top-level directory each path is in
+(scheme ``"dir"``) or by a hash of the path (scheme ``"hashN"``, for
+*N* shards).  A shard is opened the first time one of its keys is
+used, so a build of part of a project reads only the shards it needs;
+:meth:`_Dbshard.preload` opens several at once on a pool of threads,
+and sync writes the shards on a pool of threads.
+
+The shards are kept in a directory named after the database and the
+scheme, such as ``.sconsign.shards-dir``, so that a database written
+with one scheme is never read with another.
+"""
+
+import concurrent.futures
+import os
+import re
+import shutil
+import threading
+import zlib
+from urllib.parse import quote
+
+SHARD_SUFFIX = ".shards-"
+
+# Number of threads used to open or sync shards.
+MAX_WORKERS = 8
+
+_SCHEME = re.compile(r'(dir|hash([1-9][0-9]*))$')
+_SHARD = re.compile(r'(top|abs|d-[^.]+|h[0-9a-f]+)$')
+
+
+def parse_scheme(shard) -> str:
+    """Return the scheme named by *shard*.
+
+    *shard* may be ``"dir"``, ``"hashN"`` or the number of hash shards.
+    Raises :exc:`ValueError` if it is none of those.
+    """
+    if isinstance(shard, int) and not isinstance(shard, bool):
+        shard = 'hash%d' % shard
+    if not isinstance(shard, str) or not _SCHEME.match(shard):
+        raise ValueError("not a shard scheme: %r" % (shard,))
+    return shard
+
+
+def shard_name(key, scheme) -> str:
+    """Return the name of the shard holding the path *key*."""
+    if scheme == 'dir':
+        if os.path.isabs(key):
+            return 'abs'
+        top = re.split(r'[/\\]', key, maxsplit=1)[0]
+        if top in ('', '.'):
+            return 'top'
+        # Keep dots out of the name, as the database modules add
+        # suffixes to it.
+        return 'd-' + quote(top, safe='').replace('.', '%2E')
+    count = int(scheme[len('hash'):])
+    return 'h%x' % (zlib.crc32(key.encode('utf-8', 'surrogateescape')) % count)
+
+
+class _Dbshard:
+    """Sharded signature database class.
+
+    The *file_base_name*, *flag* and *mode* arguments are as for
+    :class:`SCons.dblite._Dblite`.  *module* is the database module
+    used for the shards, and *scheme* is as for :func:`parse_scheme`.
+    """
+
+    def __init__(self, file_base_name, flag='r', mode=0o666,
+                 module=None, scheme='dir') -> None:
+        assert flag in ("r", "w", "c", "n")
+        if module is None:
+            import SCons.dblite  # pylint: disable=import-outside-toplevel
+            module = SCons.dblite
+        match = _SCHEME.search(file_base_name)
+        if match and file_base_name[:match.start()].endswith(SHARD_SUFFIX):
+            scheme = match.group(0)
+            self._dir = file_base_name
+        else:
+            scheme = parse_scheme(scheme)
+            self._dir = file_base_name + SHARD_SUFFIX + scheme
+        self._scheme = scheme
+        self._module = module
+        self._flag = flag
+        self._mode = mode
+        # Shard name -> open database, or None for a shard which does
+        # not exist in a read-only database.
+        self._shards = {}
+        self._lock = threading.Lock()
+
+        if flag == "n":
+            shutil.rmtree(self._dir, ignore_errors=True)
+        if flag in ("n", "c"):
+            os.makedirs(self._dir, exist_ok=True)
+        elif not os.path.isdir(self._dir):
+            raise FileNotFoundError("No sharded database: %s" % self._dir)
+
+    def existing(self):
+        """Return the names of the shards in the database directory."""
+        try:
+            files = os.listdir(self._dir)
+        except OSError:
+            return set()
+        names = {os.path.splitext(f)[0] for f in files}
+        return {n for n in names if _SHARD.match(n)}
+
+    def _open_shard(self, name):
+        path = os.path.join(self._dir, name)
+        flag = 'r' if self._flag == 'r' else 'c'
+        try:
+            return self._module.open(path, flag, self._mode)
+        except OSError:
+            if self._flag != 'r':
+                raise
+            return None
+
+    def _shard(self, key):
+        name = shard_name(key, self._scheme)
+        with self._lock:
+            try:
+                return self._shards[name]
+            except KeyError:
+                db = self._shards[name] = self._open_shard(name)
+                return db
+
+    def _map(self, func, items) -> None:
+        # Run *func* on each item on a pool of threads, raising the
+        # first exception any of them raised.
+        items = list(items)
+        if len(items) < 2:
+            for item in items:
+                func(item)
+            return
+        workers = min(MAX_WORKERS, len(items))
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            for _ in pool.map(func, items):
+                pass
+
+    def load(self, names) -> None:
+        """Open the shards called *names*, in parallel."""
+        with self._lock:
+            names = [n for n in names if n not in self._shards]
+
+        def load_one(name) -> None:
+            db = self._open_shard(name)
+            with self._lock:
+                self._shards.setdefault(name, db)
+
+        self._map(load_one, names)
+
+    def preload(self, paths) -> None:
+        """Open the shards needed for the directories *paths*.
+
+        *paths* is a list of ``(key, subtree)`` tuples, where *subtree*
+        says the directories under *key* are needed too.
+        """
+        names = set()
+        for key, subtree in paths:
+            if subtree and (self._scheme != 'dir' or
+                            shard_name(key, self._scheme) == 'top'):
+                # Anything could be needed.
+                names = self.existing()
+                break
+            names.add(shard_name(key, self._scheme))
+        self.load(names)
+
+    def close(self) -> None:
+        for db in self._shards.values():
+            if db is not None and hasattr(db, 'close'):
+                db.close()
+
+    def sync(self) -> None:
+        """Sync the open shards, in parallel."""
+        if self._flag == 'r':
+            raise OSError(f"Read-only database: {self._dir}")
+
+        def sync_one(db) -> None:
+            if hasattr(db, 'sync'):
+                db.sync()
+
+        self._map(sync_one, [db for db in self._shards.values() if db is not None])
+
+    def compact(self) -> None:
+        """Compact the open shards which can be, in parallel."""
+        if self._flag == 'r':
+            raise OSError(f"Read-only database: {self._dir}")
+
+        def compact_one(db) -> None:
+            if hasattr(db, 'compact'):
+                db.compact()
+
+        self._map(compact_one, [db for db in self._shards.values() if db is not None])
+
+    def __getitem__(self, key):
+        db = self._shard(key)
+        if db is None:
+            raise KeyError(key)
+        return db[key]
+
+    def __setitem__(self, key, value):
+        if self._flag == 'r':
+            raise OSError(f"Read-only database: {self._dir}")
+        self._shard(key)[key] = value
+
+    def __delitem__(self, key):
+        db = self._shard(key)
+        if db is None:
+            raise KeyError(key)
+        del db[key]
+
+    def keys(self):
+        self.load(self.existing())
+        keys = []
+        for db in self._shards.values():
+            if db is not None:
+                keys.extend(db.keys())
+        return keys
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key) -> bool:
+        db = self._shard(key)
+        return db is not None and key in db
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+def open(file, flag="r", mode: int = 0o666, module=None, scheme='dir'):  # pylint: disable=redefined-builtin
+    return _Dbshard(file, flag, mode, module, scheme)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,147 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+
+import TestCmd
+
+import SCons.dblite
+import SCons.dblog
+import SCons.dbshard
+from SCons.dbshard import parse_scheme, shard_name
+
+
+class dbshardTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.base = self.test.workpath('db')
+
+    def test_scheme(self) -> None:
+        """Test naming shard schemes and shards"""
+        assert parse_scheme('dir') == 'dir'
+        assert parse_scheme(16) == 'hash16'
+        assert parse_scheme('hash4') == 'hash4'
+        for bad in ('hash0', 'hash', 0, True, 'files', None):
+            with self.assertRaises(ValueError):
+                parse_scheme(bad)
+        assert shard_name('.', 'dir') == 'top'
+        assert shard_name('src', 'dir') == 'd-src'
+        assert shard_name('src/lib/x', 'dir') == 'd-src'
+        assert shard_name('my.lib/x', 'dir') == 'd-my%2Elib'
+        assert shard_name(os.path.abspath('x'), 'dir') == 'abs'
+        names = {shard_name('dir%d' % i, 'hash4') for i in range(100)}
+        assert names == {'h0', 'h1', 'h2', 'h3'}, names
+
+    def test_basic(self) -> None:
+        """Test storing and reading back records across shards"""
+        db = SCons.dbshard.open(self.base, 'c', module=SCons.dblite, scheme='dir')
+        db['.'] = b'top'
+        db['src'] = b'src'
+        db['src/lib'] = b'lib'
+        db['doc'] = b'doc'
+        db.sync()
+        db.close()
+        shards = self.test.workpath('db.shards-dir')
+        assert sorted(os.listdir(shards)) == ['d-doc.dblite', 'd-src.dblite', 'top.dblite'], \
+            os.listdir(shards)
+
+        db = SCons.dbshard.open(self.base, 'r', module=SCons.dblite, scheme='dir')
+        assert db['src/lib'] == b'lib'
+        # Only the shard used has been opened.
+        assert list(db._shards) == ['d-src'], db._shards
+        assert 'other/dir' not in db
+        with self.assertRaises(KeyError):
+            db['other/dir']
+        with self.assertRaises(OSError):
+            db['doc'] = b'changed'
+        assert sorted(db.keys()) == ['.', 'doc', 'src', 'src/lib'], db.keys()
+        db.close()
+
+        # The directory name holds the scheme, so it can be opened
+        # without knowing it.
+        db = SCons.dbshard.open(shards, 'w', module=SCons.dblite)
+        assert db._scheme == 'dir'
+        del db['doc']
+        db.sync()
+        db = SCons.dbshard.open(self.base, 'r', module=SCons.dblite, scheme='dir')
+        assert 'doc' not in db
+        with self.assertRaises(OSError):
+            SCons.dbshard.open(self.base, 'r', module=SCons.dblite, scheme='hash4')
+
+        db = SCons.dbshard.open(self.base, 'n', module=SCons.dblite, scheme='dir')
+        assert len(db) == 0
+
+    def test_compact(self) -> None:
+        """Test compacting the shards which support it"""
+        db = SCons.dbshard.open(self.base, 'c', module=SCons.dblog, scheme='dir')
+        for i in range(100):
+            db['src/sub%d' % i] = b'x' * 1000
+        db['.'] = b'top'
+        db.sync()
+        shard = os.path.join(self.test.workpath('db.shards-dir'), 'd-src.dblog')
+        size = os.path.getsize(shard)
+        for i in range(1, 100):
+            del db['src/sub%d' % i]
+        db.sync()
+        db.compact()
+        assert os.path.getsize(shard) < size / 4, (os.path.getsize(shard), size)
+        db.close()
+        db = SCons.dbshard.open(self.base, 'r', module=SCons.dblog, scheme='dir')
+        assert sorted(db.keys()) == ['.', 'src/sub0'], db.keys()
+        with self.assertRaises(OSError):
+            db.compact()
+        db.close()
+
+    def test_preload(self) -> None:
+        """Test opening the shards a build needs in parallel"""
+        db = SCons.dbshard.open(self.base, 'c', module=SCons.dblite, scheme='dir')
+        for top in ('a', 'b', 'c', 'd'):
+            db[top + '/sub'] = top.encode()
+        db.sync()
+        db.close()
+
+        db = SCons.dbshard.open(self.base, 'c', module=SCons.dblite, scheme='dir')
+        db.preload([('a/sub', False), ('b', True)])
+        assert sorted(db._shards) == ['d-a', 'd-b'], db._shards
+        db.preload([('.', True)])
+        assert sorted(db._shards) == ['d-a', 'd-b', 'd-c', 'd-d'], db._shards
+        assert db['c/sub'] == b'c'
+
+        db = SCons.dbshard.open(self.base, 'c', module=SCons.dblite, scheme=4)
+        db['x'] = b'1'
+        db.sync()
+        db = SCons.dbshard.open(self.base, 'c', module=SCons.dblite, scheme=4)
+        db.preload([('x', True)])
+        assert list(db._shards) == [shard_name('x', 'hash4')], db._shards
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
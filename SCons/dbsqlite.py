@@ -0,0 +1,235 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+A signature database kept in SQLite.
+
+Unlike :mod:`SCons.dblite`, which reads the whole database into memory
+when it is opened, each value is fetched from an indexed table only
+when it is asked for, so a build of part of a project reads only the
+signatures of the directories it visits.  Values stored are held in
+memory and written in a single transaction when the database is
+synced.  The database is put in write-ahead-log mode, so that it can
+be read, for example by the :program:`sconsign` utility, while a build
+is writing to it.
+
+The interface is modeled on the Python :mod:`dbm` modules.
+"""
+
+import os
+import sqlite3
+import threading
+import urllib.parse
+
+IGNORE_CORRUPT_DBFILES = False
+
+
+def corruption_warning(filename) -> None:
+    """Local warning for corrupt db.
+
+    SCons overwrites this with a different warning function in
+    SConsign.py.
+    """
+    print("Warning: Discarding corrupt database:", filename)
+
+
+SQLITE_SUFFIX = ".sqlite"
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS sconsign (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+
+
+class _DbSqlite:
+    """SQLite signature database class.
+
+    The *file_base_name*, *flag* and *mode* arguments are as for
+    :class:`SCons.dblite._Dblite`.  The connection may be used from
+    any thread, one at a time.
+    """
+
+    def __init__(self, file_base_name, flag='r', mode=0o666) -> None:
+        assert flag in ("r", "w", "c", "n")
+
+        if os.path.splitext(file_base_name)[1] == SQLITE_SUFFIX:
+            self._file_name = file_base_name
+        else:
+            self._file_name = file_base_name + SQLITE_SUFFIX
+        self._flag = flag
+        self._mode = mode
+        self._lock = threading.Lock()
+        # Values stored since the last sync, None for deleted keys.
+        self._pending = {}
+        self._conn = None
+
+        if flag in ("r", "w") and not os.path.exists(self._file_name):
+            raise FileNotFoundError(
+                2, "No such file or directory", self._file_name)
+        if flag in ("c", "n") and not os.path.exists(self._file_name):
+            # Create the file ourselves, to give it the requested mode.
+            os.close(os.open(self._file_name, os.O_WRONLY | os.O_CREAT, mode))
+        try:
+            self._connect()
+        except sqlite3.DatabaseError:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            if not IGNORE_CORRUPT_DBFILES:
+                raise
+            corruption_warning(self._file_name)
+            if flag == "r":
+                # Act as an empty database.
+                self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+                self._conn.execute(_SCHEMA)
+                return
+            os.unlink(self._file_name)
+            self._connect()
+
+    def _connect(self) -> None:
+        if self._flag == "r":
+            uri = 'file:%s?mode=ro' % urllib.parse.quote(self._file_name)
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            # Make sure it is a database at all.
+            self._conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            return
+        self._conn = sqlite3.connect(self._file_name, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+            if self._flag == "n":
+                self._conn.execute("DELETE FROM sconsign")
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        if self._pending and self._flag != "r":
+            self.sync()
+        self._conn.close()
+        self._conn = None
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except (AttributeError, sqlite3.Error):
+            pass
+
+    def sync(self) -> None:
+        """Write the values stored since the last sync, in one transaction."""
+        self._check_writable()
+        with self._lock:
+            if not self._pending:
+                return
+            stored = [(k, v) for k, v in self._pending.items() if v is not None]
+            deleted = [(k,) for k, v in self._pending.items() if v is None]
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO sconsign (key, value) VALUES (?, ?)",
+                    stored)
+                self._conn.executemany("DELETE FROM sconsign WHERE key = ?", deleted)
+            self._pending = {}
+
+    def compact(self) -> None:
+        """Write pending values, then give the space of deleted rows back."""
+        self.sync()
+        with self._lock:
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _check_writable(self):
+        if self._flag == "r":
+            raise OSError(f"Read-only database: {self._file_name}")
+
+    def _fetch(self, key):
+        # Called with the lock held.
+        row = self._conn.execute(
+            "SELECT value FROM sconsign WHERE key = ?", (key,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def __getitem__(self, key):
+        with self._lock:
+            try:
+                value = self._pending[key]
+            except KeyError:
+                value = self._fetch(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._check_writable()
+
+        if not isinstance(key, str):
+            raise TypeError(f"key `{key}' must be a string but is {type(key)}")
+
+        if not isinstance(value, bytes):
+            raise TypeError(f"value `{value}' must be bytes but is {type(value)}")
+
+        with self._lock:
+            self._pending[key] = value
+
+    def __delitem__(self, key):
+        self._check_writable()
+        with self._lock:
+            if key in self._pending:
+                value = self._pending[key]
+            else:
+                value = self._fetch(key)
+            if value is None:
+                raise KeyError(key)
+            self._pending[key] = None
+
+    def keys(self):
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT key FROM sconsign")]
+            pending = dict(self._pending)
+        keys = [k for k in keys if k not in pending]
+        keys.extend(k for k, v in pending.items() if v is not None)
+        return keys
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+def open(file, flag="r", mode: int = 0o666):  # pylint: disable=redefined-builtin
+    return _DbSqlite(file, flag, mode)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
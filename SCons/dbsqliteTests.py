@@ -0,0 +1,171 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import sqlite3
+import threading
+import unittest
+
+import TestCmd
+
+import SCons.dbsqlite
+
+
+class dbsqliteTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.base = self.test.workpath('db')
+        self.file = self.base + SCons.dbsqlite.SQLITE_SUFFIX
+        self.save_ignore = SCons.dbsqlite.IGNORE_CORRUPT_DBFILES
+        self.save_warning = SCons.dbsqlite.corruption_warning
+        self.warnings = []
+        SCons.dbsqlite.corruption_warning = self.warnings.append
+
+    def tearDown(self) -> None:
+        SCons.dbsqlite.IGNORE_CORRUPT_DBFILES = self.save_ignore
+        SCons.dbsqlite.corruption_warning = self.save_warning
+
+    def test_basic(self) -> None:
+        """Test storing, reading back and deleting values"""
+        db = SCons.dbsqlite.open(self.base, 'n')
+        assert len(db) == 0
+        db['foo'] = b'bar'
+        db['dir/sub'] = b'x' * 100
+        # Stored values are visible before they are synced.
+        assert db['foo'] == b'bar'
+        assert sorted(db) == ['dir/sub', 'foo'], list(db)
+        db.sync()
+        db.close()
+        db = SCons.dbsqlite.open(self.base, 'c')
+        assert sorted(db.keys()) == ['dir/sub', 'foo'], db.keys()
+        assert db['foo'] == b'bar'
+        assert 'foo' in db and 'nope' not in db
+        del db['foo']
+        assert 'foo' not in db
+        with self.assertRaises(KeyError):
+            del db['foo']
+        db['dir/sub'] = b'y'
+        db.close()
+        db = SCons.dbsqlite.open(self.file)
+        assert dict(db.items()) == {'dir/sub': b'y'}, db.items()
+        with self.assertRaises(OSError):
+            db['x'] = b'y'
+        with self.assertRaises(OSError):
+            db.sync()
+        db.close()
+        db = SCons.dbsqlite.open(self.base, 'w')
+        with self.assertRaises(TypeError):
+            db[(1, 2)] = b'tuple'
+        with self.assertRaises(TypeError):
+            db['list'] = [1, 2]
+        db.close()
+        with self.assertRaises(OSError):
+            SCons.dbsqlite.open(self.test.workpath('missing'), 'w')
+        db = SCons.dbsqlite.open(self.base, 'n')
+        assert len(db) == 0
+        db.close()
+
+    def test_compact(self) -> None:
+        """Test that compacting gives back the space of deleted values"""
+        db = SCons.dbsqlite.open(self.base, 'c')
+        for i in range(100):
+            db['dir%d' % i] = b'x' * 1000
+        db.close()
+        size = os.path.getsize(self.file)
+        db = SCons.dbsqlite.open(self.base, 'c')
+        for i in range(1, 100):
+            del db['dir%d' % i]
+        db['new'] = b'y'
+        db.compact()
+        assert sorted(db.keys()) == ['dir0', 'new'], db.keys()
+        db.close()
+        assert os.path.getsize(self.file) < size / 4, (os.path.getsize(self.file), size)
+
+    def test_lazy(self) -> None:
+        """Test that values are only read from the file when asked for"""
+        db = SCons.dbsqlite.open(self.base, 'c')
+        for i in range(100):
+            db['dir%d' % i] = b'value%d' % i
+        db.close()
+        db = SCons.dbsqlite.open(self.base, 'c')
+        statements = []
+        db._conn.set_trace_callback(statements.append)
+        assert db['dir42'] == b'value42'
+        assert len(statements) == 1, statements
+        db['dir42'] = b'changed'
+        db['dir43'] = b'changed'
+        assert db['dir42'] == b'changed'
+        assert len(statements) == 1, statements
+        db.close()
+
+    def test_concurrent_reader(self) -> None:
+        """Test reading the database while it is being written"""
+        db = SCons.dbsqlite.open(self.base, 'c')
+        db['a'] = b'1'
+        db.sync()
+        reader = SCons.dbsqlite.open(self.base, 'r')
+        assert reader['a'] == b'1'
+        db['a'] = b'2'
+        db.sync()
+        assert reader['a'] == b'2'
+        reader.close()
+        db.close()
+
+    def test_threads(self) -> None:
+        """Test using the database from another thread"""
+        db = SCons.dbsqlite.open(self.base, 'c')
+        db['a'] = b'1'
+        db.sync()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(db['a']))
+        thread.start()
+        thread.join()
+        assert result == [b'1'], result
+        db.close()
+
+    def test_corrupt(self) -> None:
+        """Test a file which is not an SQLite database"""
+        self.test.write(self.file, b'not a database, but long enough to look at' * 4)
+        with self.assertRaises(sqlite3.DatabaseError):
+            SCons.dbsqlite.open(self.base, 'c')
+        SCons.dbsqlite.IGNORE_CORRUPT_DBFILES = True
+        db = SCons.dbsqlite.open(self.base, 'r')
+        assert len(db) == 0
+        db = SCons.dbsqlite.open(self.base, 'c')
+        assert len(db) == 0
+        assert self.warnings == [self.file, self.file], self.warnings
+        db['a'] = b'1'
+        db.close()
+        assert SCons.dbsqlite.open(self.base)['a'] == b'1'
+        assert os.path.exists(self.file)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test a CacheDir whose config file asks for compression: entries are
+stored compressed, under names marking their format, and entries in
+either format are retrieved after the setting changes.
+"""
+
+import os
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+cache = test.workpath('cache')
+test.subdir('cache', 'src')
+test.write(['cache', 'config'], '{"prefix_len": 2, "compression": "zlib"}')
+
+test.write(['src', 'SConstruct'], """\
+DefaultEnvironment(tools=[])
+def cat(env, source, target):
+    with open(str(target[0]), 'w') as f, open(str(source[0])) as s:
+        f.write(s.read() * 1000)
+env = Environment(tools=[])
+env.Command('aaa.out', 'aaa.in', cat)
+env.Command('bbb.out', 'bbb.in', cat)
+CacheDir(r'%s')
+""" % cache)
+test.write(['src', 'aaa.in'], "aaa.in\n")
+test.write(['src', 'bbb.in'], "bbb.in\n")
+
+def cached_files():
+    return sorted(e.name for d in os.scandir(cache) if d.is_dir()
+                  for e in os.scandir(d.path))
+
+test.run(chdir='src', arguments='aaa.out')
+cached = cached_files()
+test.fail_test(len(cached) != 1 or not cached[0].endswith('.zlib'))
+size = os.path.getsize(os.path.join(cache, cached[0][:2].upper(), cached[0]))
+test.fail_test(size >= 7000 // 10, message="entry size %d\n" % size)
+
+test.run(chdir='src', arguments='-c .')
+test.run(chdir='src', arguments='aaa.out')
+test.must_contain_all_lines(test.stdout(), ["Retrieved `aaa.out' from cache"])
+test.must_match(['src', 'aaa.out'], "aaa.in\n" * 1000, mode='r')
+
+# Without compression, new entries are stored as they are, and the
+# compressed one is still retrieved.
+test.write(['cache', 'config'], '{"prefix_len": 2}')
+test.run(chdir='src', arguments='-c .')
+test.run(chdir='src', arguments='.')
+test.must_contain_all_lines(test.stdout(), ["Retrieved `aaa.out' from cache"])
+test.must_match(['src', 'aaa.out'], "aaa.in\n" * 1000, mode='r')
+test.must_match(['src', 'bbb.out'], "bbb.in\n" * 1000, mode='r')
+cached = cached_files()
+test.fail_test(len(cached) != 2)
+test.fail_test(len([c for c in cached if c.endswith('.zlib')]) != 1)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -87,13 +87,13 @@ test.run(chdir='src',
 
 expect = \
 r"""CacheRetrieve\(aaa.out\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(bbb.out\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(ccc.out\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(all\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 """
 
 test.must_match(debug_out, expect, mode='r')
@@ -105,25 +105,25 @@ test.must_match(debug_out, expect, mode='r')
 
 expect = \
 r"""CacheRetrieve\(aaa.out\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 cat\(\["aaa.out"\], \["aaa.in"\]\)
 CachePush\(aaa.out\):  pushing to [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(bbb.out\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 cat\(\["bbb.out"\], \["bbb.in"\]\)
 CachePush\(bbb.out\):  pushing to [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(ccc.out\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 cat\(\["ccc.out"\], \["ccc.in"\]\)
 CachePush\(ccc.out\):  pushing to [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(all\):  [0-9a-fA-F]+ not in cache
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 cat\(\["all"\], \["aaa.out", "bbb.out", "ccc.out"\]\)
 CachePush\(all\):  pushing to [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 """
 
 test.run(chdir='src',
@@ -145,16 +145,16 @@ test.unlink(['src', 'cat.out'])
 expect = \
 r"""Retrieved `aaa.out' from cache
 CacheRetrieve\(aaa.out\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 Retrieved `bbb.out' from cache
 CacheRetrieve\(bbb.out\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 Retrieved `ccc.out' from cache
 CacheRetrieve\(ccc.out\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 Retrieved `all' from cache
 CacheRetrieve\(all\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 """
 
 test.run(chdir='src',
@@ -179,13 +179,13 @@ test.run(chdir='src',
 
 expect = \
 r"""CacheRetrieve\(aaa.out\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(bbb.out\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(ccc.out\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 CacheRetrieve\(all\):  retrieving from [0-9a-fA-F]+
-requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%
+requests: [0-9]+, hits: [0-9]+, misses: [0-9]+, hit rate: [0-9]+\.[0-9]{2,}%, bytes evicted: [0-9]+
 """
 
 test.must_match(debug_out, expect, mode='r')
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test a CacheDir given as an http:// URL, served by the reference
+cache server: files built in one tree are retrieved in another.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+test.subdir('cache', 'one', 'two')
+
+server = subprocess.Popen(
+    [sys.executable, '-m', 'SCons.Utilities.CacheServer', '--quiet',
+     '--bind', '127.0.0.1', '--port', '0', test.workpath('cache')],
+    stdout=subprocess.PIPE, universal_newlines=True)
+try:
+    line = server.stdout.readline()
+    m = re.search(r'http://[^/]+:(\d+)/', line)
+    if not m:
+        test.fail_test(message="Cache server did not start: %r\n" % line)
+    url = 'http://127.0.0.1:%s/' % m.group(1)
+
+    test.write('cat.py', """\
+import sys
+with open(sys.argv[1], 'w') as f:
+    f.write(open(sys.argv[2]).read())
+""")
+
+    for tree in ('one', 'two'):
+        test.write([tree, 'SConstruct'], """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.CacheDir(r'%s')
+env.Command('a.out', 'a.in', r'%s ../cat.py $TARGET $SOURCE')
+env.Command('b.out', 'b.in', r'%s ../cat.py $TARGET $SOURCE')
+""" % (url, _python_, _python_))
+        test.write([tree, 'a.in'], "a.in\n")
+        test.write([tree, 'b.in'], "b.in\n")
+
+    test.run(chdir='one', arguments='.')
+    test.must_not_contain_any_line(test.stdout(), ["Retrieved"])
+    entries = [name for d in os.listdir(test.workpath('cache'))
+               if os.path.isdir(test.workpath('cache', d))
+               for name in os.listdir(test.workpath('cache', d))]
+    test.fail_test(len(entries) != 2, message="cache entries %s\n" % entries)
+
+    test.run(chdir='two', arguments='.')
+    test.must_contain_all_lines(test.stdout(), [
+        "Retrieved `a.out' from cache",
+        "Retrieved `b.out' from cache",
+    ])
+    test.must_match(['two', 'a.out'], "a.in\n")
+    test.must_match(['two', 'b.out'], "b.in\n")
+
+    # A changed source is built, and pushed for the next builder.
+    test.write(['two', 'a.in'], "a.in 2\n")
+    test.run(chdir='two', arguments='.')
+    test.must_not_contain_any_line(test.stdout(), ["Retrieved"])
+    test.write(['one', 'a.in'], "a.in 2\n")
+    test.run(chdir='one', arguments='.')
+    test.must_contain_all_lines(test.stdout(), ["Retrieved `a.out' from cache"])
+    test.must_match(['one', 'a.out'], "a.in 2\n")
+
+    # --cache-readonly retrieves but does not push.
+    test.write(['one', 'b.in'], "b.in 2\n")
+    test.run(chdir='one', arguments='--cache-readonly .')
+    test.write(['two', 'b.in'], "b.in 2\n")
+    test.run(chdir='two', arguments='.')
+    test.must_not_contain_any_line(test.stdout(), ["Retrieved"])
+finally:
+    server.terminate()
+    server.wait()
+    server.stdout.close()
+
+# A server which cannot be reached is a cache miss.
+test.run(chdir='two', arguments='-c .')
+test.run(chdir='two', arguments='.')
+test.must_match(['two', 'a.out'], "a.in 2\n")
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
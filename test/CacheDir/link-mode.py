@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test a CacheDir whose config file asks for hard links: files are
+linked into and out of the cache and left read-only, and rebuilding
+a target does not change the cached copy.
+"""
+
+import os
+import stat
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+cache = test.workpath('cache')
+test.subdir('cache', 'src')
+test.write(['cache', 'config'], '{"prefix_len": 2, "link_mode": "hardlink"}')
+
+test.write(['src', 'SConstruct'], """\
+DefaultEnvironment(tools=[])
+def cat(env, source, target):
+    with open(str(target[0]), 'w') as f, open(str(source[0])) as s:
+        f.write(s.read())
+env = Environment(tools=[])
+env.Command('aaa.out', 'aaa.in', cat)
+CacheDir(r'%s')
+""" % cache)
+test.write(['src', 'aaa.in'], "aaa.in\n")
+
+def cached_files():
+    return [e.path for d in os.scandir(cache) if d.is_dir()
+            for e in os.scandir(d.path)]
+
+out = test.workpath('src', 'aaa.out')
+test.run(chdir='src', arguments='.')
+cached = cached_files()
+test.fail_test(len(cached) != 1)
+test.fail_test(not os.path.samefile(out, cached[0]))
+test.fail_test(os.stat(out).st_mode & stat.S_IWUSR)
+
+test.run(chdir='src', arguments='-c .')
+test.must_not_exist(out)
+test.run(chdir='src', arguments='.')
+test.must_contain_all_lines(test.stdout(), ["Retrieved `aaa.out' from cache"])
+test.fail_test(not os.path.samefile(out, cached[0]))
+test.must_match(out, "aaa.in\n", mode='r')
+
+test.write(['src', 'aaa.in'], "aaa.in changed\n")
+test.run(chdir='src', arguments='.')
+test.must_match(out, "aaa.in changed\n", mode='r')
+test.must_match(cached[0], "aaa.in\n", mode='r')
+test.fail_test(len(cached_files()) != 2)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
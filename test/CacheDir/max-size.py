@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test a CacheDir with a max_size in its config file: once the cache
+grows past that size, the least recently used files are evicted.
+"""
+
+import os
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+cache = test.workpath('cache')
+test.subdir('cache', 'src')
+test.write(['cache', 'config'], '{"prefix_len": 2, "max_size": "4k"}')
+
+test.write(['src', 'SConstruct'], """\
+DefaultEnvironment(tools=[])
+def fill(env, source, target):
+    with open(str(target[0]), 'w') as f:
+        f.write(str(target[0]) * 125)
+env = Environment(tools=[])
+for i in range(8):
+    env.Command('f%%d.out' %% i, [], fill)
+CacheDir(r'%s')
+""" % cache)
+
+def cache_size():
+    total = 0
+    for subdir in os.scandir(cache):
+        if subdir.is_dir():
+            total += sum(e.stat().st_size for e in os.scandir(subdir.path))
+    return total
+
+targets = ' '.join('f%d.out' % i for i in range(8))
+test.run(chdir='src', arguments=targets)
+size = cache_size()
+test.fail_test(not 0 < size <= 4096, message="cache size %d\n" % size)
+
+# The targets pushed last are still in the cache, the first are not.
+test.run(chdir='src', arguments='-c .')
+test.run(chdir='src', arguments='f7.out')
+test.must_contain_all_lines(test.stdout(), ["Retrieved `f7.out' from cache"])
+test.run(chdir='src', arguments='f0.out')
+test.must_contain_all_lines(test.stdout(), ['fill(["f0.out"], [])'])
+size = cache_size()
+test.fail_test(not 0 < size <= 4096, message="cache size %d\n" % size)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify substitution of the $PERCENT and $ETA strings in progress
+output, which are weighted by the durations recorded by earlier
+builds, and of the $COUNT and $TOTAL action counts.
+"""
+
+import re
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env['BUILDERS']['C'] = Builder(action=Copy('$TARGET', '$SOURCE'))
+Progress(ARGUMENTS.get('PROGRESS', '$PERCENT $TARGET\\n'))
+env.C('S1.out', 'S1.in')
+env.C('S2.out', 'S2.in')
+env.C('S3.out', 'S3.in')
+env.C('S4.out', 'S4.in')
+""")
+
+test.write('S1.in', "S1.in\n")
+test.write('S2.in', "S2.in\n")
+test.write('S3.in', "S3.in\n")
+test.write('S4.in', "S4.in\n")
+
+# With no history, each of the four targets and the directory
+# counts the same.
+expect = """\
+  0% S1.in
+  0% S1.out
+Copy("S1.out", "S1.in")
+ 20% S2.in
+ 20% S2.out
+Copy("S2.out", "S2.in")
+ 40% S3.in
+ 40% S3.out
+Copy("S3.out", "S3.in")
+ 60% S4.in
+ 60% S4.out
+Copy("S4.out", "S4.in")
+ 80% SConstruct
+ 80% .
+"""
+
+test.run(arguments='-Q .', stdout=expect)
+test.must_exist('.sconsign.durations')
+
+test.write('S2.in', "S2.in changed\n")
+test.write('S3.in', "S3.in changed\n")
+test.run(arguments=['-Q', 'PROGRESS=[$ETA] $TARGET\n', '.'])
+lines = test.stdout().splitlines()
+assert lines[0] == '[?] S1.in', lines
+for line in lines:
+    if line.startswith('['):
+        assert re.match(r'\[(\?|\d+:\d\d:\d\d)\] ', line), line
+test.must_contain_all_lines(test.stdout(), [
+    'Copy("S2.out", "S2.in")',
+    'Copy("S3.out", "S3.in")',
+])
+
+# Up-to-date targets drop out of the total as they are found.
+test.write('S4.in', "S4.in changed\n")
+expect = """\
+[0/5] S1.in
+[0/5] S1.out
+[0/4] S2.in
+[0/4] S2.out
+[0/3] S3.in
+[0/3] S3.out
+[0/2] S4.in
+[0/2] S4.out
+Copy("S4.out", "S4.in")
+[1/2] SConstruct
+[1/2] .
+"""
+test.run(arguments=['-Q', 'PROGRESS=[$COUNT/$TOTAL] $TARGET\n', '.'],
+         stdout=expect)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Verify SConsignFile(record_format='binary'): the entries are stored in
+the compact binary format, the build is up to date afterwards, a
+database written in either format is read when switching to the other,
+and the sconsign utility can read it.
+"""
+
+import TestSCons
+import TestSConsign
+
+_python_ = TestSCons._python_
+
+test = TestSConsign.TestSConsign(match=TestSConsign.match_re_dotall)
+
+test.subdir('subdir')
+
+test.write('build.py', r"""
+import sys
+with open(sys.argv[1], 'wb') as ofp:
+    for name in sys.argv[2:]:
+        with open(name, 'rb') as ifp:
+            ofp.write(ifp.read())
+sys.exit(0)
+""")
+
+test.write('SConstruct', """
+SConsignFile(record_format=ARGUMENTS.get('format', 'binary'))
+DefaultEnvironment(tools=[])
+B = Builder(action=r'%(_python_)s build.py $TARGETS $SOURCES')
+env = Environment(BUILDERS={'B': B}, tools=[])
+env.B(target='f1.out', source=['f1.in', 'common.in'])
+env.B(target='subdir/f2.out', source=['subdir/f2.in', 'common.in'])
+""" % locals())
+
+test.write('f1.in', "f1.in\n")
+test.write('common.in', "common.in\n")
+test.write(['subdir', 'f2.in'], "subdir/f2.in\n")
+
+test.run()
+test.must_match('f1.out', "f1.in\ncommon.in\n")
+
+database_name = test.get_sconsignname()
+database_filename = database_name + ".dblite"
+test.must_exist(test.workpath(database_filename))
+with open(test.workpath(database_filename), 'rb') as f:
+    assert b'SCsr' in f.read()
+
+test.up_to_date(arguments='.')
+
+# Switching formats reads the old entries and rewrites them.
+test.up_to_date(options='format=pickle', arguments='.')
+test.up_to_date(arguments='.')
+
+test.write('common.in', "common.in changed\n")
+test.run()
+test.must_match(['subdir', 'f2.out'], "subdir/f2.in\ncommon.in changed\n")
+test.up_to_date(arguments='.')
+
+test.run_sconsign(arguments="-d . -e f1.out " + database_filename,
+                  stdout=r"=== \.:\nf1\.out: \S+ \d+ \d+\n.*")
+test.run_sconsign(arguments="-d subdir -e f2.out -i " + database_filename,
+                  stdout=r"=== subdir:\nf2\.out:\n.*\s+common\.in:\n.*")
+
+# Without -d, every directory is read and only the entry is printed.
+test.run_sconsign(arguments="-e f1.out " + database_filename,
+                  stdout=r"=== \.:\nf1\.out: \S+ \d+ \d+\n.*=== subdir:\n",
+                  stderr=r".*sconsign: no entry `f1\.out' in `subdir'\n")
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
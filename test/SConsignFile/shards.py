@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Verify SConsignFile(shard=...): the signature database is split into
+shards by top-level directory or by hash, builds are up to date
+afterwards, and the sconsign utility reads the shard directory.
+"""
+
+import os
+
+import TestSCons
+import TestSConsign
+
+_python_ = TestSCons._python_
+
+test = TestSConsign.TestSConsign(match=TestSConsign.match_re_dotall)
+
+test.subdir('lib', 'src', ['src', 'sub'])
+
+test.write('build.py', r"""
+import sys
+with open(sys.argv[1], 'wb') as ofp, open(sys.argv[2], 'rb') as ifp:
+    ofp.write(ifp.read())
+sys.exit(0)
+""")
+
+test.write('SConstruct', """
+shard = ARGUMENTS.get('shard', 'dir')
+SConsignFile(shard=int(shard) if shard.isdigit() else shard)
+DefaultEnvironment(tools=[])
+B = Builder(action=r'%(_python_)s build.py $TARGETS $SOURCES')
+env = Environment(BUILDERS={'B': B}, tools=[])
+env.B(target='f1.out', source='f1.in')
+env.B(target='lib/f2.out', source='lib/f2.in')
+env.B(target='src/f3.out', source='src/f3.in')
+env.B(target='src/sub/f4.out', source='src/sub/f4.in')
+""" % locals())
+
+test.write('f1.in', "f1.in\n")
+test.write(['lib', 'f2.in'], "lib/f2.in\n")
+test.write(['src', 'f3.in'], "src/f3.in\n")
+test.write(['src', 'sub', 'f4.in'], "src/sub/f4.in\n")
+
+test.run()
+
+database_name = test.get_sconsignname()
+shards = database_name + '.shards-dir'
+test.must_not_exist(test.workpath(database_name + '.dblite'))
+test.must_exist(test.workpath(shards, 'top.dblite'))
+test.must_exist(test.workpath(shards, 'd-lib.dblite'))
+test.must_exist(test.workpath(shards, 'd-src.dblite'))
+
+test.up_to_date(arguments='.')
+
+# A build of one directory leaves the other shards alone.
+test.write(['src', 'sub', 'f4.in'], "src/sub/f4.in changed\n")
+lib_shard = test.workpath(shards, 'd-lib.dblite')
+mtime = os.path.getmtime(lib_shard)
+test.run(arguments='src')
+test.must_match(['src', 'sub', 'f4.out'], "src/sub/f4.in changed\n")
+assert os.path.getmtime(lib_shard) == mtime
+test.up_to_date(arguments='.')
+
+test.run_sconsign(arguments="-d src/sub -e f4.out " + shards,
+                  stdout=r"=== src/sub:\nf4\.out: \S+ \d+ \d+\n.*")
+test.run_sconsign(arguments="-f dblite " + shards,
+                  stdout=r"=== \.:\n.*=== lib:\n.*=== src:\n.*=== src/sub:\n.*")
+
+# Shards by hash are kept apart from shards by directory.
+test.run(arguments='shard=4 .')
+test.must_exist(test.workpath(database_name + '.shards-hash4'))
+test.up_to_date(options='shard=4', arguments='.')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
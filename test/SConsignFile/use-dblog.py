@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Verify SConsignFile() when used with the append-only SCons.dblog module,
+selected by name: an incremental build appends to the database rather
+than rewriting it, and the sconsign utility can read it.
+"""
+
+import os
+
+import TestSCons
+import TestSConsign
+
+_python_ = TestSCons._python_
+
+test = TestSConsign.TestSConsign(match=TestSConsign.match_re_dotall)
+
+test.subdir('subdir')
+
+test.write('build.py', r"""
+import sys
+with open(sys.argv[1], 'wb') as ofp, open(sys.argv[2], 'rb') as ifp:
+    ofp.write(ifp.read())
+sys.exit(0)
+""")
+
+test.write('SConstruct', """
+SConsignFile(dbm_module='dblog')
+DefaultEnvironment(tools=[])
+B = Builder(action=r'%(_python_)s build.py $TARGETS $SOURCES')
+env = Environment(BUILDERS={'B': B}, tools=[])
+env.B(target='f1.out', source='f1.in')
+env.B(target='f2.out', source='f2.in')
+env.B(target='subdir/f3.out', source='subdir/f3.in')
+env.B(target='subdir/f4.out', source='subdir/f4.in')
+""" % locals())
+
+test.write('f1.in', "f1.in\n")
+test.write('f2.in', "f2.in\n")
+test.write(['subdir', 'f3.in'], "subdir/f3.in\n")
+test.write(['subdir', 'f4.in'], "subdir/f4.in\n")
+
+test.run()
+
+database_name = test.get_sconsignname()
+database_filename = database_name + ".dblog"
+
+test.must_exist(test.workpath(database_filename))
+test.must_not_exist(test.workpath(database_name + ".dblite"))
+test.must_not_exist(test.workpath('subdir', database_name))
+
+test.must_match('f1.out', "f1.in\n")
+test.must_match(['subdir', 'f3.out'], "subdir/f3.in\n")
+
+test.up_to_date(arguments='.')
+
+with open(test.workpath(database_filename), 'rb') as f:
+    before = f.read()
+
+# Only the changed directory is appended.
+test.write(['subdir', 'f4.in'], "subdir/f4.in changed\n")
+test.run()
+test.must_match(['subdir', 'f4.out'], "subdir/f4.in changed\n")
+with open(test.workpath(database_filename), 'rb') as f:
+    after = f.read()
+assert after.startswith(before)
+assert b'subdir' in after[len(before):]
+assert b'f1.in' not in after[len(before):]
+
+test.up_to_date(arguments='.')
+
+# A record cut short by an interrupted write is dropped.
+with open(test.workpath(database_filename), 'ab') as f:
+    f.write(b'\x06\x00\x00\x00')
+test.up_to_date(arguments='.')
+
+test.run_sconsign(arguments="-f dblog -d . -e f1.out " + database_filename,
+                  stdout=r"=== \.:\nf1\.out: \S+ \d+ \d+\n.*")
+test.run_sconsign(arguments="-d subdir -e f4.out " + database_filename,
+                  stdout=r"=== subdir:\nf4\.out: \S+ \d+ \d+\n.*")
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test that SetPool() limits how many targets in a pool are built at once
+in a parallel build, and that a bad pool size is reported.
+"""
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+import threading
+import time
+
+DefaultEnvironment(tools=[])
+lock = threading.Lock()
+running = {'link': 0}
+highest = {'link': 0}
+
+def build(target, source, env):
+    pool = env['POOLNAME']
+    with lock:
+        running[pool] += 1
+        highest[pool] = max(highest[pool], running[pool])
+    time.sleep(0.2)
+    with lock:
+        running[pool] -= 1
+    with open(str(target[0]), 'w') as f:
+        f.write('%d\\n' % highest[pool])
+
+env = Environment(tools=[], POOLNAME='link')
+links = [env.Command('link%d.out' % i, [], build) for i in range(4)]
+env.SetPool(links, 'link', int(ARGUMENTS.get('size', 1)))
+""")
+
+test.run(arguments='-j 4 .')
+for i in range(4):
+    test.must_match('link%d.out' % i, '1\n', mode='r')
+
+test.run(arguments='-c .')
+test.run(arguments='-j 4 size=2 .')
+results = [test.read('link%d.out' % i, 'r') for i in range(4)]
+test.fail_test(max(results) > '2\n', message=str(results))
+
+test.run(arguments='-j 4 size=0 .', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(), [
+    "scons: *** A positive pool size is required for pool 'link': 0",
+])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
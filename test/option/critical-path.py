@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test the --critical-path option: durations are recorded next to the
+.sconsign file, used to order ready targets on the next build, and the
+critical path is reported at the end of the build.
+"""
+
+import pickle
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+def build(target, source, env):
+    with open(str(target[0]), 'w') as f:
+        f.write(str(target[0]) + '\\n')
+env = Environment(tools=[])
+a = env.Command('a.out', [], build)
+b = env.Command('b.out', [], build)
+c = env.Command('c.out', [], build)
+env.Command('all.out', [a, b, c], build)
+""")
+
+test.run(arguments='-Q --critical-path all.out')
+test.must_contain_all_lines(test.stdout(), [
+    'Critical path: predicted 0.000000 seconds, actual',
+    'seconds: all.out',
+])
+test.must_exist('.sconsign.durations')
+
+with open(test.workpath('.sconsign.durations'), 'rb') as f:
+    history = pickle.load(f)
+test.fail_test(sorted(history) != ['a.out', 'all.out', 'b.out', 'c.out'])
+
+# Seed the history so that c.out and then a.out look most critical.
+with open(test.workpath('.sconsign.durations'), 'wb') as f:
+    pickle.dump({'a.out': (2.0, 3.0), 'b.out': (1.0, 1.0),
+                 'c.out': (4.0, 5.0), 'all.out': (1.0, 1.0)}, f)
+
+test.run(arguments='-Q -c .')
+test.run(arguments='-Q --critical-path all.out')
+lines = test.stdout().splitlines()
+built = [l for l in lines if l.startswith('build(')]
+expect = [
+    'build(["c.out"], [])',
+    'build(["a.out"], [])',
+    'build(["b.out"], [])',
+    'build(["all.out"], ["a.out", "b.out", "c.out"])',
+]
+test.fail_test(built != expect, message="unexpected build order %s" % built)
+test.must_contain_all_lines(test.stdout(), [
+    'Critical path: predicted 5.000000 seconds, actual',
+])
+
+# Nothing built, nothing reported.
+test.run(arguments='-Q --critical-path all.out')
+test.must_not_contain_any_line(test.stdout(), ['Critical path:'])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Test the --debug=slowest option, which lists the targets whose
+actions took longest.
+"""
+
+import re
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+test.write('sleep.py', """\
+import sys
+import time
+time.sleep(float(sys.argv[1]))
+with open(sys.argv[2], 'w') as f:
+    f.write(sys.argv[1])
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command('slow.out', [], r'%(_python_)s sleep.py 1.0 $TARGET')
+env.Command('fast.out', [], r'%(_python_)s sleep.py 0.0 $TARGET')
+""" % locals())
+
+test.run(arguments='-Q --debug=slowest=1 .')
+lines = test.stdout().splitlines()
+index = lines.index('Slowest targets:')
+assert len(lines) == index + 2, lines
+assert re.match(r'    \d+\.\d+ seconds: slow\.out$', lines[index + 1]), lines
+test.must_exist('.sconsign.durations')
+
+# Nothing is listed when nothing was built.
+test.run(arguments='-Q --debug=slowest .')
+test.must_not_contain_any_line(test.stdout(), ['Slowest targets:'])
+
+test.run(arguments='-Q -c .')
+test.run(arguments='-Q --debug=slowest .')
+test.must_contain_all_lines(test.stdout(), [
+    'Slowest targets:',
+    ' seconds: slow.out',
+    ' seconds: fast.out',
+])
+
+test.run(arguments='--debug=slowest=none .', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(), [
+    "`none' is not a valid count for --debug=slowest",
+])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
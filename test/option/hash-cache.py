@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Test --hash-cache: content signatures are looked up in a machine-local
+cache keyed on each file's stat information before the file is read,
+and a file rewritten with its timestamp put back is read again.
+"""
+
+import os
+import sqlite3
+import time
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+if ARGUMENTS.get('SET'):
+    SetOption('hash_cache', ARGUMENTS['SET'])
+env = Environment(tools=[])
+env.Command('f.out', 'f.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+# Recent enough that the signature stored in .sconsign is not reused.
+then = time.time() - 3600
+test.write('f.in', "aaa\n")
+os.utime(test.workpath('f.in'), (then, then))
+st = os.stat(test.workpath('f.in'))
+# Signatures of files whose inode changed in the last two seconds
+# are not recorded.
+time.sleep(3)
+
+test.run(arguments='--hash-cache=cache/hashes.db .')
+test.must_match('f.out', "aaa\n", mode='r')
+test.must_exist(test.workpath('cache', 'hashes.db'))
+test.up_to_date(options='--hash-cache=cache/hashes.db', arguments='.')
+
+# The recorded signature is used instead of reading the file: with a
+# wrong one in the cache, the target is rebuilt.
+conn = sqlite3.connect(test.workpath('cache', 'hashes.db'))
+with conn:
+    conn.execute("UPDATE hashes SET csig = 'wrong'")
+conn.close()
+test.not_up_to_date(options='SET=cache/hashes.db', arguments='.')
+test.up_to_date(options='SET=cache/hashes.db', arguments='.')
+
+# Change the contents keeping the size and timestamp, as "cp -p" can:
+# the inode change time differs, so the file is read.
+with open(test.workpath('f.in'), 'r+') as f:
+    f.write("bbb\n")
+os.utime(test.workpath('f.in'), ns=(st.st_atime_ns, st.st_mtime_ns))
+test.run(arguments='--hash-cache=cache/hashes.db .')
+test.must_match('f.out', "bbb\n", mode='r')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
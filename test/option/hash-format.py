@@ -27,12 +27,12 @@ __revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
 import hashlib
 import os
 import TestSCons
-from SCons.Util import ALLOWED_HASH_FORMATS, DEFAULT_HASH_FORMATS
+from SCons.Util import ALLOWED_HASH_FORMATS, DEFAULT_HASH_FORMATS, get_hash_formats
 
 # Test passing the hash format by command-line.
 INVALID_ALGORITHM = 'testfailure'
 
-for algorithm in [*DEFAULT_HASH_FORMATS, INVALID_ALGORITHM, None]:
+for algorithm in [*DEFAULT_HASH_FORMATS, 'blake2b', INVALID_ALGORITHM, None]:
     test = TestSCons.TestSCons()
     test.dir_fixture('hash-format')
 
@@ -50,15 +50,15 @@ for algorithm in [*DEFAULT_HASH_FORMATS, INVALID_ALGORITHM, None]:
             test.run('--hash-format=%s .' % algorithm, stderr=r"""
 scons: \*\*\* Hash format "{}" is not supported by SCons. Only the following hash formats are supported: {}
 File "[^"]+", line \d+, in \S+
-""".format(algorithm, ', '.join(DEFAULT_HASH_FORMATS)), status=2, match=TestSCons.match_re)
+""".format(algorithm, ', '.join(get_hash_formats())), status=2, match=TestSCons.match_re)
         else:
             test.run('--hash-format=%s .' % algorithm, stderr=r"""
 scons: \*\*\* Hash format "{}" is not supported by SCons. SCons supports more hash formats than your local system is reporting; SCons supports: {}. Your local system only supports: {}
 File "[^"]+", line \d+, in \S+
-""".format(algorithm, ', '.join(DEFAULT_HASH_FORMATS), ', '.join(ALLOWED_HASH_FORMATS)), status=2, match=TestSCons.match_re)
+""".format(algorithm, ', '.join(DEFAULT_HASH_FORMATS + get_hash_formats()[len(ALLOWED_HASH_FORMATS):]), ', '.join(get_hash_formats())), status=2, match=TestSCons.match_re)
         continue
     elif algorithm is not None:
-        if algorithm in ALLOWED_HASH_FORMATS:
+        if algorithm in get_hash_formats():
             expected_dblite = test.workpath('.sconsign_%s.dblite' % algorithm)
             test.run('--hash-format=%s .' % algorithm)
         else:
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test -j auto: the job limit is an upper bound of twice the CPU count,
+the build completes, the adaptive job count is reported with
+--debug=time, and SetOption('num_jobs', 'auto') works too. Values
+other than auto and positive integers are rejected.
+"""
+
+import os
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+auto_jobs = 2 * (os.cpu_count() or 1)
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+if ARGUMENTS.get('SET'):
+    SetOption('num_jobs', 'auto')
+print("num_jobs: %%d" %% GetOption('num_jobs'))
+print("jobs_auto: %%s" %% GetOption('jobs_auto'))
+env = Environment(tools=[])
+for i in range(4):
+    env.Command('f%%d.out' %% i, 'f%%d.in' %% i, Copy('$TARGET', '$SOURCE'))
+""" % locals())
+
+for i in range(4):
+    test.write('f%d.in' % i, "f%d.in\n" % i)
+
+test.run(arguments='-j auto --debug=time .')
+test.must_contain_all_lines(test.stdout(), [
+    "num_jobs: %d\n" % auto_jobs,
+    "jobs_auto: True\n",
+    "Jobs allowed from 0.000000 seconds: %d\n" % (auto_jobs // 2),
+])
+for i in range(4):
+    test.must_match('f%d.out' % i, "f%d.in\n" % i, mode='r')
+
+test.run(arguments='-c .')
+
+test.run(arguments='SET=1 .')
+test.must_contain_all_lines(test.stdout(), [
+    "num_jobs: %d\n" % auto_jobs,
+    "jobs_auto: True\n",
+])
+for i in range(4):
+    test.must_exist('f%d.out' % i)
+
+# The command line overrides the SConscript file.
+test.run(arguments='-j 3 SET=1 -c .')
+test.must_contain_all_lines(test.stdout(), [
+    "num_jobs: 3\n",
+    "jobs_auto: False\n",
+])
+
+for value in ('lots', '0', '-2', '1.5'):
+    test.run(arguments='-j %s .' % value, status=2, stderr=None)
+    test.must_contain_all_lines(test.stderr(), [
+        "option -j: 'auto' or a positive integer is required: '%s'" % value,
+    ])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
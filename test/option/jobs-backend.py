@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test the --jobs-backend option: with the process backend, picklable
+ActionFactory actions, functions given with picklable=True, Textfile,
+Substfile and Install run in worker processes, while other Python
+function actions still run in the SCons process.
+"""
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.subdir('site_scons')
+
+test.write(['site_scons', 'pidfunc.py'], """\
+import os
+
+def write_pid(dest) -> None:
+    with open(dest, 'w') as f:
+        f.write('%d\\n' % os.getpid())
+
+def write_pid_action(target, source, env) -> None:
+    with open(target[0], 'w') as f:
+        f.write('%d\\n' % os.getpid())
+""")
+
+test.write('SConstruct', """\
+import os
+import pidfunc
+from SCons.Action import ActionFactory
+
+DefaultEnvironment(tools=[])
+WritePid = ActionFactory(pidfunc.write_pid, lambda dest: 'WritePid(%s)' % dest)
+
+def local_pid(target, source, env):
+    with open(str(target[0]), 'w') as f:
+        f.write('%d\\n' % os.getpid())
+
+with open('scons.pid', 'w') as f:
+    f.write('%d\\n' % os.getpid())
+
+env = Environment(tools=[])
+env.Command('f1.out', [], WritePid('$TARGET'))
+env.Command('f2.out', [], WritePid('$TARGET'))
+env.Command('f3.out', [], local_pid)
+env.Command('f4.out', 'f1.out', Copy('$TARGET', '$SOURCE'))
+env.Command('f5.out', [], Action(pidfunc.write_pid_action, picklable=True))
+env.Command('f6.out', [], Action(local_pid, picklable=True))
+
+env = Environment(tools=['textfile', 'install'])
+env.Textfile('t1.txt', ['line 1', 'line 2'])
+env.Substfile('t2.txt', 't2.in', SUBST_DICT={'@X@': 'x'})
+env.Install('inst', 't2.in')
+""")
+
+test.write('t2.in', "value @X@\n")
+
+test.run(arguments='-j 2 --jobs-backend=process .')
+scons_pid = test.read('scons.pid', 'r')
+test.fail_test(test.read('f1.out', 'r') == scons_pid)
+test.fail_test(test.read('f2.out', 'r') == scons_pid)
+test.must_match('f3.out', scons_pid, mode='r')
+test.must_match('f4.out', test.read('f1.out', 'r'), mode='r')
+test.fail_test(test.read('f5.out', 'r') == scons_pid)
+test.must_match('f6.out', scons_pid, mode='r')
+test.must_match('t1.txt', "line 1\nline 2", mode='r')
+test.must_match('t2.txt', "value x\n", mode='r')
+test.must_match(['inst', 't2.in'], "value @X@\n", mode='r')
+
+test.run(arguments='-c .')
+test.run(arguments='-j 2 --jobs-backend=thread .')
+scons_pid = test.read('scons.pid', 'r')
+test.must_match('f1.out', scons_pid, mode='r')
+
+test.run(arguments='-j 2 --jobs-backend=bogus .', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(), [
+    "option --jobs-backend: invalid choice: 'bogus'",
+])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test GNU make jobserver support: with --jobserver, the commands run
+by a parallel build find a jobserver in MAKEFLAGS, and a build run
+under a parent's jobserver takes its job slots from it and passes it
+on.
+"""
+
+import os
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+if not hasattr(os, 'mkfifo'):
+    test.skip_test("Jobserver support requires named pipes; skipping test.\n")
+
+test.write('flags.py', """\
+import os
+import sys
+with open(sys.argv[1], 'w') as f:
+    f.write(os.environ.get('MAKEFLAGS', '') + '\\n')
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+for i in range(4):
+    env.Command('f%%d.out' %% i, [], r'%(_python_)s flags.py $TARGET')
+""" % locals())
+
+test.run(arguments='-j 2 --jobserver .')
+for i in range(4):
+    flags = test.read('f%d.out' % i, mode='r')
+    test.fail_test('--jobserver-auth=fifo:' not in flags, message=flags)
+    fifo = flags.split('fifo:')[1].split()[0]
+    test.fail_test(os.path.exists(fifo), message=fifo + " was not removed")
+
+test.run(arguments='-c .')
+
+# Without --jobserver, nothing is passed on.
+test.run(arguments='-j 2 .')
+for i in range(4):
+    test.must_match('f%d.out' % i, '\n', mode='r')
+
+test.run(arguments='-c .')
+
+# Under a parent's jobserver with no spare tokens, the build still
+# completes on its implicit job slot, and the parent's jobserver is
+# what is passed on.
+fifo = test.workpath('parent-fifo')
+os.mkfifo(fifo)
+fd = os.open(fifo, os.O_RDWR | os.O_NONBLOCK)
+try:
+    parent_flags = '-j2 --jobserver-auth=fifo:' + fifo
+    os.environ['MAKEFLAGS'] = parent_flags
+    test.run(arguments='-j 4 --jobserver .')
+finally:
+    del os.environ['MAKEFLAGS']
+    os.close(fd)
+for i in range(4):
+    test.must_match('f%d.out' % i, '--jobserver-auth=fifo:%s\n' % fifo, mode='r')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
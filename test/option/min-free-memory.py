@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test the --min-free-memory and --max-memory-pressure options: a
+parallel build still completes, the peak memory use of each builder's
+commands is recorded next to the .sconsign file, and bad values are
+rejected.
+"""
+
+import pickle
+import sys
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+if not sys.platform.startswith('linux'):
+    test.skip_test("Memory use is only recorded on Linux; skipping test.\n")
+
+test.write('build.py', """\
+import sys
+data = bytearray(32 * 1024 * 1024)
+with open(sys.argv[1], 'w') as f:
+    f.write('built\\n')
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env['BUILDERS']['Big'] = Builder(action=r'%(_python_)s build.py $TARGET')
+for i in range(4):
+    env.Big('f%%d.out' %% i, [])
+""" % locals())
+
+test.run(arguments='-j 2 --min-free-memory=1k --max-memory-pressure=100 .')
+for i in range(4):
+    test.must_match('f%d.out' % i, 'built\n', mode='r')
+test.must_exist('.sconsign.memory')
+with open(test.workpath('.sconsign.memory'), 'rb') as f:
+    history = pickle.load(f)
+test.fail_test(list(history) != ['Big'], message=repr(history))
+test.fail_test(history['Big'] < 32 * 1024 * 1024, message=repr(history))
+
+test.run(arguments='-j 2 --min-free-memory=lots .', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(), [
+    "`lots' is not a valid memory size",
+])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
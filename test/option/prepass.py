@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Test --prepass: a parallel build checks its files ahead of the
+Taskmaster, and still rebuilds exactly what changed, including
+sources in a variant directory and files found by scanning.  With
+the content-timestamp decider, a source whose timestamp changed but
+whose content did not causes no rebuild.
+"""
+
+import os
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+if ARGUMENTS.get('SET'):
+    SetOption('prepass', True)
+print("prepass: %s" % GetOption('prepass'))
+def cat(target, source, env):
+    with open(str(target[0]), 'w') as ofp:
+        for s in source:
+            with open(str(s)) as ifp:
+                ofp.write(ifp.read())
+
+env = Environment(tools=[])
+env.Decider(ARGUMENTS.get('DECIDER', 'content'))
+for i in range(4):
+    env.Command('f%d.out' % i, 'f%d.in' % i, Copy('$TARGET', '$SOURCE'))
+env.Command('all.out', ['f%d.out' % i for i in range(4)], Action(cat, 'cat'))
+SConscript('src/SConscript', variant_dir='build', exports='env')
+""")
+
+test.subdir('src')
+test.write(['src', 'SConscript'], """\
+Import('env')
+env.Command('v.out', 'v.in', Copy('$TARGET', '$SOURCE'))
+""")
+test.write(['src', 'v.in'], "v.in\n")
+for i in range(4):
+    test.write('f%d.in' % i, "f%d.in\n" % i)
+
+test.run(arguments='-j 2 --prepass .')
+test.must_contain_all_lines(test.stdout(), ["prepass: True\n"])
+test.must_match('all.out', "f0.in\nf1.in\nf2.in\nf3.in\n", mode='r')
+test.must_match(['build', 'v.out'], "v.in\n", mode='r')
+
+test.up_to_date(options='-j 2 --prepass', read_str="prepass: True\n")
+test.up_to_date(options='-j 2 SET=1', read_str="prepass: True\n")
+
+test.write('f2.in', "f2.in changed\n")
+test.write(['src', 'v.in'], "v.in changed\n")
+test.run(arguments='-j 2 --prepass .')
+test.must_contain_all_lines(test.stdout(), [
+    "Copy(\"f2.out\", \"f2.in\")",
+    "Copy(\"build/v.out\", \"build/v.in\")",
+    "cat",
+])
+test.must_not_contain_any_line(test.stdout(), ["Copy(\"f1.out\""])
+test.must_match('all.out', "f0.in\nf1.in\nf2.in changed\nf3.in\n", mode='r')
+test.must_match(['build', 'v.out'], "v.in changed\n", mode='r')
+
+test.up_to_date(options='-j 2 --prepass', read_str="prepass: True\n")
+
+test.up_to_date(options='-j 2 --prepass DECIDER=content-timestamp',
+                read_str="prepass: True\n")
+later = os.path.getmtime(test.workpath('f1.in')) + 10
+os.utime(test.workpath('f1.in'), (later, later))
+test.write('f3.in', "f3.in changed\n")
+test.run(arguments='-j 2 --prepass DECIDER=content-timestamp .')
+test.must_contain_all_lines(test.stdout(), ["Copy(\"f3.out\", \"f3.in\")"])
+test.must_not_contain_any_line(test.stdout(), ["Copy(\"f1.out\""])
+test.must_match('all.out', "f0.in\nf1.in\nf2.in changed\nf3.in changed\n",
+                mode='r')
+
+test.up_to_date(options='-j 2 --prepass DECIDER=content-timestamp',
+                read_str="prepass: True\n")
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test --sconsign-checkpoint: signatures of targets built before a
+build is killed are kept, so the next build does not redo them.
+"""
+
+import sys
+
+import TestSCons
+
+if sys.platform == 'win32':
+    TestSCons.TestSCons().skip_test("Test kills the build with SIGKILL; skipping test.\n")
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+import os
+import signal
+import time
+from SCons.Script.Main import BuildTask
+
+DefaultEnvironment(tools=[])
+if ARGUMENTS.get('SET'):
+    SetOption('sconsign_checkpoint', ARGUMENTS['SET'])
+    print("checkpoint: %s" % (GetOption('sconsign_checkpoint'),))
+def kill(target, source, env):
+    if BuildTask.checkpointer is not None:
+        # Wait for the checkpoints made so far to be stored, as a
+        # longer build would.
+        BuildTask.checkpointer.close()
+    os.kill(os.getpid(), signal.SIGKILL)
+def pause(target, source, env):
+    time.sleep(1.5)
+    with open(str(target[0]), 'w') as f:
+        f.write("pause\\n")
+
+env = Environment(tools=[])
+for i in range(4):
+    env.Command('f%d.out' % i, 'f%d.in' % i, Copy('$TARGET', '$SOURCE'))
+env.Command('pause.out', 'f0.out', Action(pause, 'pause'))
+env.Command('kill.out', ['f%d.out' % i for i in range(4)], Action(kill, 'kill'))
+""")
+
+for i in range(4):
+    test.write('f%d.in' % i, "f%d.in\n" % i)
+targets = ' '.join('f%d.out' % i for i in range(4))
+
+expect_copies = ['Copy("f%d.out", "f%d.in")' % (i, i) for i in range(4)]
+
+# Without checkpoints, nothing built before the kill is remembered.
+test.run(arguments='-j 1 kill.out', status=None, stderr=None)
+test.fail_test(test.status == 0)
+test.must_exist('f3.out')
+test.run(arguments='-j 1 ' + targets)
+test.must_contain_all_lines(test.stdout(), expect_copies)
+
+test.unlink('.sconsign.dblite')
+test.run(arguments='-j 1 --sconsign-checkpoint=1 kill.out',
+         status=None, stderr=None)
+test.fail_test(test.status == 0)
+test.up_to_date(arguments=targets)
+
+test.unlink('.sconsign.dblite')
+test.run(arguments='-j 2 SET=1 kill.out', status=None, stderr=None)
+test.must_contain_all_lines(test.stdout(), ["checkpoint: (1, None)\n"])
+test.fail_test(test.status == 0)
+test.up_to_date(arguments=targets)
+
+# A checkpoint is made by the first task to finish after the interval.
+test.unlink('.sconsign.dblite')
+test.write('f0.in', "f0.in changed\n")
+test.run(arguments='-j 1 --sconsign-checkpoint=1s pause.out kill.out',
+         status=None, stderr=None)
+test.fail_test(test.status == 0)
+test.up_to_date(arguments='pause.out')
+
+# An ordinary build is not changed by checkpoints.
+test.run(arguments=targets)
+test.write('f1.in', "f1.in changed\n")
+test.run(arguments='--sconsign-checkpoint=2 ' + targets)
+test.must_contain_all_lines(test.stdout(), [expect_copies[1]])
+test.must_not_contain_any_line(test.stdout(), [expect_copies[2]])
+test.must_match('f1.out', "f1.in changed\n", mode='r')
+test.up_to_date(arguments=targets)
+
+test.run(arguments='--sconsign-checkpoint=0 .', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(),
+    ["`0' is not a valid checkpoint interval"])
+test.run(arguments='SET=xyz .', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(),
+    ["Not a valid checkpoint interval: 'xyz'"])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test --sconsign-gc: entries for files which are gone from the build
+or from disk, and directories which no longer exist, are removed from
+the signature database, which still works for later builds.
+"""
+
+import shutil
+
+import TestSConsign
+
+test = TestSConsign.TestSConsign(match=TestSConsign.match_re_dotall)
+
+test.write('SConstruct', """\
+import os
+DefaultEnvironment(tools=[])
+if ARGUMENTS.get('module'):
+    SConsignFile(dbm_module=ARGUMENTS['module'])
+env = Environment(tools=[])
+for name in ARGUMENTS.get('names', 'a,b,c').split(','):
+    env.Command(name + '.out', name + '.in', Copy('$TARGET', '$SOURCE'))
+if os.path.exists('sub'):
+    SConscript('sub/SConscript', exports='env')
+""")
+
+gc_line = (r"scons: sconsign gc: entries removed: %d, "
+           r"directories removed: %d, bytes reclaimed: \d+\n")
+
+database_name = test.get_sconsignname()
+for module, suffix in [('dblite', '.dblite'), ('dblog', '.dblog')]:
+    database = database_name + suffix
+    test.subdir('sub')
+    test.write(['sub', 'SConscript'], """\
+Import('env')
+env.Command('s.out', 's.in', Copy('$TARGET', '$SOURCE'))
+""")
+    test.write(['sub', 's.in'], "s.in\n")
+    for name in 'abc':
+        test.write(name + '.in', name + ".in\n")
+
+    test.run(arguments='module=%s .' % module)
+    test.run_sconsign(arguments=database,
+                      stdout=r".*c\.out:.*=== sub:\n.*s\.out:.*")
+
+    # Nothing is stale yet.
+    test.run(arguments='module=%s --sconsign-gc .' % module,
+             stdout=r".*" + gc_line % (0, 0))
+
+    # c.out is no longer a target, although the file is still there,
+    # c.in is gone, and so is the sub directory.
+    test.unlink('c.in')
+    shutil.rmtree(test.workpath('sub'))
+    test.run(arguments='module=%s names=a,b --sconsign-gc .' % module,
+             stdout=r".*" + gc_line % (5, 1))
+    test.run_sconsign(arguments=database,
+                      stdout=r"=== \.:\n(?!.*c\.(in|out)).*b\.out:.*")
+    test.fail_test('sub' in test.stdout())
+
+    test.up_to_date(options='module=%s names=a,b' % module, arguments='.')
+    test.write('a.in', "a.in changed\n")
+    test.run(arguments='module=%s names=a,b .' % module)
+    test.must_match('a.out', "a.in changed\n", mode='r')
+
+    test.unlink('c.out')
+    test.unlink(database)
+
+test.write('c.in', "c.in\n")
+test.run(arguments='-n --sconsign-gc .')
+test.must_not_contain_any_line(test.stdout(), ["sconsign gc"])
+
+# Nothing is removed after a failed build.
+test.run(arguments='--sconsign-gc . nonexistent', status=2, stderr=None)
+test.must_not_contain_any_line(test.stdout(), ["sconsign gc"])
+
+# With --sconsign-checkpoint, the directories checkpointed during the
+# build are still merged before the stale entries are removed.
+test.subdir('ck', ['ck', 'sub'])
+test.write(['ck', 'SConstruct'], """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+for name in ARGUMENTS.get('names', 'a,b').split(','):
+    env.Command('sub/%s.out' % name, 'sub/%s.in' % name,
+                Copy('$TARGET', '$SOURCE'))
+""")
+test.write(['ck', 'sub', 'a.in'], "a.in\n")
+test.write(['ck', 'sub', 'b.in'], "b.in\n")
+test.run(chdir='ck', arguments='.')
+test.write(['ck', 'sub', 'b.in'], "b.in changed\n")
+test.run(chdir='ck',
+         arguments='names=b --sconsign-checkpoint=1 --sconsign-gc .',
+         stdout=r".*" + gc_line % (2, 0))
+test.must_match(['ck', 'sub', 'b.out'], "b.in changed\n", mode='r')
+test.up_to_date(chdir='ck', options='names=b', arguments='.')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
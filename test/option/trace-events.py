@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test the --trace-events option: a parallel build writes a Chrome
+trace-event file with spans for scanning, signatures, action execution
+and the .sconsign write, on per-thread lanes.
+"""
+
+import json
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+for i in range(4):
+    env.Command('f%d.out' % i, 'f%d.in' % i, Copy('$TARGET', '$SOURCE'))
+""")
+
+for i in range(4):
+    test.write('f%d.in' % i, "f%d.in\n" % i)
+
+test.run(arguments='-j 2 --trace-events=trace.json .')
+for i in range(4):
+    test.must_match('f%d.out' % i, "f%d.in\n" % i, mode='r')
+
+with open(test.workpath('trace.json')) as f:
+    trace = json.load(f)
+events = trace['traceEvents']
+spans = [e for e in events if e['ph'] == 'X']
+names = {(e['cat'], e['name']) for e in spans}
+for expect in [('scan', 'scan'), ('signature', 'signature'),
+               ('action', 'execute'), ('sconsign', 'write')]:
+    test.fail_test(expect not in names, message=repr(names))
+executed = sorted(e['args']['target'] for e in spans
+                  if e['name'] == 'execute' and e['args']['target'] != '.')
+test.fail_test(executed != ['f0.out', 'f1.out', 'f2.out', 'f3.out'],
+               message=repr(executed))
+lanes = {e['tid'] for e in events if e['ph'] == 'M'}
+test.fail_test(lanes != {e['tid'] for e in spans}, message=repr(lanes))
+test.fail_test(any(e['dur'] < 0 for e in spans))
+
+# Failing to write the trace is reported, but does not fail the build.
+test.run(arguments='-c .')
+test.run(arguments='--trace-events=no_such_dir/trace.json .', stderr=None)
+test.must_contain_all_lines(test.stderr(), [
+    "scons: warning: Unable to write trace events file",
+    "no_such_dir",
+])
+test.must_exist('f0.out')
+test.run(arguments='--warn=no-trace-write-error '
+                   '--trace-events=no_such_dir/trace.json .')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4: